@@ -0,0 +1,8 @@
+"""
+Benchmarks for the indexer. Each module is runnable on its own from `src`, e.g.
+
+`python -m bench.replay example_rumble_kong_league --transactions 100000`
+
+Benchmarks run against an in-memory db (`bench.memory_db.MemoryDB`), so they
+measure our own code and not the network or the disk.
+"""
@@ -0,0 +1,76 @@
+"""
+Compares the decoding throughput of the local ABI decoder, one log at a time
+and in batches, against decoding every field with eth_abi.decode_single, which
+is how the club auction used to decode its undecoded PlaceBid logs.
+
+`python -m bench.decode --logs 100000 --batch 500`
+"""
+
+import argparse
+import time
+from typing import Any, Callable, Dict, List
+
+from eth_abi import decode_single
+
+from bench.fixtures import LENT_TOPIC, PLACE_BID_TOPIC, auction_bids, azrael_lendings
+from transformers.azrael.main import Transformer as Azrael
+from transformers.rkl_club_auction.main import Transformer as Auction
+
+Logs = List[Dict[str, Any]]
+
+
+def _decode_single(logs: Logs) -> None:
+    for log_event in logs:
+        topics = log_event["raw_log_topics"]
+        decode_single("address", bytes.fromhex(topics[1][2:]))
+        decode_single("uint256", bytes.fromhex(topics[2][2:]))
+
+
+def _time(decode: Callable[[Logs], None], logs: Logs, batch: int) -> float:
+    start = time.perf_counter()
+    for ix in range(0, len(logs), batch):
+        decode(logs[ix : ix + batch])
+    return len(logs) / (time.perf_counter() - start)
+
+
+def main():
+    """Benchmark entrypoint"""
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logs", type=int, default=100_000)
+    parser.add_argument("--batch", type=int, default=500)
+    args = parser.parse_args()
+
+    # pylint: disable=protected-access
+    events = (
+        ("PlaceBid", auction_bids, Auction._decoders[PLACE_BID_TOPIC]),
+        ("Lent", azrael_lendings, Azrael._decoders[LENT_TOPIC]),
+    )
+
+    for event, fixture, decoder in events:
+        logs = [txn["log_events"][0] for txn in fixture(args.logs, "0x0")]
+
+        def decode_scalar(logs: Logs, decoder=decoder) -> None:
+            for log_event in logs:
+                decoder.decode(log_event["raw_log_topics"], log_event["raw_log_data"])
+
+        def decode_batch(logs: Logs, decoder=decoder) -> None:
+            decoder.decode_batch(
+                [log_event["raw_log_topics"] for log_event in logs],
+                [log_event["raw_log_data"] for log_event in logs],
+            )
+
+        paths = [
+            ("transform.abi", decode_scalar),
+            ("transform.abi batch", decode_batch),
+        ]
+        if event == "PlaceBid":
+            paths.insert(0, ("eth_abi.decode_single", _decode_single))
+
+        for name, decode in paths:
+            throughput = _time(decode, logs, args.batch)
+            print(f"{name}: {throughput:,.0f} {event} logs/sec")
+
+
+if __name__ == "__main__":
+    main()
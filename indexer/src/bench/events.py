@@ -0,0 +1,93 @@
+"""
+Compares the slotted azrael and sylvester event DTOs against the plain
+dataclasses that they replaced: memory held per event and the time it takes
+to serialize an event into a document.
+
+`python -m bench.events --events 100000`
+"""
+
+import argparse
+import dataclasses
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from transformers.azrael.event import LentEvent
+from transformers.sylvester.event import RentEvent
+
+LENT = {
+    "_id": "0x7a250d5630b4cf539739df2c5dacb4c659f2488d7a250d5630b4cf539739df2c_12",
+    "event": "Lent",
+    "lendingId": 1234,
+    "lentAmount": 1,
+    "maxRentDuration": 30,
+    "paymentToken": 2,
+    "nftAddress": "0x7a250d5630b4cf539739df2c5dacb4c659f2488d",
+    "tokenId": "4567",
+    "lendersAddress": "0x7a250d5630b4cf539739df2c5dacb4c659f2488d",
+    "dailyRentPrice": 1.5,
+    "nftPrice": 100.0,
+    "isERC721": True,
+}
+
+RENT = {
+    "_id": "0x7a250d5630b4cf539739df2c5dacb4c659f2488d7a250d5630b4cf539739df2c_13",
+    "event": "Rent",
+    "renterAddress": "0x7a250d5630b4cf539739df2c5dacb4c659f2488d",
+    "lendingID": 1234,
+    "rentingID": 5678,
+    "rentAmount": 1,
+    "rentDuration": 7,
+    "rentedAt": 1_650_000_000,
+}
+
+
+def _per_event_bytes(create: Callable[[], Any], events: int) -> float:
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    instances = [create() for _ in range(events)]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # the list that holds the instances is not part of an event
+    return (after - before) / len(instances) - 8
+
+
+def _serializations_per_sec(serialize: Callable[[Any], Dict], instances: List) -> float:
+    start = time.perf_counter()
+    for instance in instances:
+        serialize(instance)
+    return len(instances) / (time.perf_counter() - start)
+
+
+def main():
+    """Benchmark entrypoint"""
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=100_000)
+    args = parser.parse_args()
+
+    for dto, document in ((LentEvent, LENT), (RentEvent, RENT)):
+        fields = list(document)
+        dataclass = dataclasses.make_dataclass(dto.__name__, [(f, Any) for f in fields])
+        values = list(document.values())
+
+        for name, cls, serialize in (
+            ("dataclass + asdict", dataclass, dataclasses.asdict),
+            # * to_dict is generated by @dto, so it is looked up on the instance
+            ("dto + to_dict", dto, lambda instance: instance.to_dict()),
+        ):
+            per_event = _per_event_bytes(
+                lambda cls=cls, values=values: cls(*values), args.events
+            )
+            instances = [cls(*values) for _ in range(args.events)]
+            throughput = _serializations_per_sec(serialize, instances)
+
+            print(
+                f"{dto.__name__} {name}: {per_event:,.0f} bytes/event, "
+                f"{throughput:,.0f} to dict/sec"
+            )
+
+
+if __name__ == "__main__":
+    main()
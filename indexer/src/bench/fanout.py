@@ -0,0 +1,60 @@
+"""
+Transforms a contract that emits both kong transfers and auction bids with the
+kong and the auction transformers: one after the other, each reading the raw
+transactions on its own, against a single fan out read.
+
+`python -m bench.fanout --transactions 100000`
+"""
+
+import argparse
+import time
+
+from config import Config
+from transform.fanout import FanOutTransform
+from transform.main import Transform
+
+from bench.fixtures import transfers_and_bids
+from bench.memory_db import MemoryDB
+
+DATABASE_NAME = "ethereum-indexer"
+TRANSFORMERS = ["example_rumble_kong_league", "rkl_club_auction"]
+
+
+def main():
+    """Benchmark entrypoint"""
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--transactions", type=int, default=100_000)
+    args = parser.parse_args()
+
+    address = Config.rkl_club_auction().get_address()
+    history = list(transfers_and_bids(args.transactions, address))
+
+    def config(transformer_name: str) -> Config:
+        return Config(address, "fanout.log", transformer_name, 1)
+
+    db = MemoryDB()
+    db.put_items(history, DATABASE_NAME, address)
+
+    start = time.perf_counter()
+    for transformer_name in TRANSFORMERS:
+        Transform(
+            config(transformer_name), db=db, namespace=transformer_name
+        ).transform()
+    one_by_one = time.perf_counter() - start
+
+    db = MemoryDB()
+    db.put_items(history, DATABASE_NAME, address)
+
+    start = time.perf_counter()
+    FanOutTransform(config(TRANSFORMERS[0]), TRANSFORMERS, db=db).transform()
+    fan_out = time.perf_counter() - start
+
+    print(
+        f"{args.transactions} txns, {len(TRANSFORMERS)} transformers: "
+        f"one by one {one_by_one:.2f}s, fan out {fan_out:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
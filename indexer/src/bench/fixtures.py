@@ -0,0 +1,565 @@
+"""Synthetic Covalent transaction histories for the benchmarks."""
+
+import base64
+import json
+import os
+import random
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from transform.abi import EventDecoder, event_topic
+
+# keccak("Transfer(address,address,uint256)")
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+# keccak("PlaceBid(address,uint256)")
+PLACE_BID_TOPIC = "0xe694ab314354b7ccad603c48b44dce6ade8b6a57cbebaa8842edd9a2fb2856f8"
+# keccak("Lent(address,uint256,uint8,uint256,address,uint8,bytes4,bytes4,bool,uint8)")
+LENT_TOPIC = "0xc1b2f77226541f6b308379a3110d77af45464d9a161a6eb4b6cfdcd0fb2089c6"
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+# events of a whole lending lifecycle -> weight of the event in the history.
+# An event that no lending is in the state for, e.g. a return while nothing is
+# rented, is a lend instead
+AZRAEL_MIX = {
+    "Lent": 4,
+    "Rented": 3,
+    "Returned": 2,
+    "LendingStopped": 1,
+    "CollateralClaimed": 0.5,
+}
+SYLVESTER_MIX = {
+    "Lend": 4,
+    "Rent": 3,
+    "StopRent": 2,
+    "RentClaimed": 0.5,
+    "StopLend": 1,
+}
+
+# this many transactions are packed into a single block
+TXNS_PER_BLOCK = 4
+FIRST_BLOCK = 12_000_000
+# block timestamp of the first block, blocks are this many seconds apart
+FIRST_TIMESTAMP = 1_630_000_000
+BLOCK_SECONDS = 13
+
+
+def _address(rng: random.Random) -> str:
+    return "0x" + "".join(rng.choice("0123456789abcdef") for _ in range(40))
+
+
+def _topic(value: int) -> str:
+    return "0x" + format(value, "064x")
+
+
+def _address_topic(address: str) -> str:
+    return "0x" + address[2:].rjust(64, "0")
+
+
+def _word(value: int) -> str:
+    return format(value, "064x")
+
+
+def _price_word(rng: random.Random) -> str:
+    # * bytes4 are left aligned, whole part first and then the decimals
+    return format(rng.randrange(10_000), "04x") + format(rng.randrange(10_000), "04x")
+
+
+def _timestamp(ix: int) -> int:
+    return FIRST_TIMESTAMP + ix // TXNS_PER_BLOCK * BLOCK_SECONDS
+
+
+def _pick(rng: random.Random, mix: Dict[str, float]) -> str:
+    return rng.choices(list(mix), weights=list(mix.values()))[0]
+
+
+def _raw_log(address: str, topics: List[str], data: List[str]) -> Dict[str, Any]:
+    return {
+        "sender_address": address.lower(),
+        "raw_log_topics": topics,
+        "raw_log_data": "0x" + "".join(data) if data else None,
+        "decoded": None,
+    }
+
+
+def _param(name: str, type_: str, value: Any, indexed: bool = True) -> Dict[str, Any]:
+    return {
+        "name": name,
+        "type": type_,
+        "indexed": indexed,
+        "decoded": True,
+        "value": value,
+    }
+
+
+def _transaction(ix: int, log_events: List[Dict[str, Any]]) -> Dict[str, Any]:
+    tx_hash = _topic(ix + 1)
+    block_height = FIRST_BLOCK + ix // TXNS_PER_BLOCK
+    tx_offset = ix % TXNS_PER_BLOCK
+
+    for log_offset, log_event in enumerate(log_events):
+        log_event["tx_hash"] = tx_hash
+        log_event["block_height"] = block_height
+        log_event["tx_offset"] = tx_offset
+        log_event["log_offset"] = tx_offset * 10 + log_offset
+
+    # * covalent does not guarantee the order of the logs
+    log_events.reverse()
+
+    return {
+        "_id": tx_hash,
+        "tx_hash": tx_hash,
+        "block_height": block_height,
+        "tx_offset": tx_offset,
+        "successful": True,
+        "log_events": log_events,
+    }
+
+
+def kong_transfers(
+    count: int, address: str, tokens: int = 10_000, holders: int = 2_000, seed: int = 0
+) -> Iterator[Dict[str, Any]]:
+    """
+    Transactions of an ERC721 collection. The first `tokens` transactions mint,
+    the rest transfer a random token to a random holder.
+
+    Args:
+        count (int): number of transactions
+        address (str): address of the collection
+        tokens (int, optional): size of the collection. Defaults to 10_000.
+        holders (int, optional): number of distinct holders. Defaults to 2_000.
+        seed (int, optional): seed of the history. Defaults to 0.
+
+    Yields:
+        Iterator[Dict[str, Any]]: raw covalent transactions
+    """
+
+    rng = random.Random(seed)
+    wallets = [_address(rng) for _ in range(holders)]
+    owners: List[str] = []
+
+    for ix in range(count):
+        to_ = rng.choice(wallets)
+
+        if ix < tokens:
+            token_id, from_ = ix, ZERO_ADDRESS
+            owners.append(to_)
+        else:
+            token_id = rng.randrange(len(owners))
+            from_ = owners[token_id]
+            owners[token_id] = to_
+
+        log_event = {
+            "sender_address": address.lower(),
+            "raw_log_topics": [
+                TRANSFER_TOPIC,
+                _address_topic(from_),
+                _address_topic(to_),
+                _topic(token_id),
+            ],
+            "raw_log_data": None,
+            "decoded": {
+                "name": "Transfer",
+                "signature": "Transfer(indexed address from, indexed address to, "
+                "indexed uint256 tokenId)",
+                "params": [
+                    _param("from", "address", from_),
+                    _param("to", "address", to_),
+                    _param("tokenId", "uint256", str(token_id)),
+                ],
+            },
+        }
+
+        yield _transaction(ix, [log_event])
+
+
+def auction_bids(
+    count: int, address: str, bidders: int = 1_000, seed: int = 0
+) -> Iterator[Dict[str, Any]]:
+    """
+    Transactions of the club auction. Every transaction places a single bid
+    of a random bidder. Like on kovan, none of the logs are decoded by covalent.
+
+    Args:
+        count (int): number of transactions
+        address (str): address of the auction
+        bidders (int, optional): number of distinct bidders. Defaults to 1_000.
+        seed (int, optional): seed of the history. Defaults to 0.
+
+    Yields:
+        Iterator[Dict[str, Any]]: raw covalent transactions
+    """
+
+    rng = random.Random(seed)
+    wallets = [_address(rng) for _ in range(bidders)]
+
+    for ix in range(count):
+        price = rng.randrange(1, 100) * 10**16
+
+        log_event = {
+            "sender_address": address.lower(),
+            "raw_log_topics": [
+                PLACE_BID_TOPIC,
+                _address_topic(rng.choice(wallets)),
+                _topic(price),
+            ],
+            "raw_log_data": None,
+            "decoded": None,
+        }
+
+        yield _transaction(ix, [log_event])
+
+
+def azrael_lendings(
+    count: int,
+    address: str,
+    nfts: int = 100,
+    lenders: int = 1_000,
+    seed: int = 0,
+    mix: Optional[Dict[str, float]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Transactions of azrael. Every transaction lends a random token of a random
+    nft, or with a mix, emits an event of the lifecycle of a lending. The logs
+    are not decoded by covalent, only the raw log is supplied.
+
+    Args:
+        count (int): number of transactions
+        address (str): address of azrael
+        nfts (int, optional): number of distinct nft contracts. Defaults to 100.
+        lenders (int, optional): number of distinct lenders. Defaults to 1_000.
+        seed (int, optional): seed of the history. Defaults to 0.
+        mix (Optional[Dict[str, float]], optional): event name -> weight, e.g.
+        AZRAEL_MIX. Defaults to None, lends only.
+
+    Yields:
+        Iterator[Dict[str, Any]]: raw covalent transactions
+    """
+
+    rng = random.Random(seed)
+    nft_addresses = [_address(rng) for _ in range(nfts)]
+    wallets = [_address(rng) for _ in range(lenders)]
+
+    # ids of the lendings that are lent, and of the ones that are rented
+    lent: List[int] = []
+    rented: List[int] = []
+
+    for ix in range(count):
+        event = "Lent" if mix is None else _pick(rng, mix)
+        timestamp = _word(_timestamp(ix))
+
+        if event == "Rented" and lent:
+            lending_id = lent.pop(rng.randrange(len(lent)))
+            rented.append(lending_id)
+            log_event = _raw_log(
+                address,
+                [
+                    event_topic("Rented(uint256,address,uint8,uint32)"),
+                    _address_topic(rng.choice(wallets)),
+                ],
+                [_word(lending_id), _word(rng.randrange(1, 30)), timestamp],
+            )
+        elif event in ("Returned", "CollateralClaimed") and rented:
+            lending_id = rented.pop(rng.randrange(len(rented)))
+            if event == "Returned":
+                lent.append(lending_id)
+            log_event = _raw_log(
+                address,
+                [event_topic(f"{event}(uint256,uint32)"), _topic(lending_id)],
+                [timestamp],
+            )
+        elif event == "LendingStopped" and lent:
+            lending_id = lent.pop(rng.randrange(len(lent)))
+            log_event = _raw_log(
+                address,
+                [event_topic("LendingStopped(uint256,uint32)"), _topic(lending_id)],
+                [timestamp],
+            )
+        else:
+            lending_id = ix + 1
+            lent.append(lending_id)
+            # lentAmount, lendingId, maxRentDuration, dailyRentPrice, nftPrice,
+            # isERC721, paymentToken
+            data = [
+                _word(1),
+                _word(lending_id),
+                _word(rng.randrange(1, 100)),
+                _price_word(rng).ljust(64, "0"),
+                _price_word(rng).ljust(64, "0"),
+                _word(1),
+                _word(rng.randrange(1, 5)),
+            ]
+            log_event = _raw_log(
+                address,
+                [
+                    LENT_TOPIC,
+                    _address_topic(rng.choice(nft_addresses)),
+                    _topic(rng.randrange(10_000)),
+                    _address_topic(rng.choice(wallets)),
+                ],
+                data,
+            )
+
+        yield _transaction(ix, [log_event])
+
+
+def sylvester_lendings(
+    count: int,
+    address: str,
+    nfts: int = 100,
+    wallets: int = 1_000,
+    seed: int = 0,
+    mix: Optional[Dict[str, float]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Transactions of sylvester. Every transaction emits an event of the
+    lifecycle of a lending of a single token, and of its rentings. The logs are
+    not decoded by covalent, only the raw log is supplied.
+
+    Args:
+        count (int): number of transactions
+        address (str): address of sylvester
+        nfts (int, optional): number of distinct nft contracts. Defaults to 100.
+        wallets (int, optional): number of distinct lenders and renters.
+        Defaults to 1_000.
+        seed (int, optional): seed of the history. Defaults to 0.
+        mix (Optional[Dict[str, float]], optional): event name -> weight.
+        Defaults to None, SYLVESTER_MIX.
+
+    Yields:
+        Iterator[Dict[str, Any]]: raw covalent transactions
+    """
+
+    rng = random.Random(seed)
+    nft_addresses = [_address(rng) for _ in range(nfts)]
+    addresses = [_address(rng) for _ in range(wallets)]
+    mix = SYLVESTER_MIX if mix is None else mix
+
+    # ids of the lendings that are lent, and renting id -> its lending id
+    lent: List[int] = []
+    rentings: Dict[int, int] = {}
+
+    for ix in range(count):
+        event = _pick(rng, mix)
+        timestamp = _word(_timestamp(ix))
+
+        if event == "Rent" and lent:
+            lending_id = lent.pop(rng.randrange(len(lent)))
+            renting_id = ix + 1
+            rentings[renting_id] = lending_id
+            log_event = _raw_log(
+                address,
+                [
+                    event_topic("Rent(address,uint256,uint256,uint16,uint8,uint32)"),
+                    _address_topic(rng.choice(addresses)),
+                    _topic(lending_id),
+                    _topic(renting_id),
+                ],
+                [_word(1), _word(rng.randrange(1, 30)), timestamp],
+            )
+        elif event in ("StopRent", "RentClaimed") and rentings:
+            renting_id = rng.choice(list(rentings))
+            lent.append(rentings.pop(renting_id))
+            log_event = _raw_log(
+                address,
+                [event_topic(f"{event}(uint256,uint32)"), _topic(renting_id)],
+                [timestamp],
+            )
+        elif event == "StopLend" and lent:
+            lending_id = lent.pop(rng.randrange(len(lent)))
+            log_event = _raw_log(
+                address,
+                [event_topic("StopLend(uint256,uint32)"), _topic(lending_id)],
+                [timestamp],
+            )
+        else:
+            lending_id = ix + 1
+            lent.append(lending_id)
+            # is721, lendingID, maxRentDuration, dailyRentPrice, lendAmount,
+            # paymentToken
+            log_event = _raw_log(
+                address,
+                [
+                    event_topic(
+                        "Lend(bool,address,address,uint256,uint256,uint8,bytes4"
+                        ",uint16,uint8)"
+                    ),
+                    _address_topic(rng.choice(addresses)),
+                    _address_topic(rng.choice(nft_addresses)),
+                    _topic(rng.randrange(10_000)),
+                ],
+                [
+                    _word(1),
+                    _word(lending_id),
+                    _word(rng.randrange(1, 100)),
+                    _price_word(rng).ljust(64, "0"),
+                    _word(1),
+                    _word(rng.randrange(1, 5)),
+                ],
+            )
+
+        yield _transaction(ix, [log_event])
+
+
+def transfers_and_bids(count: int, address: str) -> Iterator[Dict[str, Any]]:
+    """
+    Transactions of a single contract that emits both the kong Transfer and the
+    auction PlaceBid events: every transaction transfers a kong and places a bid.
+    To run more than one transformer over the same address.
+
+    Args:
+        count (int): number of transactions
+        address (str): address of the contract
+
+    Yields:
+        Iterator[Dict[str, Any]]: raw covalent transactions
+    """
+
+    for transfer, bid in zip(
+        kong_transfers(count, address), auction_bids(count, address)
+    ):
+        for log_event in bid["log_events"]:
+            log_event["log_offset"] += len(transfer["log_events"])
+
+        transfer["log_events"] += bid["log_events"]
+
+        yield transfer
+
+
+def _covalent_value(type_: str, value: Any) -> Any:
+    # * covalent returns numbers as strings, and bytes base64 encoded
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode()
+    if type_.startswith(("uint", "int")):
+        return str(value)
+    return value
+
+
+def covalent_decoded(
+    history: Iterable[Dict[str, Any]],
+    transformer_name: str,
+    ratio: float,
+    seed: int = 0,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Has covalent decode a share of the logs of the events in the ABI of the
+    transformer, and not the rest, like it does for contracts that it only
+    partially knows. Covalent's decoding is dropped from the logs that it does
+    not decode.
+
+    Args:
+        history (Iterable[Dict[str, Any]]): raw covalent transactions
+        transformer_name (str): name of the transformer with the abi.json
+        ratio (float): share of the logs that covalent decodes, in [0, 1]
+        seed (int, optional): seed of the choice of the logs. Defaults to 0.
+
+    Yields:
+        Iterator[Dict[str, Any]]: the raw transactions, in place
+    """
+
+    abi_path = os.path.join(
+        os.path.dirname(__file__), "..", "transformers", transformer_name, "abi.json"
+    )
+    with open(abi_path, "r", encoding="utf-8") as f:
+        events = [entry for entry in json.load(f) if entry.get("type") == "event"]
+
+    # topic0 -> (decoder, abi of the event)
+    decoders = {}
+    for abi in events:
+        decoder = EventDecoder(abi)
+        decoders[decoder.topic] = (decoder, abi)
+
+    rng = random.Random(seed)
+
+    for txn in history:
+        for log_event in txn["log_events"]:
+            topics = log_event["raw_log_topics"]
+            if not topics or topics[0] not in decoders:
+                continue
+
+            if rng.random() >= ratio:
+                log_event["decoded"] = None
+                continue
+
+            decoder, abi = decoders[topics[0]]
+            values = decoder.decode(topics, log_event["raw_log_data"])
+            log_event["decoded"] = {
+                "name": abi["name"],
+                "signature": decoder.signature,
+                "params": [
+                    _param(
+                        param["name"],
+                        param["type"],
+                        _covalent_value(param["type"], value),
+                        param.get("indexed", False),
+                    )
+                    for param, value in zip(abi["inputs"], values)
+                ],
+            }
+
+        yield txn
+
+
+def with_foreign_logs(
+    history: Iterable[Dict[str, Any]], per_txn: int, tokens: int = 20, seed: int = 0
+) -> Iterator[Dict[str, Any]]:
+    """
+    Adds logs of other contracts to every transaction, e.g. the ERC20 transfers
+    of a payment. They follow the logs of the transaction, and are decoded by
+    covalent.
+
+    Args:
+        history (Iterable[Dict[str, Any]]): raw covalent transactions
+        per_txn (int): number of logs added to every transaction
+        tokens (int, optional): number of distinct ERC20 contracts that emit
+        them. Defaults to 20.
+        seed (int, optional): seed of the logs. Defaults to 0.
+
+    Yields:
+        Iterator[Dict[str, Any]]: the raw transactions, in place
+    """
+
+    rng = random.Random(seed)
+    token_addresses = [_address(rng) for _ in range(tokens)]
+    wallets = [_address(rng) for _ in range(tokens * 10)]
+
+    for txn in history:
+        log_offset = 1 + max(
+            (log_event["log_offset"] for log_event in txn["log_events"]), default=-1
+        )
+
+        for ix in range(per_txn):
+            from_, to_ = rng.choice(wallets), rng.choice(wallets)
+            amount = rng.randrange(1, 1000) * 10**18
+
+            log_event = _raw_log(
+                rng.choice(token_addresses),
+                [TRANSFER_TOPIC, _address_topic(from_), _address_topic(to_)],
+                [_word(amount)],
+            )
+            log_event.update(
+                tx_hash=txn["tx_hash"],
+                block_height=txn["block_height"],
+                tx_offset=txn["tx_offset"],
+                log_offset=log_offset + ix,
+                decoded={
+                    "name": "Transfer",
+                    "signature": "Transfer(indexed address from, indexed address to"
+                    ", uint256 value)",
+                    "params": [
+                        _param("from", "address", from_),
+                        _param("to", "address", to_),
+                        _param("value", "uint256", str(amount), False),
+                    ],
+                },
+            )
+            txn["log_events"].append(log_event)
+
+        yield txn
+
+
+FIXTURES = {
+    "azrael": azrael_lendings,
+    "example_rumble_kong_league": kong_transfers,
+    "rkl_club_auction": auction_bids,
+    "sylvester": sylvester_lendings,
+}
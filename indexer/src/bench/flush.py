@@ -0,0 +1,73 @@
+"""
+Measures how long a transformer takes to flush a burst of transactions,
+e.g. the bids of a live auction.
+
+`python -m bench.flush rkl_club_auction --transactions 10000`
+"""
+
+import argparse
+import importlib
+import time
+
+from config import Config
+
+from bench.fixtures import FIXTURES
+from bench.memory_db import MemoryDB
+
+
+def flush_latency(transformer_name: str, history: int, burst: int) -> float:
+    """
+    Replays and flushes `history` synthetic raw transactions, then replays
+    the next `burst` ones and times their flush.
+
+    Args:
+        transformer_name (str): name of the transformer and of its Config preset
+        history (int): transactions that are already flushed
+        burst (int): transactions in the measured flush
+
+    Returns:
+        float: flush latency in milliseconds
+    """
+
+    config = getattr(Config, transformer_name)()
+    transactions = list(
+        FIXTURES[transformer_name](history + burst, config.get_address())
+    )
+
+    transformer_module = importlib.import_module(
+        f"transformers.{transformer_name}.main"
+    )
+    transformer = transformer_module.Transformer(config.get_address(), MemoryDB())
+    transformer.load_state()
+
+    for txn in transactions[:history]:
+        transformer.entrypoint(txn)
+    transformer.flush()
+
+    for txn in transactions[history:]:
+        transformer.entrypoint(txn)
+
+    start = time.perf_counter()
+    transformer.flush()
+
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    """Benchmark entrypoint"""
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("transformer", choices=sorted(FIXTURES))
+    parser.add_argument("--history", type=int, default=0)
+    parser.add_argument("--transactions", type=int, default=10_000)
+    args = parser.parse_args()
+
+    latency = flush_latency(args.transformer, args.history, args.transactions)
+    print(
+        f"{args.transformer}: flushed {args.transactions} txns"
+        f" on top of {args.history} in {latency:,.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
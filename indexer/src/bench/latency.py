@@ -0,0 +1,109 @@
+"""
+Extract to state latency: the time it takes a block of raw transactions,
+inserted into the raw collection like the extractor does, to be committed
+into the state of the club auction transformer. Compares sleep polling
+against waking up on change stream notifications.
+
+Unlike the other benchmarks, this one needs MongoDB (the MONGO_* variables in
+.env), and a replica set for change streams, e.g. a local single node one:
+`mongod --replSet rs0` followed by `rs.initiate()` in mongosh. On a standalone
+mongod, watching falls back to polling.
+
+`python -m bench.latency --blocks 20 --interval 1.5`
+"""
+
+import argparse
+import statistics
+import threading
+import time
+from itertools import groupby
+from typing import List
+
+from config import Config
+from db import DB
+from interfaces.idb import IDB
+from transform.main import SLEEP_TIMER, Transform
+
+from bench.fixtures import auction_bids
+
+DATABASE_NAME = "ethereum-indexer"
+# address of the throwaway collections that the benchmark writes to
+ADDRESS = "0x00000000000000000000000000000000000be9c4"
+
+
+def _run(transform: Transform, stop: threading.Event) -> None:
+    while not stop.is_set():
+        transform.transform()
+        transform.flush()
+
+
+def measure(db: IDB, watch: bool, blocks: int, interval: float) -> List[float]:
+    """
+    Args:
+        db (IDB): db to transform in
+        watch (bool): whether to wake up on change streams, or to poll
+        blocks (int): number of blocks to insert
+        interval (float): seconds in between two blocks
+
+    Returns:
+        List[float]: seconds from inserting a block to its commit, per block
+    """
+
+    config = Config(ADDRESS, "latency.log", "rkl_club_auction", 1)
+    collections = ["", "-state", "-block-height-state", "-snapshots"]
+    for suffix in collections:
+        db.drop_collection(DATABASE_NAME, f"{ADDRESS}{suffix}")
+
+    transform = Transform(config, db=db, snapshot_every=0, watch=watch)
+
+    stop = threading.Event()
+    runner = threading.Thread(target=_run, args=(transform, stop), daemon=True)
+    runner.start()
+
+    latencies = []
+    history = auction_bids(blocks * 4, ADDRESS)
+
+    for block_height, txns in groupby(history, key=lambda txn: txn["block_height"]):
+        time.sleep(interval)
+
+        start = time.perf_counter()
+        db.put_items(list(txns), DATABASE_NAME, ADDRESS)
+
+        while True:
+            checkpoint = db.get_any_item(DATABASE_NAME, f"{ADDRESS}-block-height-state")
+            if checkpoint is not None and checkpoint["block_height"] >= block_height:
+                break
+            time.sleep(0.005)
+
+        latencies.append(time.perf_counter() - start)
+
+    stop.set()
+    runner.join(SLEEP_TIMER * 2)
+
+    for suffix in collections:
+        db.drop_collection(DATABASE_NAME, f"{ADDRESS}{suffix}")
+
+    return latencies
+
+
+def main():
+    """Benchmark entrypoint"""
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--blocks", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=1.5)
+    args = parser.parse_args()
+
+    db = DB()
+
+    for name, watch in (("polling", False), ("change streams", True)):
+        latencies = sorted(measure(db, watch, args.blocks, args.interval))
+        p95 = latencies[int(0.95 * (len(latencies) - 1))]
+        print(
+            f"{name}: median {statistics.median(latencies):.3f}s, "
+            f"p95 {p95:.3f}s, max {latencies[-1]:.3f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+"""In-memory IDB implementation for the benchmarks."""
+
+import copy
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from pymongo import DeleteOne, InsertOne, ReplaceOne, UpdateOne
+
+from interfaces.idb import IDB
+
+QUERY_OPERATORS = {
+    "$eq": lambda value, operand: value == operand,
+    "$gt": lambda value, operand: value is not None and value > operand,
+    "$gte": lambda value, operand: value is not None and value >= operand,
+    "$lt": lambda value, operand: value is not None and value < operand,
+    "$lte": lambda value, operand: value is not None and value <= operand,
+    "$in": lambda value, operand: value in operand,
+    # * missing fields read as None
+    "$exists": lambda value, operand: (value is not None) == operand,
+}
+
+
+class MemoryDB(IDB):
+    """
+    Keeps every collection in a dict keyed by '_id', so that a write by '_id'
+    costs O(1), as an indexed write does on a real deployment. Understands the
+    subset of queries, update operators and bulk operations that the indexer
+    issues. Documents are copied on the way in and out, like they would be
+    when (de)serialized.
+    """
+
+    def __init__(self):
+        self._collections: Dict[Tuple[str, str], Dict[Any, Dict]] = defaultdict(dict)
+        # (database name, collection name) -> number of put_items calls on it,
+        # which wait_for_inserts is notified of, like of a change stream
+        self._inserts: Dict[Tuple[str, str], int] = defaultdict(int)
+        # (database name, collection name) -> inserts that were waited out
+        self._watched: Dict[Tuple[str, str], int] = {}
+        self._inserted = threading.Condition()
+
+    def _collection(self, database_name: str, collection_name: str) -> Dict[Any, Dict]:
+        return self._collections[(database_name, collection_name)]
+
+    @staticmethod
+    def _values(value: Any, path: List[str]) -> List[Any]:
+        """
+        Returns:
+            List[Any]: values at the dotted path. A path through an array
+            reaches into every element of it, or into the one at a numeric part
+        """
+
+        if not path:
+            return [value]
+
+        part, rest = path[0], path[1:]
+
+        if isinstance(value, list):
+            if part.isdigit():
+                ix = int(part)
+                return MemoryDB._values(value[ix] if ix < len(value) else None, rest)
+            return [
+                nested
+                for element in value
+                if isinstance(element, dict)
+                for nested in MemoryDB._values(element, path)
+            ]
+
+        if isinstance(value, dict):
+            return MemoryDB._values(value.get(part), rest)
+
+        # * missing fields read as None
+        return [None]
+
+    @staticmethod
+    def _matches(document: Dict, query: Dict) -> bool:
+        for field, condition in query.items():
+            values = MemoryDB._values(document, field.split("."))
+
+            if isinstance(condition, dict):
+                if not any(
+                    all(
+                        QUERY_OPERATORS[operator](value, operand)
+                        for operator, operand in condition.items()
+                    )
+                    for value in values
+                ):
+                    return False
+            elif condition not in values:
+                return False
+
+        return True
+
+    @staticmethod
+    def _project(value: Any, fields: Dict[str, Any]) -> Any:
+        """Keeps the fields of the nested inclusion projection, in place of value."""
+
+        if isinstance(value, list):
+            return [
+                MemoryDB._project(element, fields)
+                for element in value
+                if isinstance(element, dict)
+            ]
+
+        return {
+            field: value[field]
+            if nested is True
+            else MemoryDB._project(value[field], nested)
+            for field, nested in fields.items()
+            if field in value
+        }
+
+    @staticmethod
+    def _update(document: Dict, update: Dict) -> None:
+        for operator, fields in update.items():
+            for field, operand in fields.items():
+                if operator == "$set":
+                    document[field] = copy.deepcopy(operand)
+                elif operator == "$unset":
+                    document.pop(field, None)
+                elif operator == "$inc":
+                    document[field] = document.get(field, 0) + operand
+                else:
+                    raise NotImplementedError(
+                        f"Unsupported update operator: {operator}"
+                    )
+
+    @staticmethod
+    def _operation_id(operation: Any) -> Any:
+        # pylint: disable=protected-access
+        if isinstance(operation, InsertOne):
+            return operation._doc["_id"]
+
+        return operation._filter["_id"]
+
+    def put_item(self, item: Dict, database_name: str, collection_name: str) -> None:
+        self._collection(database_name, collection_name)[item["_id"]] = copy.deepcopy(
+            item
+        )
+
+    def put_items(
+        self, items: List[Any], database_name: str, collection_name: str
+    ) -> None:
+        for item in items:
+            self.put_item(item, database_name, collection_name)
+
+        with self._inserted:
+            self._inserts[(database_name, collection_name)] += 1
+            self._inserted.notify_all()
+
+    def bulk_write(
+        self, operations: List[Any], database_name: str, collection_name: str
+    ) -> None:
+        collection = self._collection(database_name, collection_name)
+
+        # pylint: disable=protected-access
+        for operation in operations:
+            if isinstance(operation, InsertOne):
+                document = operation._doc
+                # * like the db, re-inserting a persisted document is a no-op
+                collection.setdefault(document["_id"], copy.deepcopy(document))
+                continue
+
+            _id = self._operation_id(operation)
+
+            if isinstance(operation, DeleteOne):
+                collection.pop(_id, None)
+            elif isinstance(operation, ReplaceOne):
+                collection[_id] = copy.deepcopy(operation._doc)
+            elif isinstance(operation, UpdateOne):
+                if _id not in collection and operation._upsert:
+                    collection[_id] = {"_id": _id}
+                if _id in collection:
+                    self._update(collection[_id], operation._doc)
+            else:
+                raise NotImplementedError(f"Unsupported operation: {operation}")
+
+    def atomic_bulk_write(
+        self, writes: List[Tuple[str, List[Any]]], database_name: str
+    ) -> None:
+        # collection name -> '_id' -> document before the writes, None if none
+        originals: Dict[str, Dict[Any, Optional[Dict]]] = {}
+
+        for collection_name, operations in writes:
+            collection = self._collection(database_name, collection_name)
+            touched = originals.setdefault(collection_name, {})
+
+            for operation in operations:
+                _id = self._operation_id(operation)
+                if _id not in touched:
+                    touched[_id] = copy.deepcopy(collection.get(_id))
+
+        try:
+            for collection_name, operations in writes:
+                self.bulk_write(operations, database_name, collection_name)
+        except BaseException:
+            # * like an aborted transaction, none of the writes are applied
+            for collection_name, touched in originals.items():
+                collection = self._collection(database_name, collection_name)
+
+                for _id, document in touched.items():
+                    if document is None:
+                        collection.pop(_id, None)
+                    else:
+                        collection[_id] = document
+
+            raise
+
+    def _inserted_since(self, key: Tuple[str, str], seen: int, timeout: float) -> bool:
+        return self._inserted.wait_for(lambda: self._inserts[key] > seen, timeout)
+
+    def wait_for_inserts(
+        self, database_name: str, collection_name: str, timeout: float, debounce: float
+    ) -> None:
+        key = (database_name, collection_name)
+
+        with self._inserted:
+            # * like a change stream, counts the inserts from the first wait on
+            seen = self._watched.setdefault(key, self._inserts[key])
+
+            wait = timeout
+            while self._inserted_since(key, seen, wait):
+                seen = self._inserts[key]
+                wait = debounce
+
+            self._watched[key] = seen
+
+    def create_index(
+        self, field: str, database_name: str, collection_name: str
+    ) -> None:
+        # * every lookup is a scan, except for the ones by '_id'
+        return
+
+    def drop_collection(self, database_name: str, collection_name: str) -> None:
+        self._collections.pop((database_name, collection_name), None)
+
+    def rename_collection(
+        self, database_name: str, collection_name: str, new_name: str
+    ) -> None:
+        collection = self._collections.pop((database_name, collection_name), {})
+        self._collections[(database_name, new_name)] = collection
+
+    def get_item(
+        self, identifier: str, database_name: str, collection_name: str
+    ) -> Any:
+        item = self._collection(database_name, collection_name).get(identifier)
+        return copy.deepcopy(item)
+
+    def get_all_items(
+        self, database_name: str, collection_name: str, options: Optional[Dict] = None
+    ) -> List[Any]:
+        return list(self.iter_items(database_name, collection_name, options))
+
+    def iter_items(
+        self, database_name: str, collection_name: str, options: Optional[Dict] = None
+    ) -> Iterator[Any]:
+        if options is None:
+            options = {}
+
+        query = options.get("query_clause", {})
+        items = [
+            item
+            for item in self._collection(database_name, collection_name).values()
+            if self._matches(item, query)
+        ]
+
+        if "sort" in options:
+            sort_by = options["sort"]["sort_by"]
+            items.sort(
+                key=lambda item: item[sort_by],
+                reverse=options["sort"]["direction"] == -1,
+            )
+
+        projection = options.get("projection")
+
+        for item in items:
+            if projection is not None:
+                item = {
+                    field: value
+                    for field, value in item.items()
+                    if field == "_id" or projection.get(field)
+                }
+            yield copy.deepcopy(item)
+
+    def aggregate(
+        self,
+        database_name: str,
+        collection_name: str,
+        pipeline: List[Dict],
+        options: Optional[Dict] = None,
+    ) -> Iterator[Any]:
+        documents = copy.deepcopy(
+            list(self._collection(database_name, collection_name).values())
+        )
+
+        for stage in pipeline:
+            ((operator, operand),) = stage.items()
+
+            if operator == "$match":
+                documents = [
+                    document
+                    for document in documents
+                    if self._matches(document, operand)
+                ]
+            elif operator == "$unwind":
+                # * only top level arrays, by their "$field" path
+                field = operand[1:]
+                documents = [
+                    {**document, field: element}
+                    for document in documents
+                    for element in document.get(field) or []
+                ]
+            elif operator == "$sort":
+                # * stable, so sorting by the last key first sorts by all of them
+                for field, direction in reversed(list(operand.items())):
+                    documents.sort(
+                        key=lambda document, path=field.split("."): self._values(
+                            document, path
+                        )[0],
+                        reverse=direction == -1,
+                    )
+            elif operator == "$project":
+                # nested inclusion projection, e.g. {"a": {"b": True}} of "a.b"
+                fields: Dict[str, Any] = (
+                    {} if operand.get("_id") == 0 else {"_id": True}
+                )
+                for path, include in operand.items():
+                    if path == "_id" or not include:
+                        continue
+                    *parents, leaf = path.split(".")
+                    nested = fields
+                    for parent in parents:
+                        nested = nested.setdefault(parent, {})
+                    nested[leaf] = True
+                documents = [self._project(document, fields) for document in documents]
+            elif operator == "$count":
+                # * like the db, nothing to count yields no document at all
+                documents = [{operand: len(documents)}] if documents else []
+            else:
+                raise NotImplementedError(f"Unsupported pipeline stage: {operator}")
+
+        return iter(documents)
+
+    def get_any_item(
+        self, database_name: str, collection_name: str, options: Optional[Dict] = None
+    ) -> Any:
+        return next(self.iter_items(database_name, collection_name, options), None)
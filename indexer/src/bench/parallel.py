@@ -0,0 +1,76 @@
+"""
+Scaling of the parallel transform over the number of workers, against the
+serial transform. Every run re-indexes the same synthetic azrael history from
+an in-memory db, and checks that it ends up with the serial state.
+
+`python -m bench.parallel --transactions 100000 --workers 1 2 4 8`
+"""
+
+import argparse
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import Config
+from transform.main import Transform
+from transform.parallel import ParallelTransform
+
+from bench.fixtures import azrael_lendings
+from bench.memory_db import MemoryDB
+
+DATABASE_NAME = "ethereum-indexer"
+
+
+def run(history: List[Dict], workers: Optional[int]) -> Tuple[float, List[Any]]:
+    """
+    Args:
+        history (List[Dict]): raw transactions
+        workers (Optional[int]): number of workers, None for the serial transform
+
+    Returns:
+        Tuple[float, List[Any]]: transformed transactions per second, and the
+        resulting state
+    """
+
+    config = Config.azrael()
+    address = config.get_address()
+
+    db = MemoryDB()
+    db.put_items(history, DATABASE_NAME, address)
+
+    if workers is None:
+        transform = Transform(config, db=db)
+    else:
+        transform = ParallelTransform(config, workers, db=db)
+
+    start = time.perf_counter()
+    transform.transform()
+    # pylint: disable=protected-access
+    transform._transformer.flush()
+    elapsed = time.perf_counter() - start
+
+    return len(history) / elapsed, db.get_all_items(DATABASE_NAME, f"{address}-state")
+
+
+def main():
+    """Benchmark entrypoint"""
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--transactions", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    history = list(azrael_lendings(args.transactions, Config.azrael().get_address()))
+    print(f"{os.cpu_count()} cpus")
+
+    serial, state = run(history, None)
+    print(f"serial: {serial:,.0f} txns/sec")
+
+    for workers in args.workers:
+        throughput, parallel_state = run(history, workers)
+        assert parallel_state == state
+        print(f"{workers} workers: {throughput:,.0f} txns/sec")
+
+
+if __name__ == "__main__":
+    main()
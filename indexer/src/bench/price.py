@@ -0,0 +1,69 @@
+"""
+Unpacking of ReNFT prices (transform/price.py): the codec that the azrael and
+sylvester transformers used to run on every Lent/Lend event, against the
+shared one uncached, memoized, and over a whole batch at once. The prices are
+drawn out of a few hundred distinct ones, like the prices of real lendings.
+
+`python -m bench.price --prices 100000 --distinct 300`
+"""
+
+import argparse
+import base64
+import random
+import time
+from typing import Callable, List, Union
+
+from transform.price import unpack_price, unpack_price_bytes, unpack_prices
+
+
+def reference_unpack_price(price: Union[str, bytes]) -> float:
+    """unpack_price as the ReNFT transformers implemented it, before the codec"""
+
+    # Covalent returns bytes4 types encoded in base64
+    if isinstance(price, str):
+        price = base64.b64decode(price)
+    price = price.hex().upper()  # decode into hex
+
+    whole = min(int(price[:4], 16), 9999)
+    decimal = min(int(price[4:], 16), 9999)
+
+    # shift right 4 decimal places
+    return whole + decimal * 10**-4
+
+
+def _time(unpack: Callable[[List[bytes]], List[float]], prices: List[bytes]) -> float:
+    start = time.perf_counter()
+    unpack(prices)
+    return time.perf_counter() - start
+
+
+def main():
+    """Benchmark entrypoint"""
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--prices", type=int, default=100_000)
+    parser.add_argument("--distinct", type=int, default=300)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    distinct = [rng.getrandbits(32).to_bytes(4, "big") for _ in range(args.distinct)]
+    prices = [rng.choice(distinct) for _ in range(args.prices)]
+
+    unpack_price.cache_clear()
+
+    codecs = {
+        "reference": lambda prices: list(map(reference_unpack_price, prices)),
+        "from_bytes": lambda prices: list(map(unpack_price_bytes, prices)),
+        "memoized": lambda prices: list(map(unpack_price, prices)),
+        "batch": unpack_prices,
+    }
+
+    for name, unpack in codecs.items():
+        elapsed = _time(unpack, prices)
+        print(f"{name:>10}: {args.prices / elapsed:,.0f} prices/sec")
+
+    print(f"cache: {unpack_price.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Reads the raw transactions of the auction the way Transform does: whole
+documents, against the logs that the auction handles, unwound, filtered,
+sorted and projected inside the db (aggregate mode). Reports the bytes that
+cross the wire, i.e. the bson size of what is read, and the wall time of both.
+
+Every transaction transfers a kong and places a bid, and only the bids are
+handled, so aggregate mode reads about half of the logs, and none of the
+fields that the handlers have no use for.
+
+With --mongo, the history is written to a scratch collection of the local
+mongo, which is dropped afterwards. The in-memory db is used otherwise, and
+only the bytes are representative.
+
+`python -m bench.pushdown --transactions 10000 50000 --mongo`
+"""
+
+import argparse
+import time
+from typing import Tuple
+
+import bson
+
+from config import Config
+from db import DB
+from interfaces.idb import IDB
+from transform.main import Transform
+
+from bench.fixtures import transfers_and_bids
+from bench.memory_db import MemoryDB
+
+DATABASE_NAME = "ethereum-indexer"
+# address of the scratch collections
+BENCH_ADDRESS = "0x00000000000000000000000000000000000BE7C4"
+
+
+def _read(config: Config, db: IDB, aggregate: bool) -> Tuple[float, int, int]:
+    """
+    Returns:
+        Tuple[float, int, int]: seconds taken, bytes and logs read
+    """
+
+    transform = Transform(config, db=db, snapshot_every=0, aggregate=aggregate)
+
+    start = time.perf_counter()
+    # pylint: disable=protected-access
+    raw_transactions = list(transform._read_raw_transactions(0))
+    elapsed = time.perf_counter() - start
+
+    size = sum(len(bson.encode(txn)) for txn in raw_transactions)
+    logs = sum(len(txn["log_events"]) for txn in raw_transactions)
+
+    return elapsed, size, logs
+
+
+def main():
+    """Benchmark entrypoint"""
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--transactions", type=int, nargs="+", default=[10_000, 50_000])
+    parser.add_argument("--mongo", action="store_true")
+    args = parser.parse_args()
+
+    config = Config(BENCH_ADDRESS, "pushdown.log", "rkl_club_auction", 42)
+    db: IDB = DB() if args.mongo else MemoryDB()
+
+    for transactions in args.transactions:
+        db.drop_collection(DATABASE_NAME, BENCH_ADDRESS)
+        db.put_items(
+            list(transfers_and_bids(transactions, BENCH_ADDRESS)),
+            DATABASE_NAME,
+            BENCH_ADDRESS,
+        )
+
+        for aggregate in (False, True):
+            elapsed, size, logs = _read(config, db, aggregate)
+            mode = "aggregate" if aggregate else "find     "
+            print(
+                f"{transactions} txns, {mode}: {size / 1e6:.1f}MB, {logs} logs"
+                f" in {elapsed * 1000:.0f}ms"
+            )
+
+    for collection_name in (BENCH_ADDRESS, f"{BENCH_ADDRESS}-state"):
+        db.drop_collection(DATABASE_NAME, collection_name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Replays a synthetic transaction history through a transformer and reports the
+replay throughput. The history is generated up front, so only the transformer
+(handlers, state reads and state writes) is measured.
+
+With --normalized, the history is normalized up front as the extractor stores
+it, with the logs sorted and indexed by sender (see extract/normalize.py).
+
+`python -m bench.replay example_rumble_kong_league --transactions 100000 --batch 500`
+"""
+
+import argparse
+import importlib
+import time
+
+from config import Config
+from extract.normalize import normalize_transaction
+
+from bench.fixtures import FIXTURES
+from bench.memory_db import MemoryDB
+
+
+def replay(
+    transformer_name: str, transactions: int, batch: int = 1, normalized: bool = False
+) -> float:
+    """
+    Transforms `transactions` synthetic raw transactions, keeping the state in
+    an in-memory db.
+
+    Args:
+        transformer_name (str): name of the transformer and of its Config preset
+        transactions (int): length of the history
+        batch (int, optional): number of transactions passed to the transformer
+        at once. Defaults to 1.
+        normalized (bool, optional): whether the raw transactions are normalized.
+        Defaults to False.
+
+    Returns:
+        float: transformed transactions per second
+    """
+
+    config = getattr(Config, transformer_name)()
+    history = list(FIXTURES[transformer_name](transactions, config.get_address()))
+    if normalized:
+        history = [normalize_transaction(txn) for txn in history]
+
+    transformer_module = importlib.import_module(
+        f"transformers.{transformer_name}.main"
+    )
+    transformer = transformer_module.Transformer(config.get_address(), MemoryDB())
+    transformer.load_state()
+
+    start = time.perf_counter()
+    if batch == 1:
+        for txn in history:
+            transformer.entrypoint(txn)
+    else:
+        for ix in range(0, transactions, batch):
+            transformer.entrypoint_batch(history[ix : ix + batch])
+    transformer.flush()
+    elapsed = time.perf_counter() - start
+
+    return transactions / elapsed
+
+
+def main():
+    """Benchmark entrypoint"""
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("transformer", choices=sorted(FIXTURES))
+    parser.add_argument("--transactions", type=int, default=100_000)
+    parser.add_argument("--batch", type=int, default=1)
+    parser.add_argument("--normalized", action="store_true")
+    args = parser.parse_args()
+
+    throughput = replay(
+        args.transformer, args.transactions, args.batch, args.normalized
+    )
+    print(f"{args.transformer}: {args.transactions} txns, {throughput:,.0f} txns/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Restart time of a transformer over the length of its history: re-reading the
+whole state collection, against restoring the latest snapshot and replaying
+the transactions after it. Re-transforming the history from the very first
+transaction, which is what a rebuild without snapshots amounts to, is shown
+for reference, and so is the pause of a hot reload, which carries the state
+over in memory.
+
+`python -m bench.restart example_rumble_kong_league --transactions 10000 50000 200000`
+"""
+
+import argparse
+import time
+
+from config import Config
+from transform.main import Transform
+
+from bench.fixtures import FIXTURES
+from bench.memory_db import MemoryDB
+
+DATABASE_NAME = "ethereum-indexer"
+
+
+def _restart(config: Config, db: MemoryDB, snapshot_every: int) -> float:
+    start = time.perf_counter()
+    # * the state is loaded by the constructor
+    Transform(config, db=db, snapshot_every=snapshot_every)
+    return time.perf_counter() - start
+
+
+def main():
+    """Benchmark entrypoint"""
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("transformer", choices=sorted(FIXTURES))
+    parser.add_argument(
+        "--transactions", type=int, nargs="+", default=[10_000, 50_000, 200_000]
+    )
+    args = parser.parse_args()
+
+    config = getattr(Config, args.transformer)()
+    address = config.get_address()
+
+    for transactions in args.transactions:
+        db = MemoryDB()
+        db.put_items(
+            list(FIXTURES[args.transformer](transactions, address)),
+            DATABASE_NAME,
+            address,
+        )
+
+        start = time.perf_counter()
+        transform = Transform(config, db=db)
+        transform.transform()
+        # pylint: disable=protected-access
+        transform._transformer.flush()
+        from_scratch = time.perf_counter() - start
+
+        state = len(db.get_all_items(DATABASE_NAME, f"{address}-state"))
+        from_state = _restart(config, db, snapshot_every=0)
+        hot_reload = Transform(config, db=db, snapshot_every=0, reload=True)._reload()
+
+        snapshots = transform._snapshots.block_heights()
+        if not snapshots:
+            print(
+                f"{args.transformer}: {transactions} txns, {state} state documents, "
+                f"not snapshotted: state collection {from_state:.3f}s, "
+                f"from scratch {from_scratch:.3f}s, hot reload {hot_reload * 1000:.1f}ms"
+            )
+            continue
+
+        tail = transform._block_height - snapshots[-1]
+        from_snapshot = _restart(config, db, snapshot_every=1)
+
+        start = time.perf_counter()
+        transform._snapshots.latest()
+        restore = time.perf_counter() - start
+
+        print(
+            f"{args.transformer}: {transactions} txns, {state} state documents, "
+            f"snapshot {tail} blocks behind: state collection {from_state:.3f}s, "
+            f"snapshot {from_snapshot:.3f}s ({restore:.3f}s restore), "
+            f"from scratch {from_scratch:.3f}s, hot reload {hot_reload * 1000:.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Compares the replay throughput of the azrael transformer compiled out of
+transformers/azrael/spec.json against the hand-written one, on the same
+synthetic history: the whole replay, and the time spent in the handlers
+alone, which is what the spec compiles. The rest is shared by both.
+
+`python -m bench.spec --transactions 100000 --batch 500`
+"""
+
+import argparse
+import os
+import time
+from typing import Any, Dict, List, Tuple
+
+from config import Config
+from transform.spec import SPEC_FILE, compile_spec
+from transformers.azrael import main as azrael
+
+from bench.fixtures import azrael_lendings
+from bench.memory_db import MemoryDB
+
+
+def replay(
+    transformer_cls: type, history: List[Dict[str, Any]], batch: int
+) -> Tuple[float, float]:
+    """
+    Returns:
+        Tuple[float, float]: transformed transactions per second, and handled
+        logs per second of handler time
+    """
+
+    transformer = transformer_cls(Config.azrael().get_address(), MemoryDB())
+    transformer.load_state()
+
+    start = time.perf_counter()
+    for ix in range(0, len(history), batch):
+        transformer.entrypoint_batch(history[ix : ix + batch])
+    transformer.flush()
+
+    elapsed = time.perf_counter() - start
+
+    profile = transformer.get_profile().values()
+    calls = sum(calls for calls, _ in profile)
+    seconds = sum(seconds for _, seconds in profile)
+
+    return len(history) / elapsed, calls / seconds
+
+
+def main():
+    """Benchmark entrypoint"""
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--transactions", type=int, default=100_000)
+    parser.add_argument("--batch", type=int, default=500)
+    args = parser.parse_args()
+
+    history = list(azrael_lendings(args.transactions, Config.azrael().get_address()))
+    compiled = compile_spec(os.path.join(os.path.dirname(azrael.__file__), SPEC_FILE))
+
+    for name, transformer_cls in (
+        ("hand-written", azrael.Transformer),
+        ("spec", compiled),
+    ):
+        throughput, handled = replay(transformer_cls, history, args.batch)
+        print(
+            f"{name}: {args.transactions} txns, {throughput:,.0f} txns/sec, "
+            f"handlers {handled:,.0f} logs/sec"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""
+Replays synthetic histories of the azrael, sylvester, kong and auction
+transformers through Transform, from the raw transactions in the db up to the
+last checkpoint, and reports for each of them:
+
+- transactions and handled events per second
+- peak RSS of the process, every transformer runs in a fresh one. With the
+  in-memory db, the raw transactions are part of it
+- checkpoint latency, i.e. how long committing the pending writes takes
+
+The results are appended to bench/results.jsonl, next to the commit that they
+were measured on, and compared against the latest ones of the same options that
+were measured on another commit, or on the commit given with --baseline.
+
+With --mongo, the histories are written to scratch collections of the MongoDB
+in `.env`, which are dropped afterwards. The in-memory db is used otherwise.
+
+`python -m bench.suite --transactions 50000 --decoded 0.5 --foreign 2`
+"""
+
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from config import Config
+from db import DB
+from interfaces.idb import IDB
+from transform.main import Transform
+
+from bench.fixtures import (
+    AZRAEL_MIX,
+    FIXTURES,
+    SYLVESTER_MIX,
+    covalent_decoded,
+    with_foreign_logs,
+)
+from bench.memory_db import MemoryDB
+
+DATABASE_NAME = "ethereum-indexer"
+# address of the scratch collections, that every history is emitted by
+SUITE_ADDRESS = "0x00000000000000000000000000000000005017E5"
+RESULTS_PATH = os.path.join(os.path.dirname(__file__), "results.jsonl")
+# lifecycle events of the transformers that transform more than one event
+MIXES = {"azrael": AZRAEL_MIX, "sylvester": SYLVESTER_MIX}
+# options of a run that its results are only comparable under
+COMPARED_OPTIONS = ("transactions", "decoded", "foreign", "batch", "mongo")
+
+
+class _TimedTransform(Transform):
+    """@inheritdoc Transform, timing every checkpoint"""
+
+    def __init__(self, *args, **kwargs):
+        self.checkpoint_seconds: List[float] = []
+        super().__init__(*args, **kwargs)
+
+    def _checkpoint(self, block_height: int) -> None:
+        start = time.perf_counter()
+        super()._checkpoint(block_height)
+        self.checkpoint_seconds.append(time.perf_counter() - start)
+
+
+def replay_transform(transformer_name: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Transforms a synthetic history of the transformer with Transform, from an
+    empty state.
+
+    Args:
+        transformer_name (str): name of the transformer and of its fixture
+        options (Dict[str, Any]): "transactions", "decoded" (share of the logs
+        that covalent decodes, None to leave the fixture as is), "foreign" (logs
+        of other contracts per transaction), "batch" and "mongo"
+
+    Returns:
+        Dict[str, Any]: measurements of the replay
+    """
+
+    fixture = FIXTURES[transformer_name]
+    if transformer_name in MIXES:
+        history = fixture(
+            options["transactions"], SUITE_ADDRESS, mix=MIXES[transformer_name]
+        )
+    else:
+        history = fixture(options["transactions"], SUITE_ADDRESS)
+
+    if options["decoded"] is not None:
+        history = covalent_decoded(history, transformer_name, options["decoded"])
+    if options["foreign"]:
+        history = with_foreign_logs(history, options["foreign"])
+
+    config = Config(SUITE_ADDRESS, "suite.log", transformer_name, 1)
+    db: IDB = DB() if options["mongo"] else MemoryDB()
+    db.drop_collection(DATABASE_NAME, SUITE_ADDRESS)
+    db.put_items(list(history), DATABASE_NAME, SUITE_ADDRESS)
+
+    transform = _TimedTransform(
+        config, batch_size=options["batch"], db=db, snapshot_every=0
+    )
+    # pylint: disable=protected-access
+    collection_names = [
+        SUITE_ADDRESS,
+        *transform._get_collection_names(),
+        transform._get_block_height_collection_name(),
+    ]
+    for collection_name in collection_names[1:]:
+        db.drop_collection(DATABASE_NAME, collection_name)
+
+    start = time.perf_counter()
+    transform.transform()
+    elapsed = time.perf_counter() - start
+
+    events = sum(calls for calls, _ in transform._transformer.get_profile().values())
+    checkpoint_ms = [seconds * 1000 for seconds in transform.checkpoint_seconds]
+
+    if options["mongo"]:
+        for collection_name in collection_names:
+            db.drop_collection(DATABASE_NAME, collection_name)
+
+    return {
+        "txns_per_sec": options["transactions"] / elapsed,
+        "events_per_sec": events / elapsed,
+        # * kilobytes, on linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "checkpoint_ms_p50": statistics.median(checkpoint_ms),
+        "checkpoint_ms_max": max(checkpoint_ms),
+    }
+
+
+def _git(*args: str) -> str:
+    process = subprocess.run(
+        ["git", *args], capture_output=True, text=True, check=False
+    )
+    return process.stdout.strip()
+
+
+def load_results(path: str) -> List[Dict[str, Any]]:
+    """
+    Returns:
+        List[Dict[str, Any]]: every stored result, oldest first
+    """
+
+    if not os.path.exists(path):
+        return []
+
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def baseline(
+    results: List[Dict[str, Any]], result: Dict[str, Any], commit: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Args:
+        results (List[Dict[str, Any]]): stored results, oldest first
+        result (Dict[str, Any]): result to compare
+        commit (Optional[str], optional): commit to compare against. Defaults to
+        None, the latest other commit.
+
+    Returns:
+        Optional[Dict[str, Any]]: latest result of the same transformer and
+        options that was measured on the commit, None if there is none
+    """
+
+    for stored in reversed(results):
+        if (
+            stored["transformer"] == result["transformer"]
+            and stored["options"] == result["options"]
+            and (
+                stored["commit"] != result["commit"]
+                if commit is None
+                else stored["commit"].startswith(commit)
+            )
+        ):
+            return stored
+
+    return None
+
+
+def _change(value: float, baseline_value: float) -> str:
+    return f"{(value - baseline_value) / baseline_value:+.1%}"
+
+
+def main():
+    """Benchmark entrypoint"""
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "transformers",
+        nargs="*",
+        help=f"any of {', '.join(sorted(FIXTURES))}, defaults to all of them",
+    )
+    parser.add_argument("--transactions", type=int, default=20_000)
+    parser.add_argument(
+        "--decoded",
+        type=float,
+        default=None,
+        help="share of the logs that covalent decodes, e.g. 0.5",
+    )
+    parser.add_argument(
+        "--foreign", type=int, default=0, help="logs of other contracts per txn"
+    )
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--mongo", action="store_true")
+    parser.add_argument("--baseline", help="commit to compare against")
+    parser.add_argument("--results", default=RESULTS_PATH)
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args()
+
+    # * argparse rejects an empty list against choices
+    unknown = set(args.transformers) - FIXTURES.keys()
+    if unknown:
+        parser.error(f"unknown transformers: {', '.join(sorted(unknown))}")
+
+    options = {option: getattr(args, option) for option in COMPARED_OPTIONS}
+    commit = _git("rev-parse", "--short", "HEAD") or "unknown"
+    dirty = bool(_git("status", "--porcelain", "--untracked-files=no"))
+    results = load_results(args.results)
+
+    for transformer_name in args.transformers or sorted(FIXTURES):
+        # * a fresh process per transformer, for its peak RSS
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            measured = executor.submit(
+                replay_transform, transformer_name, options
+            ).result()
+
+        result = {
+            "commit": commit,
+            "dirty": dirty,
+            "at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "transformer": transformer_name,
+            "options": options,
+            **measured,
+        }
+
+        print(
+            f"{transformer_name}: {result['txns_per_sec']:,.0f} txns/sec"
+            f", {result['events_per_sec']:,.0f} events/sec"
+            f", {result['peak_rss_mb']:.0f}MB peak RSS"
+            f", checkpoints {result['checkpoint_ms_p50']:.1f}ms p50"
+            f" / {result['checkpoint_ms_max']:.1f}ms max"
+        )
+
+        previous = baseline(results, result, args.baseline)
+        if previous is not None:
+            print(
+                f"  vs {previous['commit']}"
+                f": {_change(result['txns_per_sec'], previous['txns_per_sec'])}"
+                " txns/sec"
+                f", {_change(result['peak_rss_mb'], previous['peak_rss_mb'])} RSS"
+                f", {_change(result['checkpoint_ms_p50'], previous['checkpoint_ms_p50'])}"
+                " checkpoint p50"
+            )
+
+        if not args.no_save:
+            with open(args.results, "a", encoding="utf-8") as f:
+                f.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,59 @@
+import logging
 import os
-from typing import Any, Dict, List, Optional
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 from dotenv import load_dotenv
 from pymongo import MongoClient
+from pymongo.database import Database
+from pymongo.write_concern import WriteConcern
+from pymongo.change_stream import CollectionChangeStream
+from pymongo.client_session import ClientSession
+from pymongo.errors import BulkWriteError, OperationFailure
 
 from interfaces.idb import IDB
 
 load_dotenv()
 
-#pylint: disable=line-too-long
+# pylint: disable=line-too-long
 MONGO_URI = f"mongodb://{os.environ['MONGO_USER']}:{os.environ['MONGO_PASSWORD']}@{os.environ['MONGO_HOST']}:{os.environ['MONGO_PORT']}"
 
+DUPLICATE_KEY_ERROR = 11000
+# raised by standalone deployments, which do not support transactions
+ILLEGAL_OPERATION_ERROR = 20
+# raised by standalone deployments, which do not support change streams
+CHANGE_STREAM_NOT_SUPPORTED_ERROR = 40573
+# raised by a pipeline stage that outgrew its memory limit, e.g. a $sort
+EXCEEDED_MEMORY_LIMIT_ERROR = 292
+# opts in to writing the collections of a commit one by one on deployments
+# without transactions, i.e. standalone ones
+NON_ATOMIC_COMMITS = os.environ.get("MONGO_NON_ATOMIC_COMMITS", "") == "1"
+
+
 class DB(IDB):
-    def __init__(self):
-        self.client = MongoClient(MONGO_URI)
+    def __init__(
+        self,
+        client: Optional[MongoClient] = None,
+        write_concern: Optional[WriteConcern] = None,
+        non_atomic_commits: bool = NON_ATOMIC_COMMITS,
+    ):
+        # * a client can be supplied to run against a different deployment
+        self.client = MongoClient(MONGO_URI) if client is None else client
+        # * None is the deployment's default
+        self._write_concern = write_concern
+        # * whether atomic_bulk_write falls back to writing one by one
+        self._non_atomic_commits = non_atomic_commits
+        self._supports_change_streams = True
+        # (database name, collection name) -> change stream of its inserts
+        self._change_streams: Dict[Tuple[str, str], CollectionChangeStream] = {}
+
+    def _database(self, database_name: str) -> Database:
+        return self.client.get_database(
+            database_name, write_concern=self._write_concern
+        )
 
     def put_item(self, item: Dict, database_name: str, collection_name: str) -> None:
-        db = self.client[database_name]
+        db = self._database(database_name)
         db[collection_name].replace_one({"_id": item["_id"]}, item, upsert=True)
 
     def put_items(
@@ -25,20 +62,174 @@ class DB(IDB):
         if items is None or len(items) == 0:
             return
 
-        db = self.client[database_name]
+        db = self._database(database_name)
         db[collection_name].insert_many(items)
 
+    def bulk_write(
+        self, operations: List[Any], database_name: str, collection_name: str
+    ) -> None:
+        if len(operations) == 0:
+            return
+
+        db = self._database(database_name)
+
+        try:
+            db[collection_name].bulk_write(operations, ordered=False)
+        except BulkWriteError as err:
+            # * inserting an already persisted document is a no-op. This happens
+            # * when the transactions after the last checkpoint are replayed
+            details = err.details
+            if details["writeConcernErrors"] or any(
+                write_error["code"] != DUPLICATE_KEY_ERROR
+                for write_error in details["writeErrors"]
+            ):
+                raise
+
+            logging.warning(
+                f"Skipped {len(details['writeErrors'])} already persisted documents"
+                f" in {collection_name}"
+            )
+
+    def _bulk_write_in_session(
+        self,
+        writes: List[Tuple[str, List[Any]]],
+        database_name: str,
+        session: ClientSession,
+    ) -> None:
+        db = self._database(database_name)
+
+        for collection_name, operations in writes:
+            if len(operations) == 0:
+                continue
+
+            db[collection_name].bulk_write(operations, ordered=False, session=session)
+
+    def atomic_bulk_write(
+        self, writes: List[Tuple[str, List[Any]]], database_name: str
+    ) -> None:
+        # * a write error aborts the whole transaction and is raised as is.
+        # * Writing the collections one by one instead would let a crash in
+        # * between them apply the $inc-ed writes twice on the next restart
+        try:
+            with self.client.start_session() as session:
+                session.with_transaction(
+                    lambda session: self._bulk_write_in_session(
+                        writes, database_name, session
+                    )
+                )
+        except OperationFailure as err:
+            if err.code != ILLEGAL_OPERATION_ERROR:
+                raise
+
+            if not self._non_atomic_commits:
+                raise RuntimeError(
+                    "Transactions are not supported by the deployment, it must be"
+                    " a replica set. Set MONGO_NON_ATOMIC_COMMITS=1 to write the"
+                    " collections one by one instead"
+                ) from err
+
+            logging.warning(
+                "Transactions are not supported by the deployment, writing the"
+                " collections one by one"
+            )
+            # ! in order, the block height last. A crash in between can apply
+            # ! some of the writes twice on the next restart
+            for collection_name, operations in writes:
+                self.bulk_write(operations, database_name, collection_name)
+
+    def _watch_inserts(
+        self, database_name: str, collection_name: str, max_await: float
+    ) -> Optional[CollectionChangeStream]:
+        key = (database_name, collection_name)
+
+        if key in self._change_streams or not self._supports_change_streams:
+            return self._change_streams.get(key)
+
+        db = self._database(database_name)
+
+        try:
+            # * kept open from here on, so that no insert goes unnoticed
+            # * while the caller is busy in between two waits
+            stream = db[collection_name].watch(
+                [{"$match": {"operationType": "insert"}}],
+                max_await_time_ms=int(max_await * 1000),
+            )
+        except OperationFailure as err:
+            if err.code != CHANGE_STREAM_NOT_SUPPORTED_ERROR:
+                raise
+
+            logging.warning(
+                "Change streams are not supported by the deployment,"
+                " polling for inserts instead"
+            )
+            self._supports_change_streams = False
+            return None
+
+        self._change_streams[key] = stream
+        return stream
+
+    def wait_for_inserts(
+        self, database_name: str, collection_name: str, timeout: float, debounce: float
+    ) -> None:
+        stream = self._watch_inserts(database_name, collection_name, debounce)
+
+        if stream is None:
+            super().wait_for_inserts(database_name, collection_name, timeout, debounce)
+            return
+
+        deadline = time.monotonic() + timeout
+
+        # * try_next waits for at most max_await on the server
+        while stream.try_next() is None:
+            if time.monotonic() >= deadline:
+                return
+
+        # * a burst is over once it is quiet for debounce, or at the deadline
+        # * counted from its first insert, so that a steady stream of inserts
+        # * does not hold off the caller forever
+        quiet_since = time.monotonic()
+        deadline = quiet_since + timeout
+
+        while time.monotonic() - quiet_since < debounce and time.monotonic() < deadline:
+            if stream.try_next() is not None:
+                quiet_since = time.monotonic()
+
+    def create_index(
+        self, field: str, database_name: str, collection_name: str
+    ) -> None:
+        db = self._database(database_name)
+        db[collection_name].create_index(field)
+
+    def drop_collection(self, database_name: str, collection_name: str) -> None:
+        db = self._database(database_name)
+        db[collection_name].drop()
+
+    def rename_collection(
+        self, database_name: str, collection_name: str, new_name: str
+    ) -> None:
+        db = self._database(database_name)
+
+        if collection_name not in db.list_collection_names():
+            db[new_name].drop()
+            return
+
+        db[collection_name].rename(new_name, dropTarget=True)
+
+    def count_items(self, database_name: str, collection_name: str) -> int:
+        db = self._database(database_name)
+        return db[collection_name].count_documents({})
+
     def get_item(
         self, identifier: str, database_name: str, collection_name: str
     ) -> Any:
-        db = self.client[database_name]
-        return db[collection_name].find({"_id": identifier})
+        db = self._database(database_name)
+        return db[collection_name].find_one({"_id": identifier})
 
     # todo: concrete type for options
     def get_all_items(
         self, database_name: str, collection_name: str, options: Optional[Dict] = None
     ) -> List[Any]:
-        db = self.client[database_name]
+        db = self._database(database_name)
 
         if options is None:
             return list(db[collection_name].find())
@@ -63,13 +254,69 @@ class DB(IDB):
         # todo if removed
         return list(db[collection_name].find())
 
+    def iter_items(
+        self, database_name: str, collection_name: str, options: Optional[Dict] = None
+    ) -> Iterator[Any]:
+        db = self._database(database_name)
+
+        if options is None:
+            options = {}
+
+        # * the cursor fetches batch_size documents per round trip, so only
+        # * one batch is ever held in memory
+        cursor = db[collection_name].find(
+            options.get("query_clause", {}),
+            projection=options.get("projection"),
+            batch_size=options.get("batch_size", 0),
+            allow_disk_use=True,
+        )
+
+        if "sort" in options:
+            sort_by = options["sort"]["sort_by"]
+            direction = options["sort"]["direction"]
+            cursor = cursor.sort(sort_by, direction)
+
+        return cursor
+
+    def aggregate(
+        self,
+        database_name: str,
+        collection_name: str,
+        pipeline: List[Dict],
+        options: Optional[Dict] = None,
+    ) -> Iterator[Any]:
+        db = self._database(database_name)
+
+        if options is None:
+            options = {}
+
+        # * a batchSize of 0 would return an empty first batch
+        cursor_options = {}
+        if "batch_size" in options:
+            cursor_options["batchSize"] = options["batch_size"]
+
+        try:
+            return db[collection_name].aggregate(
+                pipeline, allowDiskUse=False, **cursor_options
+            )
+        except OperationFailure as err:
+            if err.code != EXCEEDED_MEMORY_LIMIT_ERROR:
+                raise
+
+            # * the blocking stages of large ranges spill to disk instead
+            logging.warning(
+                f"Aggregation over {collection_name} exceeded the memory limit"
+                ", retrying with disk use allowed"
+            )
+            return db[collection_name].aggregate(
+                pipeline, allowDiskUse=True, **cursor_options
+            )
+
     def get_any_item(
         self, database_name: str, collection_name: str, _: Optional[Dict] = None
     ) -> Any:
         """
-        MongoDB will return an empty list is collection does not exist
+        MongoDB will return None if collection does not exist
         """
-        all_items = self.get_all_items(database_name, collection_name)
-        if len(all_items) == 0:
-            return None
-        return all_items[0]
+        db = self._database(database_name)
+        return db[collection_name].find_one()
@@ -1,30 +1,38 @@
 import logging
+import queue
 import time
+from operator import itemgetter
+from typing import Optional
 
 from config import Config
 from db import DB
 from interfaces.iextract import IExtract
 
 from extract.covalent import Covalent
+from extract.normalize import normalize_transaction
 
 # todo: eventually would want each extractor running in its own process
 # for now the solution around that would be to simply run this pipeline
 # multiple times
 
-EXTRACT_SLEEP_TIME = 15 # in seconds
+EXTRACT_SLEEP_TIME = 15  # in seconds
 
 
 class Extract(IExtract):
     """@inheritdoc IExtract"""
 
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, handoff: Optional[queue.Queue] = None):
         """
         Args:
             address (str): address for which to extract the raw historical
         transaction data.
+            handoff (Optional[queue.Queue]): if given, the transactions that are
+        extracted once the history is, are also put on it for the transformer.
+        See transform.tail.
         """
 
         self._config = config
+        self._handoff = handoff
 
         # TODO: validate to ensure that this address is not in the db
 
@@ -40,6 +48,8 @@ class Extract(IExtract):
 
         # todo: type of transactions
         self._transactions = []
+        # block height to persist once the transactions are flushed
+        self._extracted_block_height: Optional[int] = None
 
     def __setattr__(self, key, value):
         # https://towardsdatascience.com/how-to-create-read-only-and-deletion-proof-attributes-in-your-python-classes-b34cd1019c2d
@@ -134,7 +144,9 @@ class Extract(IExtract):
 
                 if block_height > last_block_height:
                     txn["_id"] = txn["tx_hash"]
-                    self._transactions.append(txn)
+                    # * such that the transformers need not sort and filter
+                    # * the logs on every replay
+                    self._transactions.append(normalize_transaction(txn))
 
             if not keep_looping:
                 break
@@ -146,22 +158,49 @@ class Extract(IExtract):
                 page_number += 1
 
         if latest_block_height > last_block_height:
-            self._update_block_height(latest_block_height, for_address)
+            # * persisted on flush, after the transactions, such that there
+            # * are never any missing transactions before the block height
+            self._extracted_block_height = latest_block_height
+
+            # * the very first extraction is the whole history, which the
+            # * transformer reads from the db
+            if self._handoff is not None and last_block_height > 0:
+                self._hand_off(last_block_height, latest_block_height)
 
         logging.info("Extractor sleeping...")
         time.sleep(EXTRACT_SLEEP_TIME)
 
+    def _hand_off(self, after_block: int, up_to_block: int) -> None:
+        """
+        Puts the extracted transactions on the handoff queue, in ascending order.
+        Blocks while the queue is full, such that the extractor never gets too
+        far ahead of the transformer.
+
+        Args:
+            after_block (int): block height after which the transactions were
+            extracted
+            up_to_block (int): block height up to which the transactions were
+            extracted
+        """
+
+        # * covalent returns the newest transactions first
+        transactions = sorted(
+            reversed(self._transactions), key=itemgetter("block_height")
+        )
+        self._handoff.put((after_block, up_to_block, transactions))
+
     # Interface Implementation
 
     def flush(self) -> None:
         """@inheritdoc IExtract"""
 
-        if len(self._transactions) == 0:
-            return
+        if len(self._transactions) > 0:
+            self._db.put_items(self._transactions, self._db_name, self._address)
+            self._transactions = []
 
-        self._db.put_items(self._transactions, self._db_name, self._address)
-
-        self._transactions = []
+        if self._extracted_block_height is not None:
+            self._update_block_height(self._extracted_block_height, self._address)
+            self._extracted_block_height = None
 
     def extract(self) -> None:
         """@inheritdoc IExtract"""
@@ -0,0 +1,132 @@
+"""
+Normalizes the raw transactions as they are extracted, such that the
+transformers do not redo it on every replay: the logs are stored sorted by
+their log_offset, with lower cased sender addresses, and every transaction
+carries an index of the senders of its logs to their positions, e.g.
+{"sender_logs": {"0xabc...": [0, 3]}}. A transformer then jumps straight to the
+logs of the addresses that it watches.
+
+Raw transactions that were extracted before are normalized in place, once:
+
+`python -m extract.normalize azrael`
+
+Transactions that are not normalized are still transformed, at the cost of
+sorting and filtering their logs.
+"""
+
+import argparse
+import logging
+from operator import itemgetter
+from typing import Any, Dict, List
+
+from pymongo import ReplaceOne
+
+from config import Config
+from db import DB
+from interfaces.idb import IDB
+
+# field of a raw transaction that indexes the positions of its logs by sender
+SENDER_LOGS = "sender_logs"
+# raw transactions normalized per bulk write of the migration
+NORMALIZE_BATCH_SIZE = 1000
+
+LOG_OFFSET = itemgetter("log_offset")
+
+
+def normalize_transaction(txn: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Sorts the logs of the raw transaction, lower cases their senders and
+    indexes them by sender. In place.
+
+    Args:
+        txn (Dict[str, Any]): raw covalent transaction
+
+    Returns:
+        Dict[str, Any]: the transaction
+    """
+
+    # * covalent does not guarantee the order of the logs
+    log_events = sorted(txn["log_events"], key=LOG_OFFSET)
+    # sender address -> positions of its logs in log_events, ascending
+    sender_logs: Dict[str, List[int]] = {}
+
+    for position, event in enumerate(log_events):
+        sender_address = event["sender_address"]
+        if sender_address is None:
+            continue
+
+        sender_address = sender_address.lower()
+        event["sender_address"] = sender_address
+        sender_logs.setdefault(sender_address, []).append(position)
+
+    txn["log_events"] = log_events
+    txn[SENDER_LOGS] = sender_logs
+
+    return txn
+
+
+def normalize_raw_transactions(db: IDB, db_name: str, address: str) -> int:
+    """
+    Normalizes the raw transactions of the address that are not yet.
+
+    Args:
+        db (IDB): db that holds the raw transactions
+        db_name (str): name of the database
+        address (str): address, i.e. name of the raw transactions collection
+
+    Returns:
+        int: number of normalized transactions
+    """
+
+    raw_transactions = db.iter_items(
+        db_name,
+        address,
+        {
+            "query_clause": {SENDER_LOGS: {"$exists": False}},
+            "batch_size": NORMALIZE_BATCH_SIZE,
+        },
+    )
+
+    normalized = 0
+    operations = []
+
+    for txn in raw_transactions:
+        operations.append(ReplaceOne({"_id": txn["_id"]}, normalize_transaction(txn)))
+
+        if len(operations) >= NORMALIZE_BATCH_SIZE:
+            db.bulk_write(operations, db_name, address)
+            normalized += len(operations)
+            operations = []
+
+    if operations:
+        db.bulk_write(operations, db_name, address)
+        normalized += len(operations)
+
+    logging.info(f"Normalized {normalized} raw transactions of {address}")
+
+    return normalized
+
+
+def main():
+    """Migration entrypoint"""
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("extractor", help="name of the Config preset")
+    args = parser.parse_args()
+
+    config = getattr(Config, args.extractor)()
+
+    logging.basicConfig(
+        filename=config.get_log_filename(),
+        level=logging.INFO,
+        format="%(relativeCreated)6d %(process)d %(message)s",
+    )
+
+    normalized = normalize_raw_transactions(
+        DB(), "ethereum-indexer", config.get_address()
+    )
+    print(f"{args.extractor}: normalized {normalized} raw transactions")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,11 +6,12 @@ Think of this as mathematical axioms, with which you then build proofs which you
 together to build new proofs.
 """
 import abc
-from typing import Any, Dict, List, Optional
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 # todo: some of the items below can raise. Write docs for it
 
-#pylint: disable=missing-class-docstring
+# pylint: disable=missing-class-docstring
 class IDB(metaclass=abc.ABCMeta):
     @classmethod
     def __subclasshook__(cls, subclass):
@@ -53,6 +54,125 @@ class IDB(metaclass=abc.ABCMeta):
         for item in items:
             self.put_item(item, database_name, collection_name)
 
+    @abc.abstractmethod
+    def bulk_write(
+        self, operations: List[Any], database_name: str, collection_name: str
+    ) -> None:
+        """
+        Performs the write operations as a single batch. The operations are
+        independent from each other and may be applied in any order.
+
+        Args:
+            operations (List[Any]): inserts, updates, deletes
+            database_name (str): name of the database
+            collection_name (str): name of the collection
+
+        Raises:
+            NotImplementedError: if this function is not implemented.
+        """
+        raise NotImplementedError
+
+    def atomic_bulk_write(
+        self, writes: List[Tuple[str, List[Any]]], database_name: str
+    ) -> None:
+        """
+        Performs the bulk writes of several collections as a single unit: either
+        all of them are applied or none are. Users are free to override to make
+        use of in-built db transactions. There is no default: writing the
+        collections one by one would let a crash in between them apply the
+        non-idempotent writes, e.g. $inc, twice on the next restart.
+
+        Args:
+            writes (List[Tuple[str, List[Any]]]): collection name and its bulk
+            write operations, in order
+            database_name (str): name of the database
+
+        Raises:
+            NotImplementedError: if this function is not implemented.
+        """
+        raise NotImplementedError
+
+    def wait_for_inserts(
+        self, database_name: str, collection_name: str, timeout: float, debounce: float
+    ) -> None:
+        """
+        Blocks until new items are inserted into the collection, or for at most
+        timeout seconds. A burst of inserts is waited out until no new item
+        showed up for debounce seconds. Users are free to override to make use
+        of in-built db notifications. This one simply sleeps for timeout.
+
+        Args:
+            database_name (str): name of the database
+            collection_name (str): name of the collection
+            timeout (float): longest wait for the first insert, in seconds
+            debounce (float): quiet period that ends a burst of inserts, in seconds
+        """
+        # pylint: disable=unused-argument
+        time.sleep(timeout)
+
+    @abc.abstractmethod
+    def create_index(
+        self, field: str, database_name: str, collection_name: str
+    ) -> None:
+        """
+        Creates an ascending index on the field, if it does not exist yet.
+
+        Args:
+            field (str): name of the field to index
+            database_name (str): name of the database
+            collection_name (str): name of the collection
+
+        Raises:
+            NotImplementedError: if this function is not implemented.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def drop_collection(self, database_name: str, collection_name: str) -> None:
+        """
+        Removes the collection, its documents and its indexes.
+
+        Args:
+            database_name (str): name of the database
+            collection_name (str): name of the collection
+
+        Raises:
+            NotImplementedError: if this function is not implemented.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def rename_collection(
+        self, database_name: str, collection_name: str, new_name: str
+    ) -> None:
+        """
+        Atomically replaces the collection named new_name, if there is one, with
+        the collection. A collection that does not exist replaces new_name with
+        nothing.
+
+        Args:
+            database_name (str): name of the database
+            collection_name (str): name of the collection to rename
+            new_name (str): name to rename it to
+
+        Raises:
+            NotImplementedError: if this function is not implemented.
+        """
+        raise NotImplementedError
+
+    def count_items(self, database_name: str, collection_name: str) -> int:
+        """
+        Users are free to override to count without reading the items.
+
+        Args:
+            database_name (str): name of the database
+            collection_name (str): name of the collection
+
+        Returns:
+            int: number of items in the collection
+        """
+        return len(self.get_all_items(database_name, collection_name, None))
+
     @abc.abstractmethod
     def get_item(
         self, identifier: str, database_name: str, collection_name: str
@@ -92,6 +212,51 @@ class IDB(metaclass=abc.ABCMeta):
         """
         raise NotImplementedError
 
+    def iter_items(
+        self, database_name: str, collection_name: str, options: Optional[Dict] = None
+    ) -> Iterator[Any]:
+        """
+        Lazily iterates over the items of a collection. Takes the same options as
+        get_all_items, plus "projection" and "batch_size". Users are free to
+        override to make use of in-built db cursors, such that the whole collection
+        is never held in memory at once.
+
+        Args:
+            database_name (str): name of the database
+            collection_name (str): name of the collection
+            options (Optional[Dict], optional): "query_clause", "sort", "projection",
+            "batch_size". Defaults to None.
+
+        Returns:
+            Iterator[Any]: items of the collection
+        """
+        return iter(self.get_all_items(database_name, collection_name, options))
+
+    def aggregate(
+        self,
+        database_name: str,
+        collection_name: str,
+        pipeline: List[Dict],
+        options: Optional[Dict] = None,
+    ) -> Iterator[Any]:
+        """
+        Users are free to override to run aggregation pipelines inside the db,
+        such that only their results are read.
+
+        Args:
+            database_name (str): name of the database
+            collection_name (str): name of the collection
+            pipeline (List[Dict]): aggregation pipeline stages
+            options (Optional[Dict], optional): "batch_size". Defaults to None.
+
+        Raises:
+            NotImplementedError: if the db does not run aggregation pipelines.
+
+        Returns:
+            Iterator[Any]: results of the pipeline
+        """
+        raise NotImplementedError
+
     def get_any_item(
         self, database_name: str, collection_name: str, options: Optional[Dict] = None
     ) -> Any:
@@ -0,0 +1,224 @@
+"""
+We use formal interfaces to enforce **modularity** first and foremost, and then structure
+onto all of the code that is to be written.
+
+About transformer state lifecycle:
+
+A transformer owns the state that it builds up out of the raw
+transactions. That state is loaded exactly once, when the transformer
+starts. From then on the in-memory copy is authoritative: entrypoint
+only ever mutates memory, and flush syncs memory back to the db.
+The db is never re-read while transforming.
+
+Transformers that can dump their in-memory state as state documents, and
+restore it from them, are snapshotted every so often. A restart then
+restores the latest snapshot, rather than reading the whole state.
+"""
+import abc
+from typing import Any, Dict, List, Tuple
+
+
+class ITransformer(metaclass=abc.ABCMeta):
+    """
+    Transforms raw transactions of a single address into state. Every
+    transformer sits in transformers/{name}/main.py and is named Transformer.
+    """
+
+    @classmethod
+    def __subclasshook__(cls, subclass):
+        return (
+            hasattr(subclass, "load_state")
+            and callable(subclass.load_state)
+            and hasattr(subclass, "entrypoint")
+            and callable(subclass.entrypoint)
+            and hasattr(subclass, "flush")
+            and callable(subclass.flush)
+            or NotImplemented
+        )
+
+    @abc.abstractmethod
+    def load_state(self) -> None:
+        """
+        Loads the previously persisted state into memory. Called once, before
+        the first transaction is passed to entrypoint.
+
+        Raises:
+            NotImplementedError: if this function is not implemented.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def entrypoint(self, txn: Dict[str, Any]) -> None:
+        """
+        Routes the events of the raw transaction into the handlers, which
+        update the in-memory state.
+
+        Args:
+            txn (Dict[str, Any]): raw transaction
+
+        Raises:
+            NotImplementedError: if this function is not implemented.
+        """
+        raise NotImplementedError
+
+    def entrypoint_batch(self, txns: List[Dict[str, Any]]) -> None:
+        """
+        Same as calling entrypoint with every one of the raw transactions, in
+        order. Users are free to override to process them all at once.
+
+        Args:
+            txns (List[Dict[str, Any]]): raw transactions, in ascending order
+        """
+        for txn in txns:
+            self.entrypoint(txn)
+
+    @abc.abstractmethod
+    def flush(self) -> None:
+        """
+        Syncs the in-memory state to the db.
+
+        Raises:
+            NotImplementedError: if this function is not implemented.
+        """
+        raise NotImplementedError
+
+    def pending_writes(self) -> List[Tuple[str, List[Any]]]:
+        """
+        Users are free to override to have their writes committed together with
+        the block height that they cover. Once committed, they are dropped with
+        discard.
+
+        Returns:
+            List[Tuple[str, List[Any]]]: collection name and the bulk write
+            operations that flush would perform on it, in order
+
+        Raises:
+            NotImplementedError: if the transformer only writes on flush.
+        """
+        raise NotImplementedError
+
+    def get_collection_names(self) -> List[str]:
+        """
+        Users are free to override when the state is kept in more than one
+        collection.
+
+        Returns:
+            List[str]: names of the collections that the transformer writes to,
+            its state collection first
+
+        Raises:
+            NotImplementedError: if the state is only kept in the state collection.
+        """
+        raise NotImplementedError
+
+    def dump_state(self) -> List[Dict[str, Any]]:
+        """
+        Users are free to override, together with restore_state, to have their
+        in-memory state snapshotted. A state that is kept in the db is not.
+
+        Returns:
+            List[Dict[str, Any]]: the in-memory state, as the documents that
+            flush would leave in the state collection
+
+        Raises:
+            NotImplementedError: if the transformer can not be snapshotted.
+        """
+        raise NotImplementedError
+
+    def restore_state(self, documents: List[Dict[str, Any]]) -> None:
+        """
+        Replaces the in-memory state with the one of a snapshot, in place of
+        load_state. Nothing is written to the db.
+
+        Args:
+            documents (List[Dict[str, Any]]): state, as returned by dump_state
+
+        Raises:
+            NotImplementedError: if the transformer can not be snapshotted.
+        """
+        raise NotImplementedError
+
+    def discard(self) -> None:
+        """
+        Forgets the writes made since the last flush, without undoing them in
+        memory. Used when replaying transactions whose writes are already in
+        the db, and once the pending writes are committed.
+
+        Raises:
+            NotImplementedError: if the transformer can not be snapshotted.
+        """
+        raise NotImplementedError
+
+    def get_state_version(self) -> int:
+        """
+        Users are free to override, and bump the version whenever the layout of
+        the in-memory state changes. A transformer whose module is reloaded only
+        takes over the state of the running one if both are of the same version.
+
+        Returns:
+            int: version of the layout of the state
+        """
+        return 0
+
+    def adopt_state(self, previous: "ITransformer") -> None:
+        """
+        Users are free to override to take over the in-memory state of the
+        transformer that they replace, in place of load_state, once its module
+        was reloaded. Only called right after a checkpoint, when nothing is
+        pending, and if both are of the same state version.
+
+        Args:
+            previous (ITransformer): the transformer being replaced
+
+        Raises:
+            NotImplementedError: if the state is to be loaded from the db instead.
+        """
+        raise NotImplementedError
+
+    def set_sender_addresses(self, addresses: List[str]) -> None:
+        """
+        Users are free to override to transform the events of more than one
+        contract. Handlers can tell them apart by their sender_address.
+
+        Args:
+            addresses (List[str]): contracts whose events are transformed
+
+        Raises:
+            NotImplementedError: if the transformer only handles its own address.
+        """
+        raise NotImplementedError
+
+    def get_handled_topics(self) -> Dict[str, bool]:
+        """
+        Users are free to override to have only the logs that they handle read
+        from the db, see Transform's aggregate mode.
+
+        Returns:
+            Dict[str, bool]: topic0 of every handled event -> whether its logs
+            need the params decoded by covalent
+
+        Raises:
+            NotImplementedError: if every log of the transaction is to be read.
+        """
+        raise NotImplementedError
+
+    def get_store_stats(self) -> Dict[str, int]:
+        """
+        Users are free to override to report how well the in-memory part of a
+        state that is kept in the db serves the handlers.
+
+        Returns:
+            Dict[str, int]: "hits", "misses" and "evictions" of the in-memory
+            state, and its number of "entries"
+        """
+        return {}
+
+    def get_profile(self) -> Dict[str, Tuple[int, float]]:
+        """
+        Users are free to override to report where the transform time goes.
+
+        Returns:
+            Dict[str, Tuple[int, float]]: handler name -> (number of calls,
+            seconds spent in them)
+        """
+        return {}
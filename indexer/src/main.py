@@ -1,11 +1,20 @@
 #!/usr/bin/env python
+import argparse
 import logging
+import queue
 import sys
+import threading
+from typing import List
 from multiprocessing import Process
 
 from config import Config
 from extract.main import Extract
+from interfaces.itransform import ITransform
+from transform.fanout import FanOutTransform
 from transform.main import Transform
+from transform.merge import MergedTransform
+from transform.parallel import ParallelTransform
+from transform.tail import HANDOFF_QUEUE_SIZE, TailTransform
 
 
 def extract_and_load(address: str) -> None:
@@ -20,23 +29,129 @@ def extract_and_load(address: str) -> None:
     extract()
 
 
-def transform_and_load(to_transform: str) -> None:
+def transform_and_load(config: Config, args: argparse.Namespace) -> None:
     """
     Initiate and start transformer process.
 
     Args:
-        to_transform (str): Transformer sub-directory name to be instantiated
+        config (Config): config of the transformer
+        args (argparse.Namespace): command line options, which pick the
+        transform to run
     """
 
-    transform = Transform(to_transform)
+    transform: ITransform
+    if args.workers:
+        transform = ParallelTransform(config, args.workers)
+    elif args.fan_out:
+        transform = FanOutTransform(config, args.fan_out)
+    elif args.merge:
+        transform = MergedTransform(
+            config, _merged_addresses(config, args.merge), aggregate=args.aggregate
+        )
+    else:
+        transform = Transform(config, watch=args.watch, aggregate=args.aggregate)
+    transform()
+
+
+def _merged_addresses(config: Config, others: List[str]) -> List[str]:
+    """
+    Returns:
+        List[str]: the configured contract, followed by the other contracts
+        whose transactions are merged with its own
+    """
+
+    return [config.get_address()] + [
+        address for address in others if address.lower() != config.get_address().lower()
+    ]
+
+
+def tail_and_load(
+    config: Config, reload: bool = False, aggregate: bool = False
+) -> None:
+    """
+    Runs the extractor in a thread of the transformer's process. The extractor
+    hands the transactions it extracts straight to the transformer.
+
+    Args:
+        config (Config): config of both the extractor and the transformer
+        reload (bool, optional): whether to reload the transformer once its
+        files change. Defaults to False.
+        aggregate (bool, optional): whether to read only the handled logs.
+        Defaults to False.
+    """
+
+    handoff: queue.Queue = queue.Queue(maxsize=HANDOFF_QUEUE_SIZE)
+
+    extractor = threading.Thread(target=Extract(config, handoff), daemon=True)
+    extractor.start()
+    logging.info("Extractor started.")
+
+    transform = TailTransform(config, handoff, reload=reload, aggregate=aggregate)
+    logging.info("Transformer started.")
     transform()
 
 
 def main():
     """Starts the whole ETL pipeline. Creates two separate processes.
-    One for extraction, and one for transforming.
+    One for extraction, and one for transforming. With --tail, both run
+    in the same process instead.
     """
 
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument(
+        "--tail",
+        action="store_true",
+        help="hand the extracted transactions to the transformer in memory",
+    )
+    parser.add_argument(
+        "--reload",
+        action="store_true",
+        help="with --tail, reload the transformer whenever its files change",
+    )
+    parser.add_argument(
+        "--aggregate",
+        action="store_true",
+        help="read only the handled logs, unwound and filtered inside mongo",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="wake up on change stream notifications of new raw transactions,"
+        " rather than polling for them. Falls back to polling on a standalone"
+        " mongod",
+    )
+    # * one transform at a time
+    transforms = parser.add_mutually_exclusive_group()
+    transforms.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="transform the transactions between two checkpoints on this many"
+        " processes, for transformers that declare partition keys",
+    )
+    transforms.add_argument(
+        "--fan-out",
+        nargs="+",
+        default=[],
+        metavar="TRANSFORMER",
+        help="run these transformers of the same contract over a single read"
+        " of its raw transactions",
+    )
+    transforms.add_argument(
+        "--merge",
+        nargs="+",
+        default=[],
+        metavar="ADDRESS",
+        help="extract these contracts as well, and transform their transactions"
+        " together with those of the configured contract, in block order",
+    )
+    args = parser.parse_args()
+
+    if args.tail and (args.workers or args.fan_out or args.merge):
+        parser.error("--workers, --fan-out and --merge do not apply to --tail")
+    if args.watch and (args.tail or args.workers or args.fan_out or args.merge):
+        parser.error("--watch only applies to the serial transform")
+
     config = Config.azrael()
 
     logging.basicConfig(
@@ -45,17 +160,37 @@ def main():
         format="%(relativeCreated)6d %(process)d %(message)s",
     )
 
-    # todo: graceful keyboard interrupt
-    extractor = Process(target=extract_and_load, args=[config])
-    transformer = Process(target=transform_and_load, args=[config])
+    if args.tail:
+        tail_and_load(config, args.reload, args.aggregate)
+        return
 
-    extractor.start()
+    # todo: graceful keyboard interrupt
+    # * a merged transform reads every contract, each one is extracted on its own
+    extractors = [
+        Process(
+            target=extract_and_load,
+            args=[
+                Config(
+                    address,
+                    config.get_log_filename(),
+                    config.get_transformer_name(),
+                    config.get_network_id(),
+                )
+            ],
+        )
+        for address in _merged_addresses(config, args.merge)
+    ]
+    transformer = Process(target=transform_and_load, args=[config, args])
+
+    for extractor in extractors:
+        extractor.start()
     logging.info("Extractor started.")
 
     transformer.start()
     logging.info("Transformer started.")
 
-    extractor.join()  # wait to finish
+    for extractor in extractors:
+        extractor.join()  # wait to finish
     transformer.join()  # wait to finish
 
 
@@ -0,0 +1,41 @@
+"""Fixtures shared by the tests of the transforms."""
+
+import pytest
+
+from config import Config
+from transform.main import Transform
+
+DATABASE_NAME = "ethereum-indexer"
+
+
+@pytest.fixture(name="auction_state")
+def fixture_auction_state():
+    """
+    Returns:
+        Callable: reads the bid totals of the auction's state collection, by
+        bidder. Its prefix defaults to the auction's address
+    """
+
+    def auction_state(db, prefix=Config.rkl_club_auction().get_address()):
+        return {
+            document["_id"]: document["total"]
+            for document in db.get_all_items(DATABASE_NAME, f"{prefix}-state")
+        }
+
+    return auction_state
+
+
+@pytest.fixture(name="transform_auction")
+def fixture_transform_auction():
+    """
+    Returns:
+        Callable: transforms the auction's raw transactions in a db, with a
+        checkpoint every 10 blocks and no snapshots
+    """
+
+    def transform_auction(db):
+        Transform(
+            Config.rkl_club_auction(), checkpoint_every=10, snapshot_every=0, db=db
+        ).transform()
+
+    return transform_auction
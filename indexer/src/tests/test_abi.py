@@ -0,0 +1,95 @@
+import pytest
+from eth_abi import encode_abi
+
+from transform.abi import (
+    EventDecoder,
+    compile_batch_decoder,
+    compile_decoder,
+    event_topic,
+)
+
+TRANSFER = {
+    "name": "Transfer",
+    "type": "event",
+    "inputs": [
+        {"indexed": True, "name": "from", "type": "address"},
+        {"indexed": True, "name": "to", "type": "address"},
+        {"indexed": False, "name": "value", "type": "uint256"},
+    ],
+}
+
+
+def _address_topic(address: str) -> str:
+    return "0x" + address[2:].rjust(64, "0")
+
+
+def test_decodes_topics_and_data():
+    """Indexed params are decoded out of the topics, the others out of the data."""
+
+    decoder = EventDecoder(TRANSFER)
+    topics = [
+        decoder.topic,
+        _address_topic("0x" + "aB" * 20),
+        _address_topic("0x" + "cd" * 20),
+    ]
+    data = "0x" + encode_abi(["uint256"], [10**18]).hex()
+
+    assert decoder.topic == event_topic("Transfer(address,address,uint256)")
+    assert decoder.decode(topics, data) == [
+        "0x" + "ab" * 20,
+        "0x" + "cd" * 20,
+        10**18,
+    ]
+
+    with pytest.raises(ValueError):
+        decoder.decode(topics[:2], data)
+
+
+def test_decodes_static_and_dynamic_types():
+    """Static and dynamic types decode like eth_abi encodes them."""
+
+    types = ["int8", "bool", "bytes4", "string"]
+    values = [-3, True, b"\x00\x01\x002", "kong"]
+    data = "0x" + encode_abi(types, values).hex()
+
+    static = compile_decoder(tuple((type_, False) for type_ in types[:3]))
+    dynamic = compile_decoder(tuple((type_, False) for type_ in types))
+
+    assert static(["0x0"], "0x" + encode_abi(types[:3], values[:3]).hex()) == values[:3]
+    assert dynamic(["0x0"], data) == values
+
+
+def test_batch_decodes_to_the_same_values():
+    """A batch of logs decodes to the values that the logs decode to one by one."""
+
+    inputs = (
+        ("address", True),
+        ("uint256", True),
+        ("uint8", False),
+        ("uint256", False),
+        ("int8", False),
+        ("bytes4", False),
+        ("bool", False),
+    )
+    types = [type_ for type_, indexed in inputs if not indexed]
+
+    raw_log_topics, raw_log_data = [], []
+    for ix in range(100):
+        raw_log_topics.append(
+            [
+                "0x0",
+                _address_topic("0x" + format(ix, "040x")),
+                "0x" + format(ix, "064x"),
+            ]
+        )
+        # * every other log holds values that do not fit into 64 bits
+        big = 2**200 if ix % 2 else 0
+        values = [ix, big + ix, -ix, bytes([ix] * 4), ix % 3 == 0]
+        raw_log_data.append("0x" + encode_abi(types, values).hex())
+
+    decode = compile_decoder(inputs)
+    decode_batch = compile_batch_decoder(inputs)
+    expected = list(map(decode, raw_log_topics, raw_log_data))
+
+    assert decode_batch(raw_log_topics, raw_log_data) == expected
+    assert decode_batch(raw_log_topics[::2], raw_log_data[::2]) == expected[::2]
@@ -0,0 +1,81 @@
+from bench.fixtures import PLACE_BID_TOPIC, transfers_and_bids
+from bench.memory_db import MemoryDB
+from config import Config
+from interfaces.idb import IDB
+from transform.main import Transform
+
+DATABASE_NAME = "ethereum-indexer"
+ADDRESS = Config.rkl_club_auction().get_address()
+# contract whose logs are interleaved with the ones of the auction
+OTHER_ADDRESS = "0x00000000000000000000000000000000000E5C40"
+
+
+def _history(count):
+    """
+    Every transaction transfers a kong and places a bid. The bid is placed on
+    the other contract, in every third transaction.
+    """
+
+    history = list(transfers_and_bids(count, ADDRESS))
+
+    for txn in history[::3]:
+        for event in txn["log_events"]:
+            if event["raw_log_topics"][0] == PLACE_BID_TOPIC:
+                event["sender_address"] = OTHER_ADDRESS
+
+    return history
+
+
+def _transform(history, aggregate):
+    db = MemoryDB()
+    db.put_items(history, DATABASE_NAME, ADDRESS)
+
+    transform = Transform(
+        Config.rkl_club_auction(),
+        checkpoint_every=10,
+        snapshot_every=0,
+        db=db,
+        aggregate=aggregate,
+    )
+    transform.transform()
+
+    return transform, db.get_all_items(DATABASE_NAME, f"{ADDRESS}-state")
+
+
+def test_aggregated_raw_transactions_transform_the_same():
+    """Only the auction's own log events are read, and the state is the same."""
+
+    history = _history(1_000)
+
+    _, state = _transform(history, aggregate=False)
+    transform, aggregated_state = _transform(history, aggregate=True)
+
+    assert aggregated_state == state
+
+    # pylint: disable=protected-access
+    raw_transactions = list(transform._read_raw_transactions(0))
+    # * only the bids placed on the auction, in block order
+    assert len(raw_transactions) == 1_000 - 334
+    assert [txn["tx_hash"] for txn in raw_transactions] == [
+        txn["tx_hash"] for ix, txn in enumerate(history) if ix % 3
+    ]
+    for txn in raw_transactions:
+        (event,) = txn["log_events"]
+        assert event["raw_log_topics"][0] == PLACE_BID_TOPIC
+        assert event["tx_hash"] == txn["tx_hash"]
+        assert event["decoded"] is None
+        assert "tx_offset" not in event
+
+
+def test_aggregate_mode_falls_back_to_whole_raw_transactions(monkeypatch):
+    """A db that cannot aggregate has its whole raw transactions read instead."""
+
+    history = _history(100)
+    _, state = _transform(history, aggregate=False)
+
+    monkeypatch.setattr(MemoryDB, "aggregate", IDB.aggregate)
+    transform, fallback_state = _transform(history, aggregate=True)
+
+    # pylint: disable=protected-access
+    assert not transform._aggregate
+    assert fallback_state == state
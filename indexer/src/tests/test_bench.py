@@ -0,0 +1,101 @@
+import logging
+
+import pytest
+
+from bench.fixtures import (
+    AZRAEL_MIX,
+    SYLVESTER_MIX,
+    azrael_lendings,
+    covalent_decoded,
+    sylvester_lendings,
+    with_foreign_logs,
+)
+from bench.memory_db import MemoryDB
+from bench.latency import measure
+from bench.suite import baseline, replay_transform
+from config import Config
+from transform.main import SLEEP_TIMER, Transform
+
+DATABASE_NAME = "ethereum-indexer"
+ADDRESS = "0x0000000000000000000000000000000000000001"
+
+
+@pytest.mark.parametrize(
+    "transformer_name, fixture, mix, statuses",
+    [
+        ("azrael", azrael_lendings, AZRAEL_MIX, {"lent", "rented", "stopped"}),
+        ("sylvester", sylvester_lendings, SYLVESTER_MIX, {"lent", "rented"}),
+    ],
+)
+def test_lifecycle_histories_transform_without_warnings(
+    caplog, transformer_name, fixture, mix, statuses
+):
+    """The lending histories of the bench are transformed without any warnings."""
+
+    history = fixture(2_000, ADDRESS, mix=mix)
+    history = list(
+        with_foreign_logs(covalent_decoded(history, transformer_name, 0.5), 2)
+    )
+
+    own = [
+        event
+        for txn in history
+        for event in txn["log_events"]
+        if event["sender_address"] == ADDRESS
+    ]
+    decoded = sum(event["decoded"] is not None for event in own)
+    assert len(own) == 2_000
+    assert 800 < decoded < 1_200
+
+    db = MemoryDB()
+    db.put_items(history, DATABASE_NAME, ADDRESS)
+
+    with caplog.at_level(logging.WARNING):
+        Transform(
+            Config(ADDRESS, "bench.log", transformer_name, 1),
+            checkpoint_every=10,
+            snapshot_every=0,
+            db=db,
+        ).transform()
+
+    assert not caplog.records
+    assert len(db.get_all_items(DATABASE_NAME, f"{ADDRESS}-state")) == 2_000
+    lendings = db.get_all_items(DATABASE_NAME, f"{ADDRESS}-state-lendings")
+    assert statuses <= {lending["status"] for lending in lendings}
+
+
+def test_results_are_compared_against_another_commit():
+    """A result is compared against the latest run of another commit with its options."""
+
+    options = {
+        "transactions": 500,
+        "decoded": None,
+        "foreign": 1,
+        "batch": 100,
+        "mongo": False,
+    }
+    measured = replay_transform("rkl_club_auction", options)
+    assert measured["events_per_sec"] == pytest.approx(measured["txns_per_sec"])
+    assert measured["checkpoint_ms_max"] >= measured["checkpoint_ms_p50"] > 0
+
+    results = [
+        {"commit": commit, "transformer": "rkl_club_auction", "options": options}
+        for commit in ("aaaaaaa", "bbbbbbb", "ccccccc")
+    ]
+    results.append({**results[0], "options": {**options, "foreign": 0}})
+    result = {**results[-2], **measured}
+
+    assert baseline(results, result)["commit"] == "bbbbbbb"
+    assert baseline(results, result, "aaa")["commit"] == "aaaaaaa"
+    assert baseline(results, result, "ddd") is None
+
+
+def test_watching_commits_a_block_well_within_the_polling_interval(monkeypatch):
+    """Inserts wake up a watching transform, rather than it sleeping them out."""
+
+    # * the transform is left waiting once measured, rather than joined
+    monkeypatch.setattr("bench.latency.SLEEP_TIMER", 0)
+    latencies = measure(MemoryDB(), watch=True, blocks=5, interval=0.01)
+
+    assert len(latencies) == 5
+    assert max(latencies) < SLEEP_TIMER / 4
@@ -0,0 +1,74 @@
+import pytest
+
+from bench.fixtures import auction_bids
+from bench.memory_db import MemoryDB
+from config import Config
+
+DATABASE_NAME = "ethereum-indexer"
+
+
+class Crash(Exception):
+    pass
+
+
+class CrashingDB(MemoryDB):
+    """
+    Crashes on the `crash_on`-th commit, before writing any of it, or with
+    `after_state`, once its state is written and before its block height is.
+    """
+
+    def __init__(self, crash_on: int, after_state: bool = False):
+        super().__init__()
+        self._commits = 0
+        self._crash_on = crash_on
+        self._after_state = after_state
+        # collections written to by the crashed commit
+        self.written = []
+
+    def atomic_bulk_write(self, writes, database_name):
+        """Crashes on the crash_on-th commit, unless after_state."""
+        self._commits += 1
+        if self._commits == self._crash_on and not self._after_state:
+            raise Crash
+
+        super().atomic_bulk_write(writes, database_name)
+
+    def bulk_write(self, operations, database_name, collection_name):
+        """Crashes on the block height of the crash_on-th commit, with after_state."""
+        if self._commits == self._crash_on and self._after_state:
+            if collection_name.endswith("-block-height-state"):
+                raise Crash
+            self.written.append(collection_name)
+
+        super().bulk_write(operations, database_name, collection_name)
+
+
+@pytest.mark.parametrize("after_state", [False, True])
+def test_transform_commits_the_state_together_with_the_block_height(
+    after_state, auction_state, transform_auction
+):
+    """A commit that crashes is either applied whole or not at all."""
+
+    address = Config.rkl_club_auction().get_address()
+    history = list(auction_bids(1_000, address))
+
+    db = CrashingDB(crash_on=5, after_state=after_state)
+    db.put_items(history, DATABASE_NAME, address)
+
+    with pytest.raises(Crash):
+        transform_auction(db)
+    assert db.written == ([f"{address}-state"] if after_state else [])
+
+    # * bids are $inc-ed, a restart that replays a committed block counts it twice
+    transform_auction(db)
+
+    fresh = MemoryDB()
+    fresh.put_items(history, DATABASE_NAME, address)
+    transform_auction(fresh)
+
+    # * nothing is left to flush once transform returns
+    assert auction_state(db) == pytest.approx(auction_state(fresh))
+    assert db.get_any_item(DATABASE_NAME, f"{address}-block-height-state") == {
+        "_id": 1,
+        "block_height": history[-1]["block_height"],
+    }
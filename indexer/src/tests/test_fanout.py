@@ -0,0 +1,140 @@
+import time
+
+import pytest
+
+from bench.fixtures import transfers_and_bids
+from bench.memory_db import MemoryDB
+from config import Config
+from transform.fanout import FanOutTransform
+from transform.main import Transform
+
+DATABASE_NAME = "ethereum-indexer"
+ADDRESS = Config.rkl_club_auction().get_address()
+TRANSFORMERS = ["example_rumble_kong_league", "rkl_club_auction"]
+
+
+class RawReadsDB(MemoryDB):
+    """Counts the reads of the raw transactions."""
+
+    def __init__(self):
+        super().__init__()
+        self.raw_reads = 0
+
+    def iter_items(self, database_name, collection_name, options=None):
+        """Counts the reads of the raw transactions' collection."""
+        if collection_name == ADDRESS:
+            self.raw_reads += 1
+
+        return super().iter_items(database_name, collection_name, options)
+
+
+def _config(transformer_name):
+    return Config(ADDRESS, "fanout.log", transformer_name, 1)
+
+
+def _db(history):
+    db = RawReadsDB()
+    db.put_items(history, DATABASE_NAME, ADDRESS)
+    return db
+
+
+def _prefix(transformer_name):
+    # * the transformer of the config keeps the collections the server reads
+    if transformer_name == TRANSFORMERS[0]:
+        return ADDRESS
+    return f"{ADDRESS}-{transformer_name}"
+
+
+def _collections(db, transformer_name):
+    prefix = _prefix(transformer_name)
+
+    # * kong owners and auction totals
+    state = {
+        document["_id"]: document.get("owner", document.get("total"))
+        for document in db.get_all_items(DATABASE_NAME, f"{prefix}-state")
+    }
+    block_height = db.get_any_item(DATABASE_NAME, f"{prefix}-block-height-state")
+
+    return state, block_height["block_height"]
+
+
+def _on_their_own(history):
+    db = _db(history)
+
+    for transformer_name in TRANSFORMERS:
+        Transform(
+            _config(transformer_name),
+            checkpoint_every=10,
+            snapshot_every=0,
+            db=db,
+            namespace=None if transformer_name == TRANSFORMERS[0] else transformer_name,
+        ).transform()
+
+    return db
+
+
+def test_fan_out_reads_the_raw_transactions_once():
+    """Each transformer ends up where it would on its own, from a single read."""
+
+    history = list(transfers_and_bids(2_000, ADDRESS))
+
+    db = _db(history)
+    FanOutTransform(
+        _config(TRANSFORMERS[0]),
+        TRANSFORMERS,
+        batch_size=100,
+        checkpoint_every=10,
+        snapshot_every=0,
+        db=db,
+    ).transform()
+
+    assert db.raw_reads == 1
+
+    expected = _on_their_own(history)
+    for transformer_name in TRANSFORMERS:
+        state, block_height = _collections(db, transformer_name)
+        expected_state, expected_block_height = _collections(expected, transformer_name)
+
+        assert state == pytest.approx(expected_state)
+        assert block_height == expected_block_height
+
+
+def test_a_slow_transformer_does_not_hold_up_the_others():
+    """A transformer that falls behind is detached and catches up on its own."""
+
+    history = list(transfers_and_bids(2_000, ADDRESS))
+
+    db = _db(history)
+    fan_out = FanOutTransform(
+        _config(TRANSFORMERS[0]),
+        TRANSFORMERS,
+        batch_size=50,
+        checkpoint_every=10,
+        snapshot_every=0,
+        db=db,
+        queue_size=2,
+    )
+
+    # pylint: disable=protected-access
+    slow = fan_out._members[1].transform._transformer
+    entrypoint_batch = slow.entrypoint_batch
+
+    def slow_entrypoint_batch(txns):
+        time.sleep(0.05)
+        entrypoint_batch(txns)
+
+    slow.entrypoint_batch = slow_entrypoint_batch
+
+    fan_out.transform()
+
+    # * the slow transformer was detached and caught up on its own
+    assert [member.detached for member in fan_out._members] == [False, True]
+    assert db.raw_reads == 2
+
+    expected = _on_their_own(history)
+    for transformer_name in TRANSFORMERS:
+        state, block_height = _collections(db, transformer_name)
+        expected_state, expected_block_height = _collections(expected, transformer_name)
+
+        assert state == pytest.approx(expected_state)
+        assert block_height == expected_block_height
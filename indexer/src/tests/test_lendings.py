@@ -0,0 +1,165 @@
+from bench.memory_db import MemoryDB
+from transformers.azrael import main as azrael
+from transformers.azrael.event import (
+    LendingStoppedEvent,
+    LentEvent,
+    RentedEvent,
+    ReturnedEvent,
+)
+from transformers.sylvester import main as sylvester
+from transformers.sylvester.event import (
+    LendEvent,
+    RentClaimedEvent,
+    RentEvent,
+    StopRentEvent,
+)
+
+DATABASE_NAME = "ethereum-indexer"
+ADDRESS = "0x0000000000000000000000000000000000000001"
+NFT_ADDRESS = "0x00000000000000000000000000000000000000aa"
+LENDER = "0x00000000000000000000000000000000000000bb"
+RENTER = "0x00000000000000000000000000000000000000cc"
+
+
+def _documents(db, view):
+    return {
+        document["_id"]: document
+        for document in db.get_all_items(DATABASE_NAME, f"{ADDRESS}-state-{view}")
+    }
+
+
+def _lent(log_offset, lending_id):
+    return LentEvent.create(
+        tx_hash="0x1",
+        log_offset=log_offset,
+        nft_address=NFT_ADDRESS,
+        token_id="7",
+        lent_amount=1,
+        lending_id=lending_id,
+        lender_address=LENDER,
+        max_rent_duration=10,
+        daily_rent_price=1.5,
+        nft_price=100.0,
+        is_ERC721=True,
+        payment_token=1,
+    )
+
+
+def test_azrael_keeps_the_current_state_of_every_lending():
+    """Azrael keeps a lending and renting document up to date per event."""
+
+    db = MemoryDB()
+    transformer = azrael.Transformer(ADDRESS, db)
+    transformer.load_state()
+
+    # pylint: disable=protected-access
+    transformer._add_transformed(_lent(0, 1))
+    transformer._add_transformed(_lent(1, 2))
+    transformer._add_transformed(
+        RentedEvent.create(
+            tx_hash="0x2",
+            log_offset=0,
+            lending_id=1,
+            renter_address=RENTER,
+            rent_duration=3,
+            rented_at=1000,
+        )
+    )
+    transformer.flush()
+
+    lendings = _documents(db, "lendings")
+    assert lendings[1]["status"] == azrael.RENTED
+    assert lendings[1]["renterAddress"] == RENTER
+    assert lendings[1]["nftAddress"] == NFT_ADDRESS
+    assert lendings[2]["status"] == azrael.LENT
+
+    transformer._add_transformed(
+        ReturnedEvent.create(
+            tx_hash="0x3", log_offset=0, lending_id=1, returned_at=2000
+        )
+    )
+    transformer._add_transformed(
+        LendingStoppedEvent.create(
+            tx_hash="0x3", log_offset=1, lending_id=2, stopped_at=2000
+        )
+    )
+    transformer.flush()
+
+    lendings = _documents(db, "lendings")
+    assert lendings[1]["status"] == azrael.LENT
+    assert lendings[1]["returnedAt"] == 2000
+    assert "renterAddress" not in lendings[1]
+    assert lendings[2]["status"] == azrael.STOPPED
+    assert len(db.get_all_items(DATABASE_NAME, f"{ADDRESS}-state")) == 5
+
+
+def _rent(log_offset, renting_id, rent_amount):
+    return RentEvent.create(
+        tx_hash="0x2",
+        log_offset=log_offset,
+        lending_id=1,
+        renter_address=RENTER,
+        renting_id=renting_id,
+        rent_amount=rent_amount,
+        rent_duration=3,
+        rented_at=1000,
+    )
+
+
+def test_sylvester_sums_up_the_rentings_of_a_lending(monkeypatch):
+    """Sylvester keeps the rented amount of a lending in step with its rentings."""
+
+    # * every lookup after a flush misses and reads the db
+    monkeypatch.setattr("transform.store.STATE_CACHE_ENTRIES", 1)
+
+    db = MemoryDB()
+    transformer = sylvester.Transformer(ADDRESS, db)
+    transformer.load_state()
+
+    # pylint: disable=protected-access
+    transformer._add_transformed(
+        LendEvent.create(
+            tx_hash="0x1",
+            log_offset=0,
+            is_721=False,
+            lender_address=LENDER,
+            nft_address=NFT_ADDRESS,
+            token_id="7",
+            lending_id=1,
+            max_rent_duration=10,
+            daily_rent_price=1.5,
+            lend_amount=3,
+            payment_token=1,
+        )
+    )
+    transformer.flush()
+    transformer._add_transformed(_rent(0, 10, 2))
+    transformer._add_transformed(_rent(1, 11, 1))
+    transformer.flush()
+
+    assert _documents(db, "lendings")[1]["status"] == sylvester.RENTED
+    assert _documents(db, "lendings")[1]["rentedAmount"] == 3
+    assert _documents(db, "rentings")[10]["nftAddress"] == NFT_ADDRESS
+
+    transformer._add_transformed(
+        StopRentEvent.create(
+            tx_hash="0x3", log_offset=0, renting_id=10, stopped_at=2000
+        )
+    )
+    transformer.flush()
+
+    assert _documents(db, "lendings")[1]["status"] == sylvester.RENTED
+    assert _documents(db, "lendings")[1]["rentedAmount"] == 1
+    assert _documents(db, "rentings")[10]["status"] == sylvester.RETURNED
+
+    transformer._add_transformed(
+        RentClaimedEvent.create(
+            tx_hash="0x4", log_offset=0, renting_id=11, collected_at=3000
+        )
+    )
+    transformer.flush()
+
+    lending = _documents(db, "lendings")[1]
+    assert (lending["status"], lending["rentedAmount"]) == (sylvester.LENT, 0)
+    assert _documents(db, "rentings")[11]["status"] == sylvester.CLAIMED
+    assert transformer.get_store_stats()["misses"] > 0
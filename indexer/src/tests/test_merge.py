@@ -0,0 +1,137 @@
+from bench.fixtures import kong_transfers
+from bench.memory_db import MemoryDB
+from config import Config
+from transform.main import Transform
+from transform.merge import MergedTransform
+
+DATABASE_NAME = "ethereum-indexer"
+ADDRESS = Config.example_rumble_kong_league().get_address()
+# address of a second contract, whose transfers are transformed together
+OTHER_ADDRESS = "0x00000000000000000000000000000000000e5c40"
+
+
+def _owners(db):
+    return {
+        document["_id"]: document["owner"]
+        for document in db.get_all_items(DATABASE_NAME, f"{ADDRESS}-state")
+    }
+
+
+def _extracted(db, address, block_height):
+    db.put_item(
+        {"_id": 1, "block_height": block_height},
+        DATABASE_NAME,
+        f"{address}-block-height",
+    )
+
+
+def _split(history):
+    """
+    Every third transaction is of the second contract, and every third touches
+    both of them. Reversed, such that the blocks are not in order of offset.
+    """
+
+    own, other = [], []
+
+    for ix, txn in enumerate(history):
+        if ix % 3 == 0:
+            log_events = [
+                {**log_event, "sender_address": OTHER_ADDRESS}
+                for log_event in txn["log_events"]
+            ]
+            other.append({**txn, "log_events": log_events})
+            continue
+
+        own.append(txn)
+        if ix % 3 == 1:
+            other.append(txn)
+
+    return own[::-1], other[::-1]
+
+
+def _merged(db):
+    return MergedTransform(
+        Config.example_rumble_kong_league(),
+        [ADDRESS, OTHER_ADDRESS],
+        checkpoint_every=10,
+        snapshot_every=20,
+        db=db,
+    )
+
+
+def test_merged_transform_reads_the_sources_in_block_order():
+    """The sources are read in block order, up to where all of them are extracted."""
+
+    # * few tokens, such that the owners depend on the order of the transfers
+    history = list(kong_transfers(2_000, ADDRESS, tokens=50))
+    own, other = _split(history)
+    middle_block = history[len(history) // 2]["block_height"]
+    last_block = history[-1]["block_height"]
+
+    db = MemoryDB()
+    db.put_items(own, DATABASE_NAME, ADDRESS)
+    db.put_items(other, DATABASE_NAME, OTHER_ADDRESS)
+    _extracted(db, ADDRESS, last_block)
+    _extracted(db, OTHER_ADDRESS, middle_block)
+
+    # pylint: disable=protected-access
+    merged = _merged(db)
+    assert [txn["tx_hash"] for txn in merged._read_raw_transactions(0)] == [
+        txn["tx_hash"] for txn in history if txn["block_height"] <= middle_block
+    ]
+
+    # * only up to where both of the contracts are extracted
+    merged.transform()
+    checkpoint = db.get_any_item(DATABASE_NAME, f"{ADDRESS}-block-height-state")
+    assert checkpoint == {
+        "_id": 1,
+        "block_height": middle_block,
+        "sources": {ADDRESS: 0, OTHER_ADDRESS: 0},
+    }
+
+    _extracted(db, OTHER_ADDRESS, last_block)
+    # * restarts from the snapshot and checkpoint of the first transform
+    _merged(db).transform()
+
+    fresh = MemoryDB()
+    fresh.put_items(history, DATABASE_NAME, ADDRESS)
+    Transform(
+        Config.example_rumble_kong_league(),
+        checkpoint_every=10,
+        snapshot_every=0,
+        db=fresh,
+    ).transform()
+
+    assert _owners(db) == _owners(fresh)
+    assert db.get_any_item(DATABASE_NAME, f"{ADDRESS}-block-height-state") == {
+        "_id": 1,
+        "block_height": last_block,
+        "sources": {ADDRESS: 0, OTHER_ADDRESS: 0},
+    }
+
+
+def test_merged_transform_restarts_from_a_snapshot_before_the_checkpoint():
+    """The transactions in between the snapshot and the checkpoint are replayed."""
+
+    history = list(kong_transfers(2_000, ADDRESS, tokens=50))
+    own, other = _split(history)
+    last_block = history[-1]["block_height"]
+
+    db = MemoryDB()
+    db.put_items(own, DATABASE_NAME, ADDRESS)
+    db.put_items(other, DATABASE_NAME, OTHER_ADDRESS)
+    _extracted(db, ADDRESS, last_block)
+    _extracted(db, OTHER_ADDRESS, last_block)
+
+    # pylint: disable=protected-access
+    merged = _merged(db)
+    merged.transform()
+    assert merged._snapshot_block_height < last_block
+    assert db.get_any_item(DATABASE_NAME, f"{ADDRESS}-block-height-state") == {
+        "_id": 1,
+        "block_height": last_block,
+        "sources": {ADDRESS: 0, OTHER_ADDRESS: 0},
+    }
+
+    restarted = _merged(db)
+    assert restarted._transformer._owners == merged._transformer._owners
@@ -0,0 +1,76 @@
+import pytest
+
+from bench.fixtures import PLACE_BID_TOPIC, transfers_and_bids
+from bench.memory_db import MemoryDB
+from config import Config
+from extract.normalize import (
+    SENDER_LOGS,
+    normalize_raw_transactions,
+    normalize_transaction,
+)
+from transformers.rkl_club_auction.main import Transformer as Auction
+
+DATABASE_NAME = "ethereum-indexer"
+ADDRESS = Config.rkl_club_auction().get_address()
+# contract whose logs are interleaved with the ones of the auction
+OTHER_ADDRESS = "0x00000000000000000000000000000000000E5C40"
+
+
+def _history(count):
+    """
+    Every transaction transfers a kong and places a bid. The bid is placed on
+    the other contract, in every other transaction.
+    """
+
+    history = list(transfers_and_bids(count, ADDRESS))
+
+    for txn in history[::2]:
+        for event in txn["log_events"]:
+            if event["raw_log_topics"][0] == PLACE_BID_TOPIC:
+                event["sender_address"] = OTHER_ADDRESS
+
+    return history
+
+
+def test_logs_are_sorted_and_indexed_by_lower_cased_sender():
+    """The logs of a normalized transaction are sorted and indexed by sender."""
+
+    txn = normalize_transaction(_history(1)[0])
+
+    assert [event["log_offset"] for event in txn["log_events"]] == [0, 1]
+    assert txn[SENDER_LOGS] == {ADDRESS.lower(): [0], OTHER_ADDRESS.lower(): [1]}
+
+    transformer = Auction(ADDRESS, MemoryDB())
+    # pylint: disable=protected-access
+    assert transformer._own_log_events(txn) == [txn["log_events"][0]]
+
+    transformer.set_sender_addresses([OTHER_ADDRESS, ADDRESS])
+    assert transformer._own_log_events(txn) == txn["log_events"]
+
+
+def test_normalized_raw_transactions_transform_the_same(transform_auction):
+    """Normalizing the raw transactions in place does not change the state."""
+
+    history = _history(1_000)
+    states = []
+
+    for normalize in (False, True):
+        db = MemoryDB()
+        db.put_items(history, DATABASE_NAME, ADDRESS)
+
+        if normalize:
+            assert normalize_raw_transactions(db, DATABASE_NAME, ADDRESS) == 1_000
+            assert normalize_raw_transactions(db, DATABASE_NAME, ADDRESS) == 0
+
+        transform_auction(db)
+        states.append(db.get_all_items(DATABASE_NAME, f"{ADDRESS}-state"))
+
+    # * only the bids placed on the auction
+    bids = [
+        int(event["raw_log_topics"][2], 16) / 1e18
+        for txn in history[1::2]
+        for event in txn["log_events"]
+        if event["raw_log_topics"][0] == PLACE_BID_TOPIC
+    ]
+    assert sum(document["total"] for document in states[0]) == pytest.approx(sum(bids))
+    assert states[1] == states[0]
@@ -0,0 +1,36 @@
+from bench.fixtures import azrael_lendings
+from bench.memory_db import MemoryDB
+from config import Config
+from transform.main import Transform
+from transform.parallel import ParallelTransform
+
+DATABASE_NAME = "ethereum-indexer"
+
+
+def _transform(transform_cls, **kwargs):
+    config = Config.azrael()
+    address = config.get_address()
+
+    db = MemoryDB()
+    db.put_items(list(azrael_lendings(2_000, address)), DATABASE_NAME, address)
+
+    transform = transform_cls(config, checkpoint_every=100, db=db, **kwargs)
+    transform.transform()
+    # pylint: disable=protected-access
+    transform._transformer.flush()
+
+    return (
+        db.get_all_items(DATABASE_NAME, f"{address}-state"),
+        db.get_all_items(DATABASE_NAME, f"{address}-state-lendings"),
+        db.get_any_item(DATABASE_NAME, f"{address}-block-height-state"),
+    )
+
+
+def test_parallel_transform_matches_serial_transform():
+    """Partitions transformed on 3 workers merge back into the serial state."""
+
+    state, lendings, block_height = _transform(Transform)
+
+    assert len(state) == 2_000
+    assert len(lendings) == 2_000
+    assert _transform(ParallelTransform, workers=3) == (state, lendings, block_height)
@@ -0,0 +1,50 @@
+import base64
+import random
+
+from bench.price import reference_unpack_price
+from transform.price import (
+    PRICE_CACHE_ENTRIES,
+    unpack_price,
+    unpack_price_bytes,
+    unpack_prices,
+)
+
+# packed prices sampled out of the whole bytes4 range
+SAMPLES = 100_000
+
+
+def _packed_prices():
+    rng = random.Random(42)
+    # * both parts around the cap, and the ends of the range
+    parts = [0, 1, 9998, 9999, 10_000, 0xFFFE, 0xFFFF]
+    values = [whole << 16 | decimal for whole in parts for decimal in parts]
+    values += [rng.getrandbits(32) for _ in range(SAMPLES)]
+
+    return [value.to_bytes(4, "big") for value in values]
+
+
+def test_unpacks_like_the_reference_over_the_bytes4_range():
+    """Every way of unpacking a price matches the reference, bit for bit."""
+
+    packed = _packed_prices()
+    encoded = [base64.b64encode(price).decode() for price in packed]
+    expected = [reference_unpack_price(price) for price in packed]
+
+    # * equal down to the last bit of the float
+    assert [unpack_price_bytes(price) for price in packed] == expected
+    assert [unpack_price(price) for price in packed] == expected
+    assert [unpack_price(price) for price in encoded] == expected
+    assert unpack_prices(packed) == expected
+    assert unpack_prices(encoded) == expected
+
+    assert unpack_price(bytes.fromhex("00011388")) == 1.5
+    assert unpack_price.cache_info().currsize <= PRICE_CACHE_ENTRIES
+
+
+def test_unpacks_a_batch_of_prices_of_other_sizes_one_by_one():
+    """A batch with prices that are not 4 bytes long is unpacked one by one."""
+
+    packed = [bytes.fromhex("00011388"), bytes.fromhex("000200ff"), b"\xff" * 6]
+
+    assert unpack_prices(packed) == [reference_unpack_price(p) for p in packed]
+    assert unpack_prices([]) == []
@@ -0,0 +1,120 @@
+import pytest
+from pymongo import UpdateOne
+
+from bench.fixtures import auction_bids
+from bench.memory_db import MemoryDB
+from config import Config
+from transform.reindex import ShadowMismatch, ShadowTransform, reindex
+
+DATABASE_NAME = "ethereum-indexer"
+ADDRESS = Config.rkl_club_auction().get_address()
+
+
+class BulkLoadDB(MemoryDB):
+    """Only lets the state be bulk loaded outside of transactions."""
+
+    def atomic_bulk_write(self, writes, database_name):
+        """Fails the test, the shadow must be written with bulk writes."""
+        raise AssertionError("shadow state written in a transaction")
+
+
+def test_reindex_swaps_the_rebuilt_state_in_for_the_live_one(
+    auction_state, transform_auction
+):
+    """The rebuilt state replaces the live one only once swapped in."""
+
+    history = list(auction_bids(1_000, ADDRESS))
+
+    db = MemoryDB()
+    db.put_items(history, DATABASE_NAME, ADDRESS)
+    transform_auction(db)
+
+    # * a buggy transformer double counted one of the bidders
+    bidder, total = next(iter(auction_state(db).items()))
+    db.bulk_write(
+        [UpdateOne({"_id": bidder}, {"$set": {"total": total * 2}})],
+        DATABASE_NAME,
+        f"{ADDRESS}-state",
+    )
+    live = auction_state(db)
+
+    shadow = ShadowTransform(
+        Config.rkl_club_auction(), checkpoint_every=100, snapshot_every=50, db=db
+    )
+    shadow.transform()
+    shadow.verify()
+
+    # * readers see the live state until the swap
+    assert auction_state(db) == live
+
+    shadow.swap()
+
+    fresh = MemoryDB()
+    fresh.put_items(history, DATABASE_NAME, ADDRESS)
+    transform_auction(fresh)
+
+    assert auction_state(db) == pytest.approx(auction_state(fresh))
+    assert not auction_state(db, f"{ADDRESS}-shadow")
+    assert db.get_any_item(DATABASE_NAME, f"{ADDRESS}-block-height-state") == {
+        "_id": 1,
+        "block_height": history[-1]["block_height"],
+    }
+
+    # * the live transform picks up from the swapped in checkpoint and snapshots
+    restarted = MemoryDB()
+    restarted.put_items(history, DATABASE_NAME, ADDRESS)
+    reindex(Config.rkl_club_auction(), restarted)
+    transform_auction(restarted)
+
+    assert auction_state(restarted) == pytest.approx(auction_state(fresh))
+
+
+def test_shadow_is_bulk_loaded_and_verified_against_the_raw_transactions(auction_state):
+    """The shadow is bulk loaded and caught out when it misses a bid."""
+
+    history = list(auction_bids(1_000, ADDRESS))
+
+    db = BulkLoadDB()
+    db.put_items(history, DATABASE_NAME, ADDRESS)
+
+    shadow = ShadowTransform(
+        Config.rkl_club_auction(), checkpoint_every=100, snapshot_every=0, db=db
+    )
+    shadow.transform()
+    assert shadow.verify() == len(auction_state(db, f"{ADDRESS}-shadow"))
+
+    # * a bid that was extracted into a block that was already rebuilt
+    late = {**history[0], "_id": "late", "tx_hash": "late"}
+    db.put_item(late, DATABASE_NAME, ADDRESS)
+
+    with pytest.raises(ShadowMismatch):
+        shadow.verify()
+
+
+def test_an_interrupted_reindex_starts_over_when_rerun(
+    auction_state, transform_auction
+):
+    """The shadow of an interrupted re-index is dropped, not replayed."""
+
+    history = list(auction_bids(1_000, ADDRESS))
+
+    db = MemoryDB()
+    db.put_items(history, DATABASE_NAME, ADDRESS)
+
+    # * interrupted half way, after snapshotting and before the swap
+    ShadowTransform(
+        Config.rkl_club_auction(),
+        checkpoint_every=10,
+        snapshot_every=50,
+        db=db,
+        up_to_block=history[len(history) // 2]["block_height"],
+    ).transform()
+    assert auction_state(db, f"{ADDRESS}-shadow")
+
+    reindex(Config.rkl_club_auction(), db)
+
+    fresh = MemoryDB()
+    fresh.put_items(history, DATABASE_NAME, ADDRESS)
+    transform_auction(fresh)
+
+    assert auction_state(db) == pytest.approx(auction_state(fresh))
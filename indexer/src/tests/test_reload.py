@@ -0,0 +1,151 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+from bench.fixtures import auction_bids
+from bench.memory_db import MemoryDB
+from config import Config
+from transform.main import Transform
+from transformers.rkl_club_auction import main as auction
+
+DATABASE_NAME = "ethereum-indexer"
+ADDRESS = Config.rkl_club_auction().get_address()
+# transformer package that the tests edit, a copy of the auction
+NAME = "reloadable_auction"
+MODULE_NAME = f"transformers.{NAME}.main"
+
+
+@pytest.fixture(name="package")
+def fixture_package(tmp_path, monkeypatch):
+    """Copies the auction into a transformer package that the test can edit."""
+
+    package = tmp_path / "transformers" / NAME
+    shutil.copytree(
+        os.path.dirname(auction.__file__),
+        package,
+        ignore=shutil.ignore_patterns("__pycache__"),
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr("transform.reload.RELOAD_POLL_SECONDS", 0)
+
+    yield package
+
+    sys.modules.pop(MODULE_NAME, None)
+
+
+def _edit(package, old, new):
+    main = package / "main.py"
+    main.write_text(main.read_text().replace(old, new))
+
+    # * past the modification time that the bytecode was cached for
+    stat = main.stat()
+    os.utime(main, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2_000_000_000))
+
+
+def _transform(db, history, **kwargs):
+    db.put_items(history, DATABASE_NAME, ADDRESS)
+    transform = Transform(
+        Config(ADDRESS, "reload.log", NAME, 42),
+        checkpoint_every=10,
+        snapshot_every=0,
+        db=db,
+        **kwargs,
+    )
+    transform.transform()
+    return transform
+
+
+def test_reloaded_transformer_takes_over_the_state(package, auction_state):
+    """An edited transformer is reloaded and carries on from the state in memory."""
+
+    history = list(auction_bids(1_000, ADDRESS))
+    half = len(history) // 2
+
+    fresh = MemoryDB()
+    _transform(fresh, history)
+
+    db = MemoryDB()
+    live = _transform(db, history[:half], reload=True)
+    # pylint: disable=protected-access
+    transformer_cls = type(live._transformer)
+    totals = live._transformer._totals
+
+    # * the state is never read back from the db
+    _edit(
+        package,
+        "        self._db.create_index(",
+        "        raise AssertionError\n        self._db.create_index(",
+    )
+    db.put_items(history[half:], DATABASE_NAME, ADDRESS)
+    live.transform()
+
+    assert live._transformer.__class__ is not transformer_cls
+    assert live._transformer._totals is totals
+    assert auction_state(db) == pytest.approx(auction_state(fresh))
+
+
+def test_reloaded_transformer_of_a_new_state_version_re_indexes(package, auction_state):
+    """A reloaded transformer of a new state version rebuilds the state."""
+
+    history = list(auction_bids(1_000, ADDRESS))
+    half = len(history) // 2
+
+    fresh = MemoryDB()
+    _transform(fresh, history)
+
+    db = MemoryDB()
+    live = _transform(db, history[:half], reload=True)
+
+    # * totals in finney rather than ether
+    _edit(
+        package, "price = decoded_params[1] / 1e18", "price = decoded_params[1] / 1e15"
+    )
+    _edit(
+        package, "    def load_state(", "    state_version = 1\n\n    def load_state("
+    )
+    db.put_items(history[half:], DATABASE_NAME, ADDRESS)
+    live.transform()
+
+    # pylint: disable=protected-access
+    assert live._transformer.get_state_version() == 1
+    assert not db.get_all_items(DATABASE_NAME, f"{ADDRESS}-shadow-state")
+    assert auction_state(db) == pytest.approx(
+        {bidder: total * 1000 for bidder, total in auction_state(fresh).items()}
+    )
+
+
+def test_a_transformer_that_fails_to_reload_keeps_running(
+    package, caplog, auction_state
+):
+    """A package edited into a broken state keeps the transformer that was loaded."""
+
+    # * 4 bids per block, so every third ends on a block boundary
+    history = list(auction_bids(1_200, ADDRESS))
+    third = len(history) // 3
+
+    fresh = MemoryDB()
+    _transform(fresh, history)
+
+    db = MemoryDB()
+    live = _transform(db, history[:third], reload=True)
+    # pylint: disable=protected-access
+    transformer = live._transformer
+
+    _edit(package, "    def load_state(", "    def load_state(:")
+    db.put_items(history[third : 2 * third], DATABASE_NAME, ADDRESS)
+    live.transform()
+
+    assert live._transformer is transformer
+    assert "SyntaxError" in caplog.text
+    # * the package is as it was loaded, and the same files are not retried
+    assert sys.modules[MODULE_NAME].Transformer is type(transformer)
+    assert not live._watcher.changed()
+
+    _edit(package, "    def load_state(:", "    def load_state(")
+    db.put_items(history[2 * third :], DATABASE_NAME, ADDRESS)
+    live.transform()
+
+    assert live._transformer.__class__ is not type(transformer)
+    assert auction_state(db) == pytest.approx(auction_state(fresh))
@@ -0,0 +1,140 @@
+import pytest
+
+from bench.fixtures import (
+    AZRAEL_MIX,
+    SYLVESTER_MIX,
+    auction_bids,
+    azrael_lendings,
+    sylvester_lendings,
+)
+from bench.memory_db import MemoryDB
+from config import Config
+from transform.main import Transform
+from transform.snapshot import SnapshotStore
+
+DATABASE_NAME = "ethereum-indexer"
+
+
+def _history(address):
+    # 250 blocks of 4 bids each. Bids are $inc-ed into the state, so any write
+    # that is replayed twice shows up in the totals
+    return list(auction_bids(1_000, address))
+
+
+def _transform(db, history):
+    db.put_items(history, DATABASE_NAME, Config.rkl_club_auction().get_address())
+
+    transform = Transform(
+        Config.rkl_club_auction(), checkpoint_every=10, snapshot_every=60, db=db
+    )
+    transform.transform()
+    # pylint: disable=protected-access
+    transform._transformer.flush()
+
+    return transform
+
+
+def test_restart_restores_the_snapshot_and_resumes_after_the_checkpoint(
+    auction_state,
+):
+    """A restart from the snapshot ends up with the uninterrupted state."""
+
+    history = _history(Config.rkl_club_auction().get_address())
+
+    db = MemoryDB()
+    # pylint: disable=protected-access
+    assert _transform(db, history[:700])._snapshots.block_heights()
+
+    # * the restarted transform restores the snapshot before the checkpoint
+    # * and replays up to the checkpoint without writing
+    _transform(db, history[700:])
+
+    fresh = MemoryDB()
+    _transform(fresh, history)
+
+    # * totals are summed up in a different order, over different flushes
+    assert auction_state(db) == pytest.approx(auction_state(fresh))
+
+
+def test_rebuild_starts_over_from_an_earlier_snapshot(auction_state):
+    """A rebuild rewrites the state of an earlier snapshot, and drops the later ones."""
+
+    history = _history(Config.rkl_club_auction().get_address())
+
+    db = MemoryDB()
+    transform = _transform(db, history)
+    state = auction_state(db)
+
+    # pylint: disable=protected-access
+    snapshots = transform._snapshots.block_heights()
+    transform.rebuild(snapshots[1])
+
+    assert transform._snapshots.block_heights() == snapshots[:2]
+    assert len(auction_state(db)) < len(state)
+
+    transform.transform()
+    transform._transformer.flush()
+
+    assert auction_state(db) == pytest.approx(state)
+    assert transform._snapshots.block_heights() == snapshots
+
+
+@pytest.mark.parametrize(
+    "transformer_name, fixture, mix",
+    [
+        ("azrael", azrael_lendings, AZRAEL_MIX),
+        ("sylvester", sylvester_lendings, SYLVESTER_MIX),
+    ],
+)
+def test_state_kept_in_the_db_is_not_snapshotted(transformer_name, fixture, mix):
+    """
+    Transformers that can not restore a snapshot are not snapshotted, and are
+    rebuilt from scratch, views included.
+    """
+
+    address = "0x0000000000000000000000000000000000000001"
+    config = Config(address, "snapshot.log", transformer_name, 1)
+    history = list(fixture(1_000, address, mix=mix))
+
+    def collections(db, transform):
+        # pylint: disable=protected-access
+        return {
+            collection_name: db.get_all_items(DATABASE_NAME, collection_name)
+            for collection_name in transform._get_collection_names()
+        }
+
+    db = MemoryDB()
+    db.put_items(history, DATABASE_NAME, address)
+    transform = Transform(config, checkpoint_every=10, snapshot_every=60, db=db)
+    transform.transform()
+    state = collections(db, transform)
+    assert len(state) > 1
+
+    # pylint: disable=protected-access
+    assert not transform._snapshots.block_heights()
+    transform.rebuild()
+    assert not any(collections(db, transform).values())
+
+    transform.transform()
+    assert collections(db, transform) == state
+
+
+def test_only_the_latest_snapshots_are_kept():
+    """Only the latest snapshots are kept, and older formats are not restored."""
+
+    db = MemoryDB()
+    snapshots = SnapshotStore(db, DATABASE_NAME, "snapshots", "rkl_club_auction", 2)
+    # * a snapshot of another format, that the newer ones expire along with
+    db.put_item(
+        {"_id": "5-0", "block_height": 5, "version": 0, "transformer": "x"},
+        DATABASE_NAME,
+        "snapshots",
+    )
+
+    for block_height in (10, 20, 30):
+        snapshots.save(block_height, [{"_id": block_height, "total": 1}])
+
+    assert snapshots.block_heights() == [20, 30]
+    assert len(db.get_all_items(DATABASE_NAME, "snapshots")) == 2
+    assert snapshots.latest(25) == (20, [{"_id": 20, "total": 1}], {})
+    assert snapshots.latest(15) is None
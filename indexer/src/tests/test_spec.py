@@ -0,0 +1,204 @@
+import json
+import os
+import shutil
+
+import pytest
+
+from bench.fixtures import azrael_lendings
+from bench.memory_db import MemoryDB
+from transform.abi import event_topic
+from transform.spec import SPEC_FILE, compile_spec
+from transformers.azrael import main as azrael
+
+DATABASE_NAME = "ethereum-indexer"
+ADDRESS = "0x0000000000000000000000000000000000000001"
+RENTER = "0x00000000000000000000000000000000000000cc"
+AZRAEL_DIR = os.path.dirname(azrael.__file__)
+SPEC_PATH = os.path.join(AZRAEL_DIR, SPEC_FILE)
+# block of the rentings, after all of the lendings
+BLOCK_HEIGHT = 13_000_000
+
+Azrael = compile_spec(SPEC_PATH)
+
+
+def _word(value):
+    return format(value, "064x")
+
+
+def _log(signature, log_offset, topics, data):
+    return {
+        "sender_address": ADDRESS,
+        "tx_hash": "0xff",
+        "block_height": BLOCK_HEIGHT,
+        "log_offset": log_offset,
+        "raw_log_topics": [event_topic(signature), *topics],
+        "raw_log_data": "0x" + "".join(data),
+        "decoded": None,
+    }
+
+
+def _history():
+    """Lends, then rents, returns and stops some of the lendings."""
+
+    history = list(azrael_lendings(200, ADDRESS))
+    log_events = []
+
+    for lending_id in range(1, 60):
+        log_events.append(
+            _log(
+                "Rented(uint256,address,uint8,uint32)",
+                len(log_events),
+                ["0x" + RENTER[2:].rjust(64, "0")],
+                [_word(lending_id), _word(3), _word(1000 + lending_id)],
+            )
+        )
+        if lending_id % 2:
+            log_events.append(
+                _log(
+                    "Returned(uint256,uint32)",
+                    len(log_events),
+                    ["0x" + _word(lending_id)],
+                    [_word(2000)],
+                )
+            )
+        if lending_id % 3 == 0:
+            log_events.append(
+                _log(
+                    "LendingStopped(uint256,uint32)",
+                    len(log_events),
+                    ["0x" + _word(lending_id)],
+                    [_word(3000)],
+                )
+            )
+
+    history.append(
+        {"block_height": BLOCK_HEIGHT, "tx_hash": "0xff", "log_events": log_events}
+    )
+    return history
+
+
+def _collections(db):
+    return [
+        sorted(db.get_all_items(DATABASE_NAME, name), key=lambda doc: str(doc["_id"]))
+        for name in (f"{ADDRESS}-state", f"{ADDRESS}-state-lendings")
+    ]
+
+
+def test_compiled_spec_transforms_like_the_hand_written_transformer():
+    """The transformer compiled from azrael's spec writes the same state as azrael."""
+
+    history = _history()
+    transformed = []
+
+    for transformer_cls in (azrael.Transformer, Azrael):
+        db = MemoryDB()
+        transformer = transformer_cls(ADDRESS, db)
+        transformer.load_state()
+        transformer.entrypoint_batch(history)
+        transformer.flush()
+        transformed.append(_collections(db))
+
+    state, lendings = transformed[0]
+    assert len(state) == 200 + 59 + 30 + 19
+    assert sum(lending["status"] == azrael.RENTED for lending in lendings) == 20
+    assert transformed[1] == transformed[0]
+
+    # * so do the partitions of a parallel transform, once merged
+    db = MemoryDB()
+    transformer = Azrael(ADDRESS, db)
+    transformer.load_state()
+    transformer.merge_partitions(
+        [
+            Azrael(ADDRESS, MemoryDB()).transform_partition(partition)
+            for partition in transformer.partition(history, 3)
+        ]
+    )
+    transformer.flush()
+    assert _collections(db) == transformed[0]
+
+    document = state[0]
+    assert Azrael.events[document["event"]].from_dict(document).to_dict() == document
+
+
+def test_spec_fields_must_be_params_of_the_event(tmp_path):
+    """A field mapped from a param the event does not have fails the compile."""
+
+    with open(SPEC_PATH, "r", encoding="utf-8") as f:
+        spec = json.load(f)
+    spec["events"]["Rented"]["fields"]["rentedAt"] = "rentedAtt:int"
+
+    spec_path = tmp_path / SPEC_FILE
+    spec_path.write_text(json.dumps(spec))
+    shutil.copy(os.path.join(AZRAEL_DIR, "abi.json"), tmp_path)
+
+    with pytest.raises(ValueError, match="no param: rentedAtt"):
+        compile_spec(str(spec_path))
+
+
+def test_overloaded_events_are_named_by_signature(tmp_path):
+    """Events overloaded in the abi are told apart by their signatures."""
+
+    def event(*inputs):
+        return {
+            "type": "event",
+            "name": "Transfer",
+            "anonymous": False,
+            "inputs": [
+                {"name": name, "type": type_, "indexed": False}
+                for name, type_ in inputs
+            ],
+        }
+
+    abi = [
+        event(("from", "address"), ("to", "address"), ("value", "uint256")),
+        event(("to", "address"), ("value", "uint256")),
+    ]
+    transfer, mint = "Transfer(address,address,uint256)", "Transfer(address,uint256)"
+    spec = {
+        "name": "Token",
+        "events": {
+            transfer: {"fields": {"to": "to", "value": "value:int"}},
+            mint: {"fields": {"to": "to", "value": "value:int"}},
+        },
+        "views": {
+            "balances": {
+                "key": "to",
+                "updates": {
+                    transfer: {"set": ["value"]},
+                    mint: {"set": ["value"], "values": {"minted": True}},
+                },
+            }
+        },
+    }
+    (tmp_path / "abi.json").write_text(json.dumps(abi))
+    (tmp_path / SPEC_FILE).write_text(json.dumps(spec))
+
+    Token = compile_spec(str(tmp_path / SPEC_FILE))
+    assert set(Token.events) == {transfer, mint}
+
+    address = "0x" + RENTER[2:].rjust(64, "0")
+    log_events = [
+        _log(transfer, 0, [], [address[2:], address[2:], _word(5)]),
+        _log(mint, 1, [], [_word(7)[:24] + "dd" * 20, _word(9)]),
+    ]
+    db = MemoryDB()
+    transformer = Token(ADDRESS, db)
+    transformer.load_state()
+    transformer.entrypoint_batch(
+        [{"block_height": BLOCK_HEIGHT, "tx_hash": "0xff", "log_events": log_events}]
+    )
+    transformer.flush()
+
+    state = db.get_all_items(DATABASE_NAME, f"{ADDRESS}-state")
+    assert [(document["event"], document["value"]) for document in state] == [
+        (transfer, 5),
+        (mint, 9),
+    ]
+    for document in state:
+        assert Token.events[document["event"]].from_dict(document).to_dict() == document
+
+    balances = db.get_all_items(DATABASE_NAME, f"{ADDRESS}-state-balances")
+    assert {document["_id"]: document.get("minted") for document in balances} == {
+        RENTER: None,
+        "0x" + "dd" * 20: True,
+    }
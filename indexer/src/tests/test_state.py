@@ -0,0 +1,94 @@
+from pymongo import DeleteOne, ReplaceOne, UpdateOne
+
+from transform.state import StateDelta
+
+
+def test_inserts_and_updates_are_collapsed():
+    """Writes to the same document collapse into a single operation."""
+
+    delta = StateDelta()
+
+    delta.insert({"_id": "a"})
+    delta.inc(1, "0xb", 1.5)
+    delta.inc(1, "0xb", 2)
+    delta.set(1, "0xc", [1])
+    delta.set(2, "0xd", [2])
+
+    assert len(delta) == 3
+    assert delta.operations() == [
+        ReplaceOne({"_id": "a"}, {"_id": "a"}, upsert=True),
+        UpdateOne(
+            {"_id": 1}, {"$set": {"0xc": [1]}, "$inc": {"0xb": 3.5}}, upsert=True
+        ),
+        UpdateOne({"_id": 2}, {"$set": {"0xd": [2]}}, upsert=True),
+    ]
+
+
+def test_set_wins_over_pending_operators():
+    """A set replaces the $inc and $unset pending on its field."""
+
+    delta = StateDelta()
+
+    delta.inc(1, "0xb", 1)
+    delta.set(1, "0xb", 10)
+    delta.inc(1, "0xb", 5)
+    delta.set(1, "0xc", [1])
+    delta.unset(1, "0xc")
+
+    assert delta.operations() == [
+        UpdateOne({"_id": 1}, {"$set": {"0xb": 15}, "$unset": {"0xc": ""}}, upsert=True)
+    ]
+
+
+def test_update_is_a_set_and_an_unset_per_field():
+    """update sets and unsets every one of its fields."""
+
+    delta = StateDelta()
+
+    delta.inc(1, "0xb", 1)
+    delta.set(1, "0xc", 2)
+    delta.unset(1, "0xd")
+    delta.update(1, {"0xb": 10, "0xd": 4}, unset=("0xc",))
+
+    assert delta.operations() == [
+        UpdateOne(
+            {"_id": 1},
+            {"$set": {"0xb": 10, "0xd": 4}, "$unset": {"0xc": ""}},
+            upsert=True,
+        )
+    ]
+
+
+def test_set_values_are_read_on_flush():
+    """Set values are referenced, and read once the operations are built."""
+
+    delta = StateDelta()
+    ids = [1]
+
+    delta.set(1, "0xb", ids)
+    ids.append(2)
+
+    assert delta.operations() == [
+        UpdateOne({"_id": 1}, {"$set": {"0xb": [1, 2]}}, upsert=True)
+    ]
+
+    delta.clear()
+    assert len(delta) == 0
+    assert delta.operations() == []
+
+
+def test_write_after_delete_replaces_the_document():
+    """A write after a delete replaces the whole document."""
+
+    delta = StateDelta()
+
+    delta.set(1, "total", 1)
+    delta.delete(1)
+    delta.delete(2)
+    delta.inc(2, "total", 3)
+
+    assert len(delta) == 2
+    assert delta.operations() == [
+        DeleteOne({"_id": 1}),
+        ReplaceOne({"_id": 2}, {"_id": 2, "total": 3}, upsert=True),
+    ]
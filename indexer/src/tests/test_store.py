@@ -0,0 +1,134 @@
+from pymongo import ReplaceOne, UpdateOne
+
+from bench.fixtures import SYLVESTER_MIX, sylvester_lendings
+from bench.memory_db import MemoryDB
+from config import Config
+from transform.main import Transform
+from transform.state import StateDelta
+from transform.store import StateStore
+
+DATABASE_NAME = "ethereum-indexer"
+COLLECTION_NAME = "state"
+# sylvester's state collection, and the views of it that it keeps in stores
+STATE_SUFFIXES = ("", "-lendings", "-rentings")
+
+
+def _store(db, max_entries):
+    delta = StateDelta()
+    return StateStore(db, DATABASE_NAME, COLLECTION_NAME, delta, max_entries), delta
+
+
+def test_least_recently_used_documents_are_evicted_once_committed():
+    """The least recently used documents are evicted, dirty ones once committed."""
+
+    db = MemoryDB()
+    db.put_items(
+        [{"_id": ix, "total": ix} for ix in range(4)], DATABASE_NAME, COLLECTION_NAME
+    )
+    store, delta = _store(db, max_entries=2)
+
+    assert store.get(0) == {"_id": 0, "total": 0}
+    assert store.get(1) == {"_id": 1, "total": 1}
+    assert store.get(0) == {"_id": 0, "total": 0}
+    # * 1 is the least recently used
+    assert store.get(2) == {"_id": 2, "total": 2}
+    assert store.get(0) == {"_id": 0, "total": 0}
+    assert store.stats() == {"hits": 2, "misses": 3, "evictions": 1, "entries": 2}
+
+    # * dirty documents stay in memory until they are committed
+    store.inc(3, "total", 10)
+    store.set(4, "total", 4)
+    store.set(5, "total", 5)
+    assert store.stats() == {"hits": 2, "misses": 6, "evictions": 3, "entries": 3}
+    assert delta.operations() == [
+        UpdateOne({"_id": 3}, {"$inc": {"total": 10}}, upsert=True),
+        UpdateOne({"_id": 4}, {"$set": {"total": 4}}, upsert=True),
+        UpdateOne({"_id": 5}, {"$set": {"total": 5}}, upsert=True),
+    ]
+
+    db.bulk_write(delta.operations(), DATABASE_NAME, COLLECTION_NAME)
+    delta.clear()
+    store.commit()
+
+    assert store.stats() == {"hits": 2, "misses": 6, "evictions": 4, "entries": 2}
+    assert store.get(3) == {"_id": 3, "total": 13}
+    assert store.get(6) is None
+
+
+def test_clean_documents_behind_a_dirty_one_are_evicted():
+    """A dirty document does not keep the clean ones behind it in memory."""
+
+    db = MemoryDB()
+    db.put_items(
+        [{"_id": ix, "total": ix} for ix in range(10)], DATABASE_NAME, COLLECTION_NAME
+    )
+    store, _ = _store(db, max_entries=3)
+
+    # * the least recently used document is dirty
+    store.inc(0, "total", 1)
+    for ix in range(1, 10):
+        assert store.get(ix) == {"_id": ix, "total": ix}
+
+    assert store.stats() == {"hits": 0, "misses": 10, "evictions": 7, "entries": 3}
+    assert store.get(0) == {"_id": 0, "total": 1}
+    assert [store.get(ix) for ix in (8, 9)] == [
+        {"_id": 8, "total": 8},
+        {"_id": 9, "total": 9},
+    ]
+    assert store.stats()["misses"] == 10
+
+
+def test_inserted_documents_are_written_back_through_the_delta():
+    """Inserted documents are cached and written back through the delta."""
+
+    db = MemoryDB()
+    store, delta = _store(db, max_entries=1)
+
+    store.insert({"_id": "a", "total": 1})
+    store.insert({"_id": "b", "total": 2})
+
+    assert delta.operations() == [
+        ReplaceOne({"_id": "a"}, {"_id": "a", "total": 1}, upsert=True),
+        ReplaceOne({"_id": "b"}, {"_id": "b", "total": 2}, upsert=True),
+    ]
+    assert store.get("a") == {"_id": "a", "total": 1}
+    assert store.stats()["misses"] == 0
+
+
+def test_bounded_state_transforms_like_the_whole_state(monkeypatch):
+    """A store bounded below the size of the state transforms like an unbounded one."""
+
+    address = "0x0000000000000000000000000000000000000001"
+    config = Config(address, "store.log", "sylvester", 1)
+    history = list(sylvester_lendings(2_000, address, mix=SYLVESTER_MIX))
+    collection_names = [f"{address}-state{suffix}" for suffix in STATE_SUFFIXES]
+
+    def transform(max_entries):
+        monkeypatch.setattr("transform.store.STATE_CACHE_ENTRIES", max_entries)
+
+        db = MemoryDB()
+        db.put_items(history, DATABASE_NAME, address)
+        transform = Transform(config, checkpoint_every=10, snapshot_every=50, db=db)
+        transform.transform()
+
+        # pylint: disable=protected-access
+        stats = transform._transformer.get_store_stats()
+        # * restarts from the checkpoint, without reading the state
+        Transform(config, checkpoint_every=10, snapshot_every=50, db=db).transform()
+
+        state = [
+            sorted(
+                db.get_all_items(DATABASE_NAME, collection_name),
+                key=lambda document: document["_id"],
+            )
+            for collection_name in collection_names
+        ]
+        return state, stats
+
+    bounded, stats = transform(100)
+    unbounded, _ = transform(len(history) * 2)
+
+    # * in each of the lendings and the rentings stores
+    assert stats["entries"] <= 2 * 100
+    assert stats["evictions"] > 0
+    assert bounded == unbounded
@@ -0,0 +1,88 @@
+from bench.fixtures import auction_bids
+from bench.memory_db import MemoryDB
+from config import Config
+from transform.main import RAW_TRANSACTION_PROJECTION, Transform
+
+DATABASE_NAME = "ethereum-indexer"
+ADDRESS = Config.rkl_club_auction().get_address()
+
+
+class StreamingDB(MemoryDB):
+    """Only lets the raw transactions be read through a cursor."""
+
+    def __init__(self):
+        super().__init__()
+        self.cursors = []
+
+    def get_all_items(self, database_name, collection_name, options=None):
+        """Fails on a read of all of the raw transactions at once."""
+        assert collection_name != ADDRESS, "raw transactions read all at once"
+        return super().get_all_items(database_name, collection_name, options)
+
+    def iter_items(self, database_name, collection_name, options=None):
+        """Records the options of every cursor over the raw transactions."""
+        if collection_name == ADDRESS:
+            self.cursors.append(options)
+        return super().iter_items(database_name, collection_name, options)
+
+
+class RecordingTransform(Transform):
+    def __init__(self, *args, **kwargs):
+        # block height of every transaction passed to the transformer, in order
+        self.handed = []
+        # (block height, transactions passed to the transformer before it)
+        self.checkpoints = []
+        super().__init__(*args, **kwargs)
+
+    def _checkpoint(self, block_height):
+        self.checkpoints.append((block_height, len(self.handed)))
+        super()._checkpoint(block_height)
+
+
+def test_raw_transactions_are_streamed_in_batches_and_checkpointed_per_block():
+    """Raw transactions are read through one cursor and checkpointed per block."""
+
+    history = list(auction_bids(1_000, ADDRESS))
+    db = StreamingDB()
+    db.put_items(history, DATABASE_NAME, ADDRESS)
+
+    transform = RecordingTransform(
+        Config.rkl_club_auction(),
+        batch_size=50,
+        checkpoint_every=10,
+        snapshot_every=0,
+        db=db,
+    )
+    # pylint: disable=protected-access
+    entrypoint_batch = transform._transformer.entrypoint_batch
+    batch_sizes = []
+
+    def record(txns):
+        batch_sizes.append(len(txns))
+        transform.handed += [txn["block_height"] for txn in txns]
+        entrypoint_batch(txns)
+
+    transform._transformer.entrypoint_batch = record
+    transform.transform()
+
+    assert len(db.cursors) == 1
+    cursor = db.cursors[0]
+    assert cursor["batch_size"] == 50
+    assert cursor["projection"] == RAW_TRANSACTION_PROJECTION
+
+    assert transform.handed == [txn["block_height"] for txn in history]
+    assert max(batch_sizes) <= 50
+
+    # * every checkpoint is on a block boundary, once all of the transactions
+    # * of the blocks up to it were passed to the transformer
+    block_heights = [block_height for block_height, _ in transform.checkpoints]
+    for block_height, handed in transform.checkpoints:
+        assert handed == sum(txn["block_height"] <= block_height for txn in history)
+    for previous, block_height in zip(block_heights, block_heights[1:-1]):
+        assert block_height - previous >= 10
+
+    assert block_heights[-1] == history[-1]["block_height"]
+    assert db.get_any_item(DATABASE_NAME, f"{ADDRESS}-block-height-state") == {
+        "_id": 1,
+        "block_height": block_heights[-1],
+    }
@@ -0,0 +1,67 @@
+import queue
+
+import pytest
+
+from bench.fixtures import FIRST_BLOCK, auction_bids
+from bench.memory_db import MemoryDB
+from config import Config
+from transform.tail import TailTransform
+
+DATABASE_NAME = "ethereum-indexer"
+ADDRESS = Config.rkl_club_auction().get_address()
+
+
+class RawReadsDB(MemoryDB):
+    """Counts the reads of the raw transactions."""
+
+    def __init__(self):
+        super().__init__()
+        self.raw_reads = 0
+
+    def iter_items(self, database_name, collection_name, options=None):
+        """Counts the reads of the raw transactions."""
+        if collection_name == ADDRESS:
+            self.raw_reads += 1
+
+        return super().iter_items(database_name, collection_name, options)
+
+
+def _between(history, after_block, up_to_block):
+    return [txn for txn in history if after_block < txn["block_height"] <= up_to_block]
+
+
+def test_tail_transform_only_reads_what_was_extracted_before_the_handoffs(
+    auction_state, transform_auction
+):
+    """Handed off transactions are transformed without reading them from the db."""
+
+    # 250 blocks of bids
+    history = list(auction_bids(1_000, ADDRESS))
+    blocks = [FIRST_BLOCK - 1, FIRST_BLOCK + 100, FIRST_BLOCK + 200, FIRST_BLOCK + 260]
+
+    db = RawReadsDB()
+    db.put_items(_between(history, blocks[0], blocks[1]), DATABASE_NAME, ADDRESS)
+
+    handoff: queue.Queue = queue.Queue()
+    transform = TailTransform(
+        Config.rkl_club_auction(), handoff, checkpoint_every=10, snapshot_every=0, db=db
+    )
+
+    for after_block, up_to_block in zip(blocks[1:], blocks[2:]):
+        handoff.put(
+            (after_block, up_to_block, _between(history, after_block, up_to_block))
+        )
+        transform.transform()
+
+    # * the history before the first handoff is read once, the handoffs never
+    assert db.raw_reads == 1
+    assert db.get_any_item(DATABASE_NAME, f"{ADDRESS}-block-height-state") == {
+        "_id": 1,
+        "block_height": blocks[-1],
+    }
+
+    fresh = MemoryDB()
+    fresh.put_items(history, DATABASE_NAME, ADDRESS)
+    transform_auction(fresh)
+
+    assert auction_state(db) == pytest.approx(auction_state(fresh))
@@ -0,0 +1,88 @@
+from bench.memory_db import MemoryDB
+from transform.abi import event_topic
+from transform.transformer import BaseTransformer, handles
+from transformers.example_rumble_kong_league import main as kong
+
+ADDRESS = "0xAbC0000000000000000000000000000000000001"
+TRANSFER = "Transfer(address,address,uint256)"
+
+
+class Transformer(BaseTransformer):
+    def __init__(self, address, db=None):
+        super().__init__(address, db)
+        self.handled = []
+
+    def load_state(self):
+        """Starts from an empty state."""
+
+    @handles(TRANSFER)
+    def _on_transfer(self, event, decoded_params):
+        self.handled.append((event["log_offset"], decoded_params))
+
+
+def log_event(log_offset, sender_address=ADDRESS.lower(), topic=event_topic(TRANSFER)):
+    """Returns a Transfer log of the address, as covalent stores it."""
+
+    return {
+        "log_offset": log_offset,
+        "sender_address": sender_address,
+        "raw_log_topics": [topic],
+        "decoded": {
+            "name": "Transfer",
+            "params": [
+                {"decoded": True, "value": "0xa"},
+                {"decoded": True, "value": "0xb"},
+                {"decoded": True, "value": str(log_offset)},
+            ],
+        },
+    }
+
+
+def test_event_topic():
+    """topic0 is the keccak of the event signature."""
+
+    assert (
+        event_topic(TRANSFER)
+        == "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+    )
+
+
+def test_logs_are_dispatched_by_topic_in_log_order():
+    """Logs reach the handler of their topic, in log order, and others are skipped."""
+
+    transformer = Transformer(ADDRESS, MemoryDB())
+
+    transformer.entrypoint(
+        {
+            "block_height": 1,
+            "log_events": [
+                log_event(2),
+                log_event(1, sender_address="0xother"),
+                log_event(0),
+                log_event(3, topic=event_topic("Approval(address,address,uint256)")),
+            ],
+        }
+    )
+
+    assert transformer.handled == [(0, ["0xa", "0xb", "0"]), (2, ["0xa", "0xb", "2"])]
+    assert transformer.get_profile()["_on_transfer"][0] == 2
+
+
+def test_kong_holders_document_is_migrated_to_a_document_per_kong():
+    """The old single holders document is deleted once its kongs are moved."""
+
+    db = MemoryDB()
+    db.put_item(
+        {"_id": 1, "0xaa": ["2", "3"], "0xbb": ["4"]}, "ethereum-indexer", "kongs"
+    )
+    transformer = kong.Transformer("0x01", db, "kongs")
+    transformer.load_state()
+    transformer.flush()
+
+    assert sorted(
+        db.get_all_items("ethereum-indexer", "kongs"), key=lambda doc: doc["_id"]
+    ) == [
+        {"_id": 2, "owner": "0xaa"},
+        {"_id": 3, "owner": "0xaa"},
+        {"_id": 4, "owner": "0xbb"},
+    ]
@@ -0,0 +1,386 @@
+"""
+Decodes event logs locally, out of the contract ABI, such that the transformers
+do not depend on covalent's "decoded" field. Covalent leaves that field empty
+for contracts it does not know (e.g. on kovan) and only partially decodes some
+params, which used to either skip the log or raise.
+
+A decoder is compiled once per event signature: every param is bound to the
+32 byte word it lives in (a topic for indexed params, a slot of the data
+otherwise) and to a converter of that word. Decoding a log is then a walk over
+that plan, straight off the hexstrings that covalent supplies.
+
+Many logs of the same event are decoded in one go by the batch decoder. It
+unhexes all of their words at once into a (logs, words, 32) byte array and
+converts every param column by column with numpy.
+"""
+
+import json
+import re
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from eth_abi import decode_abi
+from eth_utils import keccak
+
+# (type, indexed) of every param, in ABI order
+Inputs = Tuple[Tuple[str, bool], ...]
+# decodes the raw_log_topics and raw_log_data of a log
+Decoder = Callable[[Sequence[str], Optional[str]], List[Any]]
+# decodes the raw_log_topics and raw_log_data of many logs of the same event
+BatchDecoder = Callable[
+    [Sequence[Sequence[str]], Sequence[Optional[str]]], List[List[Any]]
+]
+# converts a (logs, 32) byte array of words into the values of a param
+ColumnConverter = Callable[[np.ndarray], List[Any]]
+
+# 64 hex characters
+WORD = 64
+TWO_TO_255 = 2**255
+TWO_TO_256 = 2**256
+
+STATIC_TYPE = re.compile(r"^(address|bool|u?int\d*|bytes\d+)$")
+
+
+def _uint(word: str) -> int:
+    return int(word, 16)
+
+
+def _int(word: str) -> int:
+    value = int(word, 16)
+    return value - TWO_TO_256 if value >= TWO_TO_255 else value
+
+
+def _bool(word: str) -> bool:
+    return int(word, 16) != 0
+
+
+def _address(word: str) -> str:
+    return "0x" + word[-40:].lower()
+
+
+def _converter(type_: str, prefixed: bool = False) -> Callable[[str], Any]:
+    """
+    Args:
+        type_ (str): static ABI type
+        prefixed (bool, optional): whether the words start with 0x, as topics
+        do. Defaults to False.
+
+    Returns:
+        Callable[[str], Any]: converts a hex word into the value of the type
+    """
+    # * int() and the right aligned types do not mind the 0x prefix
+    if type_ == "address":
+        return _address
+    if type_ == "bool":
+        return _bool
+    if type_.startswith("uint"):
+        return _uint
+    if type_.startswith("int"):
+        return _int
+
+    # bytes1 ... bytes32 are left aligned
+    start = 2 if prefixed else 0
+    end = start + int(type_[len("bytes") :]) * 2
+    return lambda word: bytes.fromhex(word[start:end])
+
+
+def _topic_converter(type_: str) -> Callable[[str], Any]:
+    if STATIC_TYPE.match(type_):
+        return _converter(type_, prefixed=True)
+
+    # * indexed params of dynamic types are stored as their keccak
+    return str
+
+
+def event_signature(abi: Dict[str, Any]) -> str:
+    """
+    Args:
+        abi (Dict[str, Any]): ABI entry of the event
+
+    Returns:
+        str: canonical signature of the event, e.g. "Transfer(address,address,uint256)"
+    """
+    types = ",".join(param["type"] for param in abi["inputs"])
+    return f'{abi["name"]}({types})'
+
+
+def event_topic(signature: str) -> str:
+    """
+    Args:
+        signature (str): canonical event signature, e.g. "Transfer(address,address,uint256)"
+
+    Returns:
+        str: topic0 of the event, as covalent supplies it in raw_log_topics
+    """
+    return "0x" + keccak(text=signature).hex()
+
+
+@lru_cache(maxsize=None)
+def compile_decoder(inputs: Inputs) -> Decoder:
+    """
+    Compiles the decoder of an event with the given params. Decoders are cached
+    per params, so events sharing a signature share a decoder.
+
+    Args:
+        inputs (Inputs): (type, indexed) of every param, in ABI order
+
+    Returns:
+        Decoder: decodes the raw_log_topics and raw_log_data of a log into the
+        values of the params, in ABI order
+    """
+
+    n_topics = 1 + sum(indexed for _, indexed in inputs)
+    data_types = [type_ for type_, indexed in inputs if not indexed]
+
+    # * dynamic data is rare in the events of interest, it is left to eth_abi
+    if not all(STATIC_TYPE.match(type_) for type_ in data_types):
+        return _compile_dynamic_decoder(inputs, n_topics, data_types)
+
+    # (whether the word is a topic, position of the word, converter)
+    plan: List[Tuple[bool, int, Callable[[str], Any]]] = []
+    topic, slot = 1, 0
+    for type_, indexed in inputs:
+        if indexed:
+            plan.append((True, topic, _topic_converter(type_)))
+            topic += 1
+        else:
+            start = 2 + slot * WORD
+            plan.append((False, start, _converter(type_)))
+            slot += 1
+
+    data_length = 2 + slot * WORD
+
+    def decode(raw_log_topics: Sequence[str], raw_log_data: Optional[str]) -> List[Any]:
+        if len(raw_log_topics) != n_topics:
+            raise ValueError(f"Expected {n_topics} topics, got: {raw_log_topics}")
+
+        data = raw_log_data or "0x"
+        if len(data) < data_length:
+            raise ValueError(f"Expected {slot} data words, got: {data}")
+
+        return [
+            convert(raw_log_topics[at]) if is_topic else convert(data[at : at + WORD])
+            for is_topic, at, convert in plan
+        ]
+
+    return decode
+
+
+def _compile_dynamic_decoder(
+    inputs: Inputs, n_topics: int, data_types: List[str]
+) -> Decoder:
+    topic_converters = [_topic_converter(type_) for type_, indexed in inputs if indexed]
+
+    def decode(raw_log_topics: Sequence[str], raw_log_data: Optional[str]) -> List[Any]:
+        if len(raw_log_topics) != n_topics:
+            raise ValueError(f"Expected {n_topics} topics, got: {raw_log_topics}")
+
+        topics = iter(
+            convert(topic)
+            for convert, topic in zip(topic_converters, raw_log_topics[1:])
+        )
+        data = iter(decode_abi(data_types, bytes.fromhex((raw_log_data or "0x")[2:])))
+
+        return [next(topics) if indexed else next(data) for _, indexed in inputs]
+
+    return decode
+
+
+def _uint_column(words: np.ndarray) -> List[int]:
+    # * the values of types up to uint64 fit into the last 8 bytes
+    if not words[:, :24].any():
+        return np.ascontiguousarray(words[:, 24:]).view(">u8").ravel().tolist()
+
+    buffer = words.tobytes()
+    return [
+        int.from_bytes(buffer[i : i + 32], "big") for i in range(0, len(buffer), 32)
+    ]
+
+
+def _int_column(words: np.ndarray) -> List[int]:
+    # * negative values are sign extended, so int64 holds them if every
+    # * byte above the last 8 repeats the sign
+    sign = np.where(words[:, 24:25] >= 0x80, 0xFF, 0).astype(np.uint8)
+    if (words[:, :24] == sign).all():
+        return np.ascontiguousarray(words[:, 24:]).view(">i8").ravel().tolist()
+
+    buffer = words.tobytes()
+    return [
+        int.from_bytes(buffer[i : i + 32], "big", signed=True)
+        for i in range(0, len(buffer), 32)
+    ]
+
+
+def _bool_column(words: np.ndarray) -> List[bool]:
+    return words.any(axis=1).tolist()
+
+
+def _address_column(words: np.ndarray) -> List[str]:
+    hexes = words[:, 12:].tobytes().hex()
+    return ["0x" + hexes[i : i + 40] for i in range(0, len(hexes), 40)]
+
+
+def _column_converter(type_: str) -> ColumnConverter:
+    if type_ == "address":
+        return _address_column
+    if type_ == "bool":
+        return _bool_column
+    if type_.startswith("uint"):
+        return _uint_column
+    if type_.startswith("int"):
+        return _int_column
+
+    size = int(type_[len("bytes") :])
+
+    def _bytes_column(words: np.ndarray) -> List[bytes]:
+        buffer = np.ascontiguousarray(words[:, :size]).tobytes()
+        return [buffer[i : i + size] for i in range(0, len(buffer), size)]
+
+    return _bytes_column
+
+
+def _unhex_words(hexes: str, n_logs: int, n_words: int) -> np.ndarray:
+    return np.frombuffer(bytes.fromhex(hexes), dtype=np.uint8).reshape(
+        n_logs, n_words, 32
+    )
+
+
+@lru_cache(maxsize=None)
+def compile_batch_decoder(inputs: Inputs) -> BatchDecoder:
+    """
+    Compiles the batch decoder of an event with the given params. It decodes
+    to the exact same values as the decoder of compile_decoder.
+
+    Args:
+        inputs (Inputs): (type, indexed) of every param, in ABI order
+
+    Returns:
+        BatchDecoder: decodes the raw_log_topics and raw_log_data of many logs
+        into one list of param values per log
+    """
+
+    decode = compile_decoder(inputs)
+
+    n_topics = 1 + sum(indexed for _, indexed in inputs)
+    n_slots = sum(not indexed for _, indexed in inputs)
+    data_length = 2 + n_slots * WORD
+
+    # * dynamic params do not fit into the columns
+    if not all(STATIC_TYPE.match(type_) for type_, _ in inputs):
+
+        def decode_batch_dynamic(
+            raw_log_topics: Sequence[Sequence[str]],
+            raw_log_data: Sequence[Optional[str]],
+        ) -> List[List[Any]]:
+            return list(map(decode, raw_log_topics, raw_log_data))
+
+        return decode_batch_dynamic
+
+    # (whether the word is a topic, position of the word, converter)
+    plan: List[Tuple[bool, int, ColumnConverter]] = []
+    topic, slot = 0, 0
+    for type_, indexed in inputs:
+        if indexed:
+            plan.append((True, topic, _column_converter(type_)))
+            topic += 1
+        else:
+            plan.append((False, slot, _column_converter(type_)))
+            slot += 1
+
+    def decode_batch(
+        raw_log_topics: Sequence[Sequence[str]], raw_log_data: Sequence[Optional[str]]
+    ) -> List[List[Any]]:
+        n_logs = len(raw_log_topics)
+        if n_logs == 0:
+            return []
+
+        if any(len(topics) != n_topics for topics in raw_log_topics):
+            raise ValueError(f"Expected {n_topics} topics in every log")
+
+        topic_words = _unhex_words(
+            "".join(topic[2:] for topics in raw_log_topics for topic in topics[1:]),
+            n_logs,
+            n_topics - 1,
+        )
+
+        data = [data or "0x" for data in raw_log_data]
+        if any(len(data_) < data_length for data_ in data):
+            raise ValueError(f"Expected {n_slots} data words in every log")
+
+        data_words = _unhex_words(
+            "".join(data_[2:data_length] for data_ in data), n_logs, n_slots
+        )
+
+        columns = [
+            convert(topic_words[:, at] if is_topic else data_words[:, at])
+            for is_topic, at, convert in plan
+        ]
+
+        return list(map(list, zip(*columns)))
+
+    return decode_batch
+
+
+class EventDecoder:
+    """Decodes the logs of a single event of a contract ABI."""
+
+    __slots__ = ("name", "signature", "topic", "params", "decode", "decode_batch")
+
+    def __init__(self, abi: Dict[str, Any]):
+        self.name: str = abi["name"]
+        self.signature = event_signature(abi)
+        self.topic = event_topic(self.signature)
+        # (name, indexed) of every param, in ABI order
+        self.params: List[Tuple[str, bool]] = [
+            (param["name"], param.get("indexed", False)) for param in abi["inputs"]
+        ]
+        inputs = tuple(
+            (param["type"], param.get("indexed", False)) for param in abi["inputs"]
+        )
+        self.decode: Decoder = compile_decoder(inputs)
+        self.decode_batch: BatchDecoder = compile_batch_decoder(inputs)
+
+    def word_of(self, param: str) -> Callable[[Sequence[str], Optional[str]], str]:
+        """
+        Args:
+            param (str): name of a static param of the event
+
+        Raises:
+            ValueError: if the event has no such param
+
+        Returns:
+            Callable[[Sequence[str], Optional[str]], str]: reads the raw hex word
+            of the param out of the raw_log_topics and raw_log_data of a log,
+            without decoding the rest of the log
+        """
+        names = [name for name, _ in self.params]
+        if param not in names:
+            raise ValueError(f"{self.signature} has no param: {param}")
+
+        position = names.index(param)
+        if self.params[position][1]:
+            topic = 1 + sum(indexed for _, indexed in self.params[:position])
+            return lambda raw_log_topics, _: raw_log_topics[topic]
+
+        start = 2 + WORD * sum(not indexed for _, indexed in self.params[:position])
+        return lambda _, raw_log_data: raw_log_data[start : start + WORD]
+
+
+def load_abi(path: str) -> Dict[str, EventDecoder]:
+    """
+    Reads the events out of a contract ABI json file.
+
+    Args:
+        path (str): path to the ABI json file
+
+    Returns:
+        Dict[str, EventDecoder]: topic0 -> decoder of the event
+    """
+
+    with open(path, "r", encoding="utf-8") as f:
+        abi = json.load(f)
+
+    decoders = [EventDecoder(entry) for entry in abi if entry.get("type") == "event"]
+
+    return {decoder.topic: decoder for decoder in decoders}
@@ -0,0 +1,234 @@
+"""
+Transforms the raw transactions of one address with several transformers, e.g.
+an events log and a current holders view of the same contract, reading and
+parsing every raw transaction only once.
+
+Every transformer is a Transform of its own, with its own state, checkpoint
+and snapshots. The transformer of the config keeps the collections that the
+server reads, {address}-state and so on, the others are namespaced by their
+name: {address}-{name}-state. The raw
+transactions are read from the oldest checkpoint on, in whole blocks, and put
+on a bounded queue per transformer, each of which is drained by a thread of
+its own. The read goes as fast as the fastest transformer. A transformer that
+is a whole queue behind a transformer that is waiting on the read is detached
+from it: it finishes what it was handed, and then catches up by reading the
+raw transactions after its own checkpoint.
+"""
+
+import logging
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional
+
+from config import Config
+from db import DB
+from interfaces.idb import IDB
+from interfaces.itransform import ITransform
+
+from transform.main import (
+    CHECKPOINT_EVERY_BLOCKS,
+    READ_BATCH_SIZE,
+    SLEEP_TIMER,
+    SNAPSHOT_EVERY_BLOCKS,
+    Transform,
+)
+
+# number of batches of raw transactions that a transformer can be behind the
+# fastest transformer, before it is detached from the shared read
+FAN_OUT_QUEUE_SIZE = 8
+# how often the read and the transformers check on each other when waiting
+POLL_SECONDS = 0.01
+
+
+class _Member:
+    """A transformer of the fan out, and the batches handed to it."""
+
+    __slots__ = ("name", "transform", "batches", "detached", "after_block")
+
+    def __init__(self, name: str, transform: Transform, queue_size: int):
+        self.name = name
+        self.transform = transform
+        self.batches: "queue.Queue[Optional[List[Dict]]]" = queue.Queue(queue_size)
+        self.detached = False
+        # * transactions up to this block were transformed before the read
+        self.after_block = 0
+
+
+class FanOutTransform(ITransform):
+    """@inheritdoc ITransform"""
+
+    def __init__(
+        self,
+        config: Config,
+        transformer_names: List[str],
+        batch_size: int = READ_BATCH_SIZE,
+        checkpoint_every: int = CHECKPOINT_EVERY_BLOCKS,
+        db: Optional[IDB] = None,
+        snapshot_every: int = SNAPSHOT_EVERY_BLOCKS,
+        queue_size: int = FAN_OUT_QUEUE_SIZE,
+    ):
+        if len(set(transformer_names)) != len(transformer_names):
+            raise ValueError(f"Transformers are not unique: {transformer_names}")
+
+        self._batch_size = batch_size
+
+        # * shared by all of the transformers
+        db = DB() if db is None else db
+
+        self._members = [
+            _Member(
+                name,
+                Transform(
+                    Config(
+                        config.get_address(),
+                        config.get_log_filename(),
+                        name,
+                        config.get_network_id(),
+                    ),
+                    batch_size,
+                    checkpoint_every,
+                    db,
+                    snapshot_every,
+                    namespace=(None if name == config.get_transformer_name() else name),
+                ),
+                queue_size,
+            )
+            for name in transformer_names
+        ]
+
+    def _read_blocks(self, after_block: int) -> Iterator[List[Dict]]:
+        """
+        Yields the raw transactions after after_block in batches of whole blocks,
+        of at least batch_size transactions, except for the last one.
+        """
+
+        raw_transactions = self._members[0].transform.read_raw_transactions(after_block)
+
+        batch: List[Dict] = []
+
+        for txn in raw_transactions:
+            if len(batch) >= self._batch_size and (
+                txn["block_height"] != batch[-1]["block_height"]
+            ):
+                yield batch
+                batch = []
+
+            batch.append(txn)
+
+        if batch:
+            yield batch
+
+    @staticmethod
+    def _handed_off(member: _Member) -> Iterator[Dict]:
+        """
+        Yields the transactions handed to the member, until the read is over or
+        the member is detached and has run out of batches.
+        """
+
+        while True:
+            try:
+                batch = member.batches.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                if member.detached:
+                    return
+                continue
+
+            if batch is None:
+                return
+
+            for txn in batch:
+                if txn["block_height"] > member.after_block:
+                    yield txn
+
+    @staticmethod
+    def _run(member: _Member) -> None:
+        transform = member.transform
+
+        try:
+            # * batches hold whole blocks, so the last one is complete
+            transform.transform_transactions(FanOutTransform._handed_off(member))
+        except Exception:
+            # * nothing is handed to a failed member anymore
+            member.detached = True
+            raise
+
+        if member.detached:
+            logging.info(f"{member.name} catching up on its own")
+            transform.transform()
+
+    @staticmethod
+    def _offer(member: _Member, batch: List[Dict]) -> bool:
+        try:
+            member.batches.put_nowait(batch)
+        except queue.Full:
+            return False
+        return True
+
+    def _fan_out(self, batch: List[Dict]) -> None:
+        pending = [
+            member
+            for member in self._members
+            if not member.detached and batch[-1]["block_height"] > member.after_block
+        ]
+
+        while True:
+            pending = [member for member in pending if not self._offer(member, batch)]
+            if not pending:
+                return
+
+            # * a member that ran out of batches is a whole queue ahead of the
+            # * ones that have no room for this batch
+            if any(
+                member.batches.empty()
+                for member in self._members
+                if not member.detached and member not in pending
+            ):
+                for member in pending:
+                    logging.warning(f"{member.name} fell behind, detaching it")
+                    member.detached = True
+                return
+
+            # * everyone is busy, the read waits on the fastest
+            time.sleep(POLL_SECONDS)
+
+    @staticmethod
+    def _end(member: _Member) -> None:
+        # * the read is over, so this waits for the member to make room
+        while not member.detached:
+            try:
+                member.batches.put(None, timeout=POLL_SECONDS)
+                return
+            except queue.Full:
+                continue
+
+    def transform(self) -> None:
+        """@inheritdoc ITransform"""
+
+        for member in self._members:
+            member.after_block = member.transform.get_block_height()
+            member.detached = False
+
+        after_block = min(member.after_block for member in self._members)
+
+        with ThreadPoolExecutor(max_workers=len(self._members)) as pool:
+            runs = [pool.submit(self._run, member) for member in self._members]
+
+            try:
+                for batch in self._read_blocks(after_block):
+                    self._fan_out(batch)
+            finally:
+                for member in self._members:
+                    self._end(member)
+
+            for run in runs:
+                run.result()
+
+    def flush(self) -> None:
+        """@inheritdoc ITransform"""
+
+        for member in self._members:
+            member.transform.flush_state()
+
+        logging.info("Transformer sleeping...")
+        time.sleep(SLEEP_TIMER)
@@ -1,21 +1,76 @@
 import importlib
 import logging
 import time
-from typing import List
+from itertools import groupby
+from operator import itemgetter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pymongo import ReplaceOne
 
 from config import Config
 from db import DB
+from interfaces.idb import IDB
 from interfaces.itransform import ITransform
+from interfaces.itransformer import ITransformer
+
+from transform.reload import ModuleWatcher
+from transform.snapshot import SnapshotStore
 
 SLEEP_TIMER = 10
+# when watching the raw transactions, a burst of inserts is over once there
+# were none for this long
+WATCH_DEBOUNCE_SECONDS = 0.5
+# number of raw transactions pulled from the db per round trip, which is
+# also the number of raw transactions passed to the transformer at once
+READ_BATCH_SIZE = 500
+# transformed state and block height are persisted every this many blocks
+CHECKPOINT_EVERY_BLOCKS = 1000
+# the state is snapshotted on the first checkpoint this many blocks after the
+# previous snapshot. 0 turns snapshots off
+SNAPSHOT_EVERY_BLOCKS = 10_000
+# the only raw transaction fields that the transformers make use of
+RAW_TRANSACTION_PROJECTION = {
+    "block_height": 1,
+    "tx_offset": 1,
+    "tx_hash": 1,
+    "log_events": 1,
+    "sender_logs": 1,
+}
+# the only log fields that the handlers make use of, in aggregate mode. The
+# transaction fields of a log are filled in from its transaction
+LOG_EVENT_PROJECTION = {
+    "log_events.sender_address": 1,
+    "log_events.log_offset": 1,
+    "log_events.raw_log_topics": 1,
+    "log_events.raw_log_data": 1,
+}
 
 
 class Transform(ITransform):
     """@inheritdoc ITransform"""
-    
-    def __init__(self, config: Config):
+
+    def __init__(
+        self,
+        config: Config,
+        batch_size: int = READ_BATCH_SIZE,
+        checkpoint_every: int = CHECKPOINT_EVERY_BLOCKS,
+        db: Optional[IDB] = None,
+        snapshot_every: int = SNAPSHOT_EVERY_BLOCKS,
+        watch: bool = False,
+        namespace: Optional[str] = None,
+        reload: bool = False,
+        aggregate: bool = False,
+    ):
         self._config = config
 
+        self._batch_size = batch_size
+        self._checkpoint_every = checkpoint_every
+        self._snapshot_every = snapshot_every
+        # * wake up on new raw transactions rather than every SLEEP_TIMER
+        self._watch = watch
+        # * read only the handled logs, unwound and filtered inside the db
+        self._aggregate = aggregate
+
         # * name of the module that will perform transforming
         self._to_transform = self._config.get_transformer_name()
 
@@ -24,30 +79,53 @@ class Transform(ITransform):
         # todo: validate that the name of the events is lower cased event name
         # from the scraped transactions
 
+        # * collections are named {address}-{namespace}-..., such that more
+        # * than one transformer can transform the same address
+        self._collection_prefix = self._config.get_address()
+        if namespace is not None:
+            self._collection_prefix += f"-{namespace}"
+
         # block number up to which the extraction has happened
         self._block_height: int = 0
+        # block number that the latest snapshot covers
+        self._snapshot_block_height: int = 0
+
+        self._db_name = "ethereum-indexer"
+
+        # * to read the raw transactions from the database
+        self._db = DB() if db is None else db
+
+        self._snapshots = SnapshotStore(
+            self._db,
+            self._db_name,
+            self._get_snapshot_collection_name(),
+            self._to_transform,
+        )
 
         full_module_name = f"transformers.{self._to_transform}.main"
         transformer_module = importlib.import_module(full_module_name)
+        # * reloads the transformer on a checkpoint, once its files changed
+        self._watcher = ModuleWatcher(transformer_module) if reload else None
 
         # this implies that every transformer will take the address it transforms
-        # as a constructor argument
-        self._transformer = transformer_module.Transformer(self._config.get_address())
-
-        self._db_name = "ethereum-indexer"
-
-        # * to read the raw transactions from the database
-        self._db = DB()
+        # and the name of the collection to keep its state in as constructor
+        # arguments
+        self._transformer: ITransformer = transformer_module.Transformer(
+            self._config.get_address(), self._db, self._get_state_collection_name()
+        )
+        # * the state is loaded exactly once, from here on the transformer
+        # * keeps it in memory and only writes it back on flush
+        self._load_state()
 
     def __setattr__(self, key, value):
         # https://towardsdatascience.com/how-to-create-read-only-and-deletion-proof-attributes-in-your-python-classes-b34cd1019c2d
 
+        # * the transformer is swapped out by _reload
         forbid_reset_on = [
             "_to_transform",
             "_config",
             "_db_name",
             "_db",
-            "_transformer",
         ]
         for k in forbid_reset_on:
             if key == k and hasattr(self, k):
@@ -60,7 +138,19 @@ class Transform(ITransform):
 
     def _get_state_collection_name(self) -> str:
         # !: will be more than one address later
-        return f"{self._config.get_address()}-state"
+        return f"{self._collection_prefix}-state"
+
+    def _get_collection_names(self) -> List[str]:
+        """
+        Returns:
+            List[str]: names of all of the collections of the transformed state,
+            the state collection first
+        """
+
+        try:
+            return self._transformer.get_collection_names()
+        except NotImplementedError:
+            return [self._get_state_collection_name()]
 
     def _get_events_of_interest(self) -> List[str]:
         return self._get_events_from_config()
@@ -69,7 +159,10 @@ class Transform(ITransform):
         return self._config["events"]
 
     def _get_block_height_collection_name(self) -> str:
-        return f"{self._config.get_address()}-block-height-state"
+        return f"{self._collection_prefix}-block-height-state"
+
+    def _get_snapshot_collection_name(self) -> str:
+        return f"{self._collection_prefix}-snapshots"
 
     def _determine_block_height(self) -> None:
         """
@@ -87,6 +180,10 @@ class Transform(ITransform):
 
         self._block_height = block_height_item["block_height"]
 
+    def _block_height_item(self, block_height: int) -> Dict:
+        # _id: 1, because we are only ever storing single block_height value per address
+        return {"_id": 1, "block_height": block_height}
+
     # todo: func docs
     def _update_block_height(self, new_block_height: int) -> None:
         """
@@ -96,27 +193,430 @@ class Transform(ITransform):
         """
 
         collection_name = self._get_block_height_collection_name()
-        # _id: 1, because we are only ever storing single block_height value per address
-        item = {"_id": 1, "block_height": new_block_height}
+        item = self._block_height_item(new_block_height)
         self._db.put_item(item, self._db_name, collection_name)
 
+    def _checkpoint(self, block_height: int) -> None:
+        """
+        Persists the transformed state and the block height up to which it was
+        transformed, as a single unit. A restart then resumes right after the
+        block height, without any of its writes missing or being applied twice.
+        Only call this on a block boundary, i.e. once all of the transactions of
+        block_height were passed to the transformer.
+
+        Args:
+            block_height (int): last fully transformed block
+        """
+
+        try:
+            writes = self._transformer.pending_writes()
+        except NotImplementedError:
+            # * the state is written first, so the block height is never ahead
+            self._transformer.flush()
+            self._update_block_height(block_height)
+        else:
+            item = self._block_height_item(block_height)
+            writes.append(
+                (
+                    self._get_block_height_collection_name(),
+                    [ReplaceOne({"_id": 1}, item, upsert=True)],
+                )
+            )
+            self._commit(writes)
+            self._transformer.discard()
+
+        self._block_height = block_height
+
+        logging.info(f"Checkpointed transformed state at block: {block_height}")
+
+        if (
+            self._snapshot_every
+            and block_height - self._snapshot_block_height >= self._snapshot_every
+        ):
+            self._snapshot(block_height)
+
+        if self._watcher is not None and self._watcher.changed():
+            self._reload()
+
+    def _commit(self, writes: List[Tuple[str, List[Any]]]) -> None:
+        """
+        Writes the pending writes of the transformer, followed by the block
+        height, as a single unit.
+
+        Args:
+            writes (List[Tuple[str, List[Any]]]): collection name and its bulk
+            write operations, in order
+        """
+
+        self._db.atomic_bulk_write(writes, self._db_name)
+
+    def _reload(self) -> float:
+        """
+        Reloads the transformer's module, and replaces the transformer with one
+        of the reloaded module that takes over its in-memory state. If the state
+        version changed, the state is re-indexed instead. If the module or the
+        transformer fails to load, the running transformer is kept. Only call
+        this right after a checkpoint, when nothing is pending.
+
+        Returns:
+            float: seconds that transforming was paused for
+        """
+
+        # * transform.reindex builds on this module
+        from transform.reindex import reindex  # pylint: disable=import-outside-toplevel
+
+        start = time.perf_counter()
+
+        previous = self._transformer
+        try:
+            transformer_module = self._watcher.reload()
+            transformer = transformer_module.Transformer(
+                self._config.get_address(), self._db, self._get_state_collection_name()
+            )
+        except Exception:  # pylint: disable=broad-except
+            # * the live transform carries on, the error is for the developer
+            logging.exception(
+                f"Reloading {self._to_transform} failed, keeping the running one"
+            )
+            return time.perf_counter() - start
+
+        self._transformer = transformer
+
+        if self._transformer.get_state_version() != previous.get_state_version():
+            logging.warning(
+                f"{self._to_transform} state version changed"
+                f", from {previous.get_state_version()}"
+                f" to {self._transformer.get_state_version()}, re-indexing"
+                f" up to block {self._block_height}. Transforming is paused"
+                " until it is done"
+            )
+            # * up to the checkpoint, from where the transform carries on
+            reindex(self._config, self._db, self._block_height)
+            self._load_state()
+        else:
+            try:
+                self._transformer.adopt_state(previous)
+            except NotImplementedError:
+                self._load_state()
+
+        elapsed = time.perf_counter() - start
+        logging.info(f"Reloaded {self._to_transform} in {elapsed * 1000:.1f}ms")
+
+        return elapsed
+
+    def _snapshot(self, block_height: int) -> None:
+        """
+        Snapshots the transformer's state, and its views as they are in the db.
+        Only call this right after a checkpoint, such that the snapshot matches
+        the state collections.
+
+        Args:
+            block_height (int): last fully transformed block
+        """
+
+        try:
+            documents = self._transformer.dump_state()
+        except NotImplementedError:
+            logging.warning(f"{self._to_transform} state can not be snapshotted")
+            self._snapshot_every = 0
+            return
+
+        state_collection_name = self._get_state_collection_name()
+        views = {
+            collection_name[len(state_collection_name) :]: self._db.get_all_items(
+                self._db_name, collection_name
+            )
+            for collection_name in self._get_collection_names()[1:]
+        }
+
+        self._snapshots.save(block_height, documents, views)
+        self._snapshot_block_height = block_height
+
+    def _load_state(self) -> None:
+        """
+        Loads the transformer's state as of the checkpoint. If there is a
+        snapshot at or before the checkpoint, the state is restored from it and
+        the transactions in between the two are replayed. Their writes are
+        already in the db, so they are discarded. Otherwise, the whole state
+        collection is read.
+        """
+
+        self._determine_block_height()
+
+        snapshot = None
+        if self._snapshot_every:
+            snapshot = self._snapshots.latest(self._block_height)
+
+        if snapshot is None:
+            self._transformer.load_state()
+            return
+
+        snapshot_block_height, documents, _ = snapshot
+        self._snapshot_block_height = snapshot_block_height
+
+        try:
+            self._transformer.restore_state(documents)
+        except NotImplementedError:
+            # * the state collection is as of the checkpoint, nothing to replay
+            self._transformer.load_state()
+            return
+
+        batch: List[Dict] = []
+        for txn in self._read_raw_transactions(
+            snapshot_block_height, self._block_height
+        ):
+            batch.append(txn)
+            if len(batch) >= self._batch_size:
+                self._transformer.entrypoint_batch(batch)
+                self._transformer.discard()
+                batch = []
+
+        self._transformer.entrypoint_batch(batch)
+        self._transformer.discard()
+
+        logging.info(
+            f"Restored state snapshot at block: {snapshot_block_height}"
+            f", replayed up to block: {self._block_height}"
+        )
+
+    def rebuild(self, block_height: Optional[int] = None) -> None:
+        """
+        Rewrites the state collection and its views with the latest snapshot at
+        or before block_height, or empties them if there is no such snapshot,
+        and moves the checkpoint there. The next transform replays the raw
+        transactions after it. The later snapshots are dropped, they are about
+        to be redone.
+
+        Args:
+            block_height (Optional[int], optional): newest block height to start
+            from. Defaults to None, the latest snapshot.
+        """
+
+        snapshot = self._snapshots.latest(block_height)
+        snapshot_block_height, documents, views = (
+            (0, [], {}) if snapshot is None else snapshot
+        )
+
+        self._update_block_height(snapshot_block_height)
+        self._block_height = snapshot_block_height
+        self._snapshots.drop_after(snapshot_block_height)
+        self._snapshot_block_height = snapshot_block_height
+
+        for collection_name in self._get_collection_names():
+            self._db.drop_collection(self._db_name, collection_name)
+
+        state_collection_name = self._get_state_collection_name()
+        self._db.put_items(documents, self._db_name, state_collection_name)
+        for suffix, view_documents in views.items():
+            self._db.put_items(
+                view_documents, self._db_name, f"{state_collection_name}{suffix}"
+            )
+
+        self._transformer.discard()
+        try:
+            self._transformer.restore_state(documents)
+        except NotImplementedError:
+            self._transformer.load_state()
+
+        logging.info(f"Rebuilt transformed state from block: {snapshot_block_height}")
+
+    def _log_profile(self) -> None:
+        """
+        Logs the number of calls to and the time spent in every handler of the
+        transformer, since it was started.
+        """
+
+        for handler, (calls, seconds) in self._transformer.get_profile().items():
+            logging.info(f"{handler}: {calls} calls in {seconds:.3f}s")
+
+        stats = self._transformer.get_store_stats()
+        if stats:
+            lookups = stats["hits"] + stats["misses"]
+            hit_rate = stats["hits"] / lookups if lookups else 0
+            logging.info(
+                f"State store: {stats['entries']} documents in memory"
+                f", {hit_rate:.1%} hit rate over {lookups} lookups"
+                f", {stats['evictions']} evictions"
+            )
+
     # todo: return type
-    def _read_raw_transactions_after_block(self):
+    def _read_raw_transactions_after_block(self) -> Iterator[Dict]:
         """
-        Pulls all transactions after block height, and sorts them in ascending order
+        Streams all transactions after block height in ascending order. Only
+        one batch of transactions is held in memory at any time.
         """
 
-        raw_transactions = self._db.get_all_items(
+        return self._read_raw_transactions(self._block_height)
+
+    def _read_raw_transactions(
+        self, after_block: int, up_to_block: Optional[int] = None
+    ) -> Iterator[Dict]:
+        """
+        Streams the transactions in (after_block, up_to_block] in ascending order.
+        """
+
+        return self._read_raw_collection(
+            self._config.get_address(), after_block, up_to_block
+        )
+
+    def _get_sender_addresses(self) -> List[str]:
+        """
+        Returns:
+            List[str]: lower cased addresses whose logs are transformed
+        """
+
+        return [self._config.get_address().lower()]
+
+    def _read_raw_collection(
+        self, address: str, after_block: int, up_to_block: Optional[int] = None
+    ) -> Iterator[Dict]:
+        """
+        Streams the transactions of address in (after_block, up_to_block] in
+        ascending order.
+        """
+
+        block_range = {"$gt": after_block}
+        if up_to_block is not None:
+            block_range["$lte"] = up_to_block
+
+        if self._aggregate:
+            try:
+                return self._aggregate_raw_collection(address, block_range)
+            except NotImplementedError:
+                logging.warning(
+                    "Aggregate mode is not supported by the db or the transformer"
+                    ", reading whole raw transactions"
+                )
+                self._aggregate = False
+
+        raw_transactions = self._db.iter_items(
             self._db_name,
-            self._config.get_address(),
+            address,
             {
-                "query_clause": {"block_height": {"$gt": self._block_height}},
+                "query_clause": {"block_height": block_range},
                 "sort": {"sort_by": "block_height", "direction": 1},
+                "projection": RAW_TRANSACTION_PROJECTION,
+                "batch_size": self._batch_size,
             },
         )
 
         return raw_transactions
 
+    def _aggregate_raw_collection(
+        self, address: str, block_range: Dict
+    ) -> Iterator[Dict]:
+        """
+        Streams the transactions of address in block_range in ascending order,
+        with only the logs that the transformer handles, in log order. The logs
+        are unwound, filtered, sorted and projected inside the db, so only the
+        handled ones are read. Transactions without any are skipped, so a
+        checkpoint is only ever as recent as the last handled log.
+
+        Raises:
+            NotImplementedError: if the db does not run aggregation pipelines,
+            or the transformer does not tell which topics it handles.
+        """
+
+        topics = self._transformer.get_handled_topics()
+
+        projection = {
+            "_id": 0,
+            "block_height": 1,
+            "tx_offset": 1,
+            "tx_hash": 1,
+            **LOG_EVENT_PROJECTION,
+        }
+        if any(topics.values()):
+            projection["log_events.decoded"] = 1
+
+        pipeline = [
+            *self._match_handled_logs(block_range, list(topics)),
+            {"$sort": {"block_height": 1, "tx_offset": 1, "log_events.log_offset": 1}},
+            {"$project": projection},
+        ]
+
+        rows = self._db.aggregate(
+            self._db_name, address, pipeline, {"batch_size": self._batch_size}
+        )
+
+        return _group_log_rows(rows)
+
+    def _match_handled_logs(self, block_range: Dict, topics: List[str]) -> List[Dict]:
+        """
+        Returns:
+            List[Dict]: pipeline stages that unwind the raw transactions in
+            block_range into one document per log of the watched addresses,
+            whose topic0 is one of topics
+        """
+
+        senders = {"$in": self._get_sender_addresses()}
+
+        return [
+            # * on the block_height index, before the documents are unwound
+            {
+                "$match": {
+                    "block_height": block_range,
+                    "log_events.sender_address": senders,
+                }
+            },
+            {"$unwind": "$log_events"},
+            {
+                "$match": {
+                    "log_events.sender_address": senders,
+                    "log_events.raw_log_topics.0": {"$in": topics},
+                }
+            },
+        ]
+
+    def _transform_transactions(
+        self, raw_transactions: Iterable[Dict]
+    ) -> Optional[int]:
+        """
+        Passes the raw transactions to the transformer, checkpointing along the
+        way. The transformed data of the last block is not committed yet.
+
+        Args:
+            raw_transactions (Iterable[Dict]): transactions in ascending order
+
+        Returns:
+            Optional[int]: last block that was passed to the transformer, None
+            if there were no transactions
+        """
+
+        # transactions are supplied in ascending order
+        # so the last seen block is the latest one
+        latest_block = None
+
+        # * transactions are handed to the transformer in batches, such that
+        # * it can decode the logs of a batch all at once
+        batch: List[Dict] = []
+
+        for txn in raw_transactions:
+            block_height = txn["block_height"]
+
+            # * a block is complete once a transaction from the next block
+            # * shows up, so it is only safe to checkpoint on this boundary
+            if (
+                latest_block is not None
+                and block_height != latest_block
+                and latest_block - self._block_height >= self._checkpoint_every
+            ):
+                self._transformer.entrypoint_batch(batch)
+                batch = []
+                self._checkpoint(latest_block)
+
+            batch.append(txn)
+            if len(batch) >= self._batch_size:
+                self._transformer.entrypoint_batch(batch)
+                batch = []
+
+            latest_block = block_height
+
+        if latest_block is not None:
+            self._transformer.entrypoint_batch(batch)
+
+        return latest_block
+
     def transform(self) -> None:
         """@inheritdoc ITransform"""
 
@@ -125,7 +625,7 @@ class Transform(ITransform):
         # 3. Pass in the right order these transactions into individual handlers
         # 4. Handlers return transformed data which we store here in memory
         # 5. Determine the newest block from these txns
-        # 6. Update the last block
+        # 6. Commit the transformed data together with the last block
 
         # 1.
         self._determine_block_height()
@@ -133,27 +633,101 @@ class Transform(ITransform):
         # 2.
         raw_transactions = self._read_raw_transactions_after_block()
 
-        # 3.
-        for txn in raw_transactions:
-            # 4.
-            self._transformer.entrypoint(txn)
+        # 3., 4., 5., 6.
+        self.transform_transactions(raw_transactions)
 
-        # 5.
-        if len(raw_transactions) == 0:
-            return
-        # transactions are supplied in ascending order
-        # so we should write the last transaction's block number
-        latest_block = raw_transactions[-1]["block_height"]
+    def get_block_height(self) -> int:
+        """
+        Returns:
+            int: last block that was committed, as of the db
+        """
 
-        # 6.
-        self._update_block_height(latest_block)
+        self._determine_block_height()
+        return self._block_height
 
-    def flush(self) -> None:
-        """@inheritdoc ITransform"""
+    def read_raw_transactions(self, after_block: int) -> Iterator[Dict]:
+        """
+        Streams the raw transactions after after_block in ascending order, the
+        way that transform reads them.
+
+        Args:
+            after_block (int): last block to skip
+        """
+
+        return self._read_raw_transactions(after_block)
+
+    def transform_transactions(self, raw_transactions: Iterable[Dict]) -> Optional[int]:
+        """
+        Passes the raw transactions to the transformer, checkpointing along the
+        way, and commits the last block once they run out. They can come from
+        anywhere, as long as they are in ascending order, in whole blocks and
+        after the last committed block.
+
+        Args:
+            raw_transactions (Iterable[Dict]): transactions in ascending order
+
+        Returns:
+            Optional[int]: last block that was committed, None if there were no
+            transactions
+        """
+
+        latest_block = self._transform_transactions(raw_transactions)
+
+        if latest_block is not None:
+            self._checkpoint(latest_block)
+
+        return latest_block
+
+    def flush_state(self) -> None:
+        """
+        Writes the in-memory state of the transformer back to the db, and logs
+        the time spent in its handlers.
+        """
 
         # this way the responsibility of maintaining complex state and
-        # writing it to db is with the transformer
+        # writing it to db is with the transformer. Everything up to the
+        # last block was already committed by transform
         self._transformer.flush()
+        self._log_profile()
+
+    def flush(self) -> None:
+        """@inheritdoc ITransform"""
+
+        self.flush_state()
+
+        if not self._watch:
+            logging.info("Transformer sleeping...")
+            time.sleep(SLEEP_TIMER)
+            return
+
+        logging.info("Transformer waiting for raw transactions...")
+        # * the next transform reads everything after the checkpoint, so
+        # * the notifications themselves are not needed, only their timing
+        self._db.wait_for_inserts(
+            self._db_name,
+            self._config.get_address(),
+            SLEEP_TIMER,
+            WATCH_DEBOUNCE_SECONDS,
+        )
+
+
+def _group_log_rows(rows: Iterable[Dict]) -> Iterator[Dict]:
+    """
+    Folds the unwound logs back into their transactions. The logs of a
+    transaction come out one after the other.
+    """
+
+    for _, grouped in groupby(rows, key=itemgetter("tx_hash")):
+        txn_rows = list(grouped)
+        txn = {key: value for key, value in txn_rows[0].items() if key != "log_events"}
+        txn["log_events"] = []
+
+        for row in txn_rows:
+            event = row["log_events"]
+            event["tx_hash"] = txn["tx_hash"]
+            event["block_height"] = txn["block_height"]
+            # * not projected if no handler needs covalent to decode its logs
+            event.setdefault("decoded", None)
+            txn["log_events"].append(event)
 
-        logging.info("Transformer sleeping...")
-        time.sleep(SLEEP_TIMER)
+        yield txn
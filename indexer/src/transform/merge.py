@@ -0,0 +1,159 @@
+"""
+Transforms the raw transactions of several contracts, e.g. an escrow and the
+token that it holds, as a single history. The raw collections of the contracts
+are streamed side by side, and k-way merged by (block_height, tx_offset) on a
+heap that holds one transaction of every collection, so the memory in use grows
+with the number of contracts, and not with the length of their histories. A
+transaction that touches more than one of the contracts is in the raw
+collection of each of them, it is transformed once.
+
+Every contract is extracted on its own, so the merge only reads up to the
+lowest block height that all of them were extracted up to. Past it, one of them
+could still be missing transactions. Next to the block height, the checkpoint
+holds the block up to which the transactions of every contract are
+transformed. A contract that is added later on is transformed from the block
+height at the time it was added.
+"""
+
+import heapq
+from itertools import groupby
+from operator import itemgetter
+from typing import Dict, Iterator, List, Optional
+
+from config import Config
+from interfaces.idb import IDB
+
+from transform.main import (
+    CHECKPOINT_EVERY_BLOCKS,
+    READ_BATCH_SIZE,
+    SNAPSHOT_EVERY_BLOCKS,
+    Transform,
+)
+
+# order of the transactions, across the raw collections
+MERGE_KEY = itemgetter("block_height", "tx_offset")
+
+
+def _in_block_order(raw_transactions: Iterator[Dict]) -> Iterator[Dict]:
+    """Orders the transactions of every block by their offset in it."""
+
+    for _, txns in groupby(raw_transactions, key=itemgetter("block_height")):
+        yield from sorted(txns, key=itemgetter("tx_offset"))
+
+
+class MergedTransform(Transform):
+    """@inheritdoc ITransform"""
+
+    def __init__(
+        self,
+        config: Config,
+        sources: List[str],
+        batch_size: int = READ_BATCH_SIZE,
+        checkpoint_every: int = CHECKPOINT_EVERY_BLOCKS,
+        db: Optional[IDB] = None,
+        snapshot_every: int = SNAPSHOT_EVERY_BLOCKS,
+        namespace: Optional[str] = None,
+        aggregate: bool = False,
+    ):
+        if len(set(sources)) != len(sources):
+            raise ValueError(f"Sources are not unique: {sources}")
+
+        # * set before the state is loaded, which replays from the sources
+        self._sources = sources
+        # address -> block up to which its transactions are transformed
+        self._source_block_heights: Dict[str, int] = {}
+
+        super().__init__(
+            config,
+            batch_size,
+            checkpoint_every,
+            db,
+            snapshot_every,
+            namespace=namespace,
+            aggregate=aggregate,
+        )
+
+    def _load_state(self) -> None:
+        self._transformer.set_sender_addresses(self._sources)
+        super()._load_state()
+
+    def _get_sender_addresses(self) -> List[str]:
+        return [address.lower() for address in self._sources]
+
+    def _determine_block_height(self) -> None:
+        block_height_item = self._db.get_any_item(
+            self._db_name, self._get_block_height_collection_name()
+        )
+        if block_height_item is not None:
+            # pylint: disable=attribute-defined-outside-init
+            self._block_height = block_height_item["block_height"]
+            self._source_block_heights = dict(block_height_item.get("sources", {}))
+
+        # * a contract is transformed from the block height at which it was
+        # * added. Neither a checkpoint nor a rebuild moves it
+        for address in self._sources:
+            self._source_block_heights.setdefault(address, self._block_height)
+
+    def _block_height_item(self, block_height: int) -> Dict:
+        item = super()._block_height_item(block_height)
+        item["sources"] = {
+            address: self._source_block_heights.get(address, self._block_height)
+            for address in self._sources
+        }
+        return item
+
+    def _extracted_block_height(self) -> int:
+        """
+        Returns:
+            int: block height that all of the sources are extracted up to
+        """
+
+        extracted = []
+
+        for address in self._sources:
+            # * written by the extractor, after the raw transactions
+            block_height_item = self._db.get_any_item(
+                self._db_name, f"{address}-block-height"
+            )
+            if block_height_item is None:
+                return 0
+
+            extracted.append(block_height_item["block_height"])
+
+        return min(extracted)
+
+    def _read_raw_transactions(
+        self, after_block: int, up_to_block: Optional[int] = None
+    ) -> Iterator[Dict]:
+        """
+        Streams the transactions of all of the sources in (after_block,
+        up_to_block], merged in ascending order.
+        """
+
+        extracted = self._extracted_block_height()
+        up_to_block = extracted if up_to_block is None else min(up_to_block, extracted)
+
+        raw_transactions = [
+            _in_block_order(
+                self._read_raw_collection(
+                    address,
+                    max(
+                        after_block,
+                        self._source_block_heights.get(address, self._block_height),
+                    ),
+                    up_to_block,
+                )
+            )
+            for address in self._sources
+        ]
+
+        tx_hash = None
+
+        # * the same transaction has the same key in every source, so its
+        # * copies come out one after the other
+        for txn in heapq.merge(*raw_transactions, key=MERGE_KEY):
+            if txn["tx_hash"] == tx_hash:
+                continue
+
+            tx_hash = txn["tx_hash"]
+            yield txn
@@ -0,0 +1,123 @@
+"""
+Transforms the raw transactions on a pool of processes. Meant for re-indexing
+a transformer whose handlers only insert documents and do not depend on each
+other, other than through the order of the inserted documents.
+
+Every checkpoint interval, the logs are split by their partition key. Each
+partition is transformed by a worker, in block and log order. The inserted
+documents of all partitions are then merged back by (block_height, log_offset)
+into the transformer, which flushes them exactly as the serial transform would
+have: same documents, in the same order.
+"""
+
+import importlib
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import Config
+from interfaces.idb import IDB
+
+from transform.main import (
+    CHECKPOINT_EVERY_BLOCKS,
+    READ_BATCH_SIZE,
+    SNAPSHOT_EVERY_BLOCKS,
+    Transform,
+)
+from transform.transformer import BaseTransformer, MergeKey
+
+# transformer of the worker process
+_worker_transformer: Optional[BaseTransformer] = None
+
+
+def _init_worker(transformer_name: str, address: str) -> None:
+    # pylint: disable=global-statement
+    global _worker_transformer
+
+    transformer_module = importlib.import_module(
+        f"transformers.{transformer_name}.main"
+    )
+    # * workers only transform, the documents are written by the parent
+    _worker_transformer = transformer_module.Transformer(address)
+
+
+def _transform_partition(
+    txns: List[Dict[str, Any]]
+) -> List[Tuple[MergeKey, Dict[str, Any]]]:
+    return _worker_transformer.transform_partition(txns)
+
+
+class ParallelTransform(Transform):
+    """
+    @inheritdoc Transform
+
+    Hands the transactions in between two checkpoints to `workers` processes.
+    """
+
+    def __init__(
+        self,
+        config: Config,
+        workers: int,
+        batch_size: int = READ_BATCH_SIZE,
+        checkpoint_every: int = CHECKPOINT_EVERY_BLOCKS,
+        db: Optional[IDB] = None,
+        snapshot_every: int = SNAPSHOT_EVERY_BLOCKS,
+    ):
+        super().__init__(config, batch_size, checkpoint_every, db, snapshot_every)
+
+        if not isinstance(self._transformer, BaseTransformer) or not (
+            self._transformer.is_partitioned()
+        ):
+            raise ValueError(
+                f"{self._to_transform} does not declare partition keys,"
+                " it can only be transformed serially"
+            )
+
+        self._workers = workers
+
+    def _transform_in_parallel(
+        self, pool: ProcessPoolExecutor, txns: List[Dict[str, Any]]
+    ) -> None:
+        partitions = self._transformer.partition(txns, self._workers)
+        results = list(pool.map(_transform_partition, partitions))
+        self._transformer.merge_partitions(results)
+
+        logging.info(f"Transformed {len(txns)} transactions on {self._workers} workers")
+
+    def transform(self) -> None:
+        """@inheritdoc ITransform"""
+
+        self._determine_block_height()
+
+        raw_transactions = self._read_raw_transactions_after_block()
+
+        latest_block = None
+        txns: List[Dict[str, Any]] = []
+
+        with ProcessPoolExecutor(
+            max_workers=self._workers,
+            initializer=_init_worker,
+            initargs=(self._to_transform, self._config.get_address()),
+        ) as pool:
+            for txn in raw_transactions:
+                block_height = txn["block_height"]
+
+                # * same checkpoints as the serial transform
+                if (
+                    latest_block is not None
+                    and block_height != latest_block
+                    and latest_block - self._block_height >= self._checkpoint_every
+                ):
+                    self._transform_in_parallel(pool, txns)
+                    txns = []
+                    self._checkpoint(latest_block)
+
+                txns.append(txn)
+                latest_block = block_height
+
+            if latest_block is None:
+                return
+
+            self._transform_in_parallel(pool, txns)
+
+        self._checkpoint(latest_block)
@@ -0,0 +1,86 @@
+"""
+Codec of the prices that the ReNFT contracts pack into a bytes4: the first two
+bytes are the whole part, the last two the decimal part, each capped at 9999.
+E.g. 0x0001_1388 is 1.5.
+
+A contract lends at a few hundred distinct prices at most, so unpacked prices
+are memoized, in a bounded cache. The batch API unpacks a whole column of
+prices at once with numpy, e.g. the column of a batch decoded by transform/abi.
+"""
+
+import base64
+from functools import lru_cache
+from typing import List, Sequence, Union
+
+import numpy as np
+
+# distinct packed prices that are kept unpacked
+PRICE_CACHE_ENTRIES = 1024
+# the whole and the decimal part are both capped at this
+MAX_PRICE_PART = 9999
+# size of a packed price, in bytes
+PACKED_PRICE_SIZE = 4
+
+PackedPrice = Union[str, bytes]
+
+
+def unpack_price_bytes(packed: bytes) -> float:
+    """
+    Unpacks a price out of its raw bytes, without the cache.
+
+    Args:
+        packed (bytes): packed price
+
+    Returns:
+        (float): unpacked price
+    """
+
+    whole = min(int.from_bytes(packed[:2], "big"), MAX_PRICE_PART)
+    decimal = min(int.from_bytes(packed[2:], "big"), MAX_PRICE_PART)
+
+    # shift right 4 decimal places
+    return whole + decimal * 10**-4
+
+
+@lru_cache(maxsize=PRICE_CACHE_ENTRIES)
+def unpack_price(price: PackedPrice) -> float:
+    """
+    Unpacks Price into number [0, 9999.9999]
+
+    Args:
+        price (PackedPrice): packed price, as bytes or base64 encoded
+
+    Returns:
+        (float): unpacked price
+    """
+
+    # Covalent returns bytes4 types encoded in base64
+    if isinstance(price, str):
+        price = base64.b64decode(price)
+
+    return unpack_price_bytes(price)
+
+
+def unpack_prices(prices: Sequence[PackedPrice]) -> List[float]:
+    """
+    Unpacks a batch of prices at once, like unpack_price does each of them.
+
+    Args:
+        prices (Sequence[PackedPrice]): packed prices, as bytes or base64 encoded
+
+    Returns:
+        List[float]: unpacked prices, in order
+    """
+
+    packed = [
+        base64.b64decode(price) if isinstance(price, str) else price for price in prices
+    ]
+
+    if any(len(price) != PACKED_PRICE_SIZE for price in packed):
+        return list(map(unpack_price_bytes, packed))
+
+    # * (whole, decimal) of every price, as big endian uint16s
+    parts = np.frombuffer(b"".join(packed), dtype=">u2").reshape(-1, 2)
+    parts = np.minimum(parts, MAX_PRICE_PART).astype(np.float64)
+
+    return (parts[:, 0] + parts[:, 1] * 10**-4).tolist()
@@ -0,0 +1,238 @@
+"""
+Re-indexes a transformer without taking its state offline, e.g. after fixing a
+bug in it. The state is rebuilt from the raw transactions into shadow
+collections, {address}-shadow-..., and each of them is then renamed over its
+live counterpart. Every rename is atomic, so readers of a collection, like the
+GraphQL server, see the whole of its old documents up until its rename, and
+the whole of the new ones after it. The collections are renamed one after the
+other though: the snapshots, the state collection, its views and then the
+block height. For the few milliseconds in between, a reader that joins the state
+with a view can see the rebuilt state next to the old view.
+
+The rebuild checkpoints rarely, so that the state is written in large bulk
+loads. They are plain bulk writes with a relaxed write concern rather than
+transactions, which would run into the time and size limits of a
+transaction: a shadow that is lost to a crash is simply rebuilt. Before the
+swap, the number of logs that the transformer handled is verified against the
+number of logs that it has a handler for, as counted by the db.
+
+The extractor can keep running, but the transform of the address must be
+stopped while re-indexing, or it keeps its old state in memory and writes it
+over the swapped in one. Re-run the command if it was interrupted, it starts
+over from an empty shadow.
+
+`python -m transform.reindex sylvester`
+"""
+
+import argparse
+import logging
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from pymongo.write_concern import WriteConcern
+
+from config import Config
+from db import DB
+from interfaces.idb import IDB
+
+from transform.main import READ_BATCH_SIZE, SNAPSHOT_EVERY_BLOCKS, Transform
+
+SHADOW_NAMESPACE = "shadow"
+# the shadow state is written in bulk every this many blocks. Outside of a
+# transaction, so there is no limit on the size of a single write
+REINDEX_CHECKPOINT_EVERY_BLOCKS = 100_000
+# acknowledged by the primary only, and not journaled
+SHADOW_WRITE_CONCERN = WriteConcern(w=1, j=False)
+
+
+class ShadowMismatch(Exception):
+    """The shadow state does not hold the transformed state."""
+
+
+class ShadowTransform(Transform):
+    """
+    Transforms into the shadow collections of the address, which it can then
+    swap in for the live ones.
+    """
+
+    def __init__(
+        self,
+        config: Config,
+        batch_size: int = READ_BATCH_SIZE,
+        checkpoint_every: int = REINDEX_CHECKPOINT_EVERY_BLOCKS,
+        db: Optional[IDB] = None,
+        snapshot_every: int = SNAPSHOT_EVERY_BLOCKS,
+        up_to_block: Optional[int] = None,
+    ):
+        super().__init__(
+            config,
+            batch_size,
+            checkpoint_every,
+            db,
+            snapshot_every,
+            namespace=SHADOW_NAMESPACE,
+        )
+
+        # block number up to which the state is rebuilt, None for all of the
+        # extracted blocks
+        self._up_to_block = up_to_block
+
+    def _load_state(self) -> None:
+        # * the shadow of an earlier re-index, that may have been interrupted,
+        # * is dropped rather than loaded. Replaying it would count its logs as
+        # * handled by this one
+        self.rebuild(0)
+
+    def _read_raw_transactions_after_block(self) -> Iterator[Dict]:
+        return self._read_raw_transactions(self._block_height, self._up_to_block)
+
+    def _live_collection_name(self, collection_name: str) -> str:
+        suffix = collection_name[len(self._collection_prefix) :]
+        return f"{self._config.get_address()}{suffix}"
+
+    def _commit(self, writes: List[Tuple[str, List[Any]]]) -> None:
+        # * in order, so the block height is never ahead of the state. An
+        # * interrupted re-index starts over from an empty shadow anyway
+        for collection_name, operations in writes:
+            self._db.bulk_write(operations, self._db_name, collection_name)
+
+    def _count_handled_logs(self) -> int:
+        """
+        Raises:
+            NotImplementedError: if the db does not run aggregation pipelines,
+            or the transformer does not tell which topics it handles.
+
+        Returns:
+            int: number of logs up to the checkpoint that the transformer has a
+            handler for, as counted by the db
+        """
+
+        topics = list(self._transformer.get_handled_topics())
+        address = self._config.get_address()
+        pipeline = [
+            *self._match_handled_logs({"$lte": self._block_height}, topics),
+            {"$count": "logs"},
+        ]
+
+        for counted in self._db.aggregate(self._db_name, address, pipeline):
+            return counted["logs"]
+
+        return 0
+
+    def verify(self) -> int:
+        """
+        Verifies the rebuild against the raw transactions: every log up to the
+        checkpoint that the transformer has a handler for must have been
+        handled, and a state that handled any must not be empty.
+
+        Raises:
+            ShadowMismatch: if a log was not handled, or the state is empty
+
+        Returns:
+            int: number of documents in the shadow collections
+        """
+
+        counts = [
+            self._db.count_items(self._db_name, collection_name)
+            for collection_name in self._get_collection_names()
+        ]
+        profile = self._transformer.get_profile()
+        handled = sum(calls for calls, _ in profile.values())
+
+        try:
+            expected = self._count_handled_logs()
+        except NotImplementedError:
+            expected = None
+
+        if expected is None or not profile:
+            logging.warning(f"{self._to_transform} can not be verified")
+            return sum(counts)
+
+        if handled != expected:
+            raise ShadowMismatch(f"Handled {handled} logs, expected {expected}")
+
+        # * the state collection comes first
+        if handled and not counts[0]:
+            raise ShadowMismatch(f"Shadow state is empty after {handled} logs")
+
+        return sum(counts)
+
+    def swap(self) -> None:
+        """
+        Renames the shadow collections over the live ones, one by one: the
+        snapshots, the state collection, its views and the block height. A
+        swap that was interrupted is finished by re-indexing again.
+        """
+
+        for collection_name in (
+            self._get_snapshot_collection_name(),
+            *self._get_collection_names(),
+            self._get_block_height_collection_name(),
+        ):
+            self._db.rename_collection(
+                self._db_name,
+                collection_name,
+                self._live_collection_name(collection_name),
+            )
+
+
+def reindex(
+    config: Config, db: Optional[IDB] = None, up_to_block: Optional[int] = None
+) -> float:
+    """
+    Rebuilds the state of the transformer in config from the raw transactions,
+    and swaps it in for the live state.
+
+    Args:
+        config (Config): config of the transformer to re-index
+        db (Optional[IDB], optional): db to re-index in. Defaults to None,
+        MongoDB with a relaxed write concern.
+        up_to_block (Optional[int], optional): block up to which to rebuild the
+        state, e.g. the checkpoint of a live transform that pauses for the
+        re-index. Defaults to None, all of the extracted blocks.
+
+    Returns:
+        float: seconds that the whole re-index took
+    """
+
+    start = time.perf_counter()
+
+    db = DB(write_concern=SHADOW_WRITE_CONCERN) if db is None else db
+    shadow = ShadowTransform(config, db=db, up_to_block=up_to_block)
+
+    shadow.transform()
+    rebuilt = time.perf_counter()
+
+    count = shadow.verify()
+    shadow.swap()
+    elapsed = time.perf_counter() - start
+
+    logging.info(
+        f"Re-indexed {count} documents in {elapsed:.3f}s"
+        f", of which rebuilding took {rebuilt - start:.3f}s"
+    )
+
+    return elapsed
+
+
+def main():
+    """Re-index entrypoint"""
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("transformer", help="name of the Config preset")
+    args = parser.parse_args()
+
+    config = getattr(Config, args.transformer)()
+
+    logging.basicConfig(
+        filename=config.get_log_filename(),
+        level=logging.INFO,
+        format="%(relativeCreated)6d %(process)d %(message)s",
+    )
+
+    elapsed = reindex(config)
+    print(f"{args.transformer}: re-indexed in {elapsed:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
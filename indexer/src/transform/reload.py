@@ -0,0 +1,111 @@
+"""
+Hot reload of a transformer. The files of its package, transformers/{name},
+are polled for changes. Once one changed, Transform reloads the package on the
+next checkpoint, when every write is committed and nothing is pending, and
+swaps in a Transformer of the reloaded module for the running one.
+
+The new transformer takes over the in-memory state of the old one, so the
+pause is as long as importing the package again. If the state version of the
+transformer changed, its state can not be carried over and is rebuilt in
+shadow collections instead, see transform/reindex.py. Transforming is paused
+for the whole re-index.
+
+A package that fails to import, e.g. on a syntax error, is put back the way it
+was loaded and the running transformer carries on. It is reloaded again once
+its files change again.
+"""
+
+import importlib
+import os
+import sys
+import time
+from types import ModuleType
+from typing import Dict, Optional
+
+# the files of the transformer are checked at most this often
+RELOAD_POLL_SECONDS = 1.0
+# source files of a transformer, including its abi.json and spec.json
+WATCHED_SUFFIXES = (".py", ".json")
+
+
+class ModuleWatcher:
+    """Watches the package of a transformer's main module for changes."""
+
+    def __init__(self, module: ModuleType, poll_seconds: Optional[float] = None):
+        self._name = module.__name__
+        self._package = self._name.rpartition(".")[0]
+        self._directory = os.path.dirname(module.__file__)
+
+        self._poll_seconds = (
+            RELOAD_POLL_SECONDS if poll_seconds is None else poll_seconds
+        )
+        self._polled_at = time.monotonic()
+        # path -> modification time, of the files as they were loaded
+        self._mtimes = self._scan()
+        # path -> modification time, of the files that last failed to load
+        self._failed: Optional[Dict[str, int]] = None
+
+    def _scan(self) -> Dict[str, int]:
+        return {
+            entry.path: entry.stat().st_mtime_ns
+            for entry in os.scandir(self._directory)
+            if entry.is_file() and entry.name.endswith(WATCHED_SUFFIXES)
+        }
+
+    def changed(self) -> bool:
+        """
+        Returns:
+            bool: whether a file of the package was added, removed or modified
+            since it was loaded. Only checked once per poll interval.
+        """
+
+        now = time.monotonic()
+        if now - self._polled_at < self._poll_seconds:
+            return False
+
+        self._polled_at = now
+        mtimes = self._scan()
+        return mtimes not in (self._mtimes, self._failed)
+
+    def reload(self) -> ModuleType:
+        """
+        Reloads every loaded module of the package, the main module last. If
+        any of them fails to, all of them are put back the way they were.
+
+        Raises:
+            Exception: whatever reloading a module raised, e.g. a SyntaxError
+
+        Returns:
+            ModuleType: the reloaded main module
+        """
+
+        mtimes = self._scan()
+        importlib.invalidate_caches()
+
+        # * a module is in sys.modules before the modules that it imports, so
+        # * in reverse, every module is reloaded after its dependencies
+        names = [
+            name
+            for name in reversed(list(sys.modules))
+            if name.startswith(f"{self._package}.") and name != self._name
+        ]
+        names.append(self._name)
+        # * a reload executes the module in place, over its old globals
+        loaded = {name: dict(vars(sys.modules[name])) for name in names}
+
+        try:
+            for name in names:
+                importlib.reload(sys.modules[name])
+        except BaseException:
+            for name, module_globals in loaded.items():
+                module_vars = vars(sys.modules[name])
+                module_vars.clear()
+                module_vars.update(module_globals)
+
+            self._failed = mtimes
+            raise
+
+        self._mtimes = mtimes
+        self._failed = None
+
+        return sys.modules[self._name]
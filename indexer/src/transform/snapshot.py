@@ -0,0 +1,211 @@
+"""
+Point in time copies of a transformer's state, such that a restart or a
+rebuild does not have to start from the whole state collection, or from the
+very first raw transaction.
+
+A snapshot is the list of state documents as of the end of a block, along with
+the documents of the views of the state, e.g. {address}-state-lendings, by the
+suffix of their collection name. It is BSON encoded, zlib compressed and split
+into chunks that stay well under the 16MB document limit. Every chunk is tagged
+with the block height the snapshot covers, the format version and the
+transformer that produced it. A snapshot counts only once all of its chunks are
+in, so one that was interrupted halfway through is never restored.
+
+Only the latest few snapshots are kept. Older ones are removed once a newer
+one is saved in full, which also bounds how far back a rebuild can start from.
+"""
+
+import logging
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+import bson
+from pymongo import DeleteOne
+
+from interfaces.idb import IDB
+
+# bump on every change to the layout of the snapshot documents
+SNAPSHOT_VERSION = 2
+# size of the compressed state held by a single snapshot document
+CHUNK_BYTES = 8 * 1024 * 1024
+# speed over ratio: the state is mostly repetitive keys and addresses
+COMPRESSION_LEVEL = 1
+# number of snapshots kept per transformer, the newest ones
+SNAPSHOTS_KEPT = 5
+
+# (block height, state documents, view suffix -> view documents)
+Snapshot = Tuple[int, List[Dict[str, Any]], Dict[str, List[Dict[str, Any]]]]
+
+
+def _chunk_id(block_height: int, chunk: int) -> str:
+    return f"{block_height}-{chunk}"
+
+
+class SnapshotStore:
+    """
+    Reads and writes the snapshots of a single transformer, one collection per
+    address: {address}-snapshots.
+    """
+
+    def __init__(
+        self,
+        db: IDB,
+        db_name: str,
+        collection_name: str,
+        transformer_name: str,
+        keep: int = SNAPSHOTS_KEPT,
+    ):
+        self._db = db
+        self._db_name = db_name
+        self._collection_name = collection_name
+        self._transformer_name = transformer_name
+        self._keep = keep
+
+    def save(
+        self,
+        block_height: int,
+        documents: List[Dict[str, Any]],
+        views: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+    ) -> int:
+        """
+        Snapshots the state. Saving the same block height twice overwrites.
+        Once all of its chunks are in, the snapshots older than the latest
+        ones that are kept are removed.
+
+        Args:
+            block_height (int): last block that the state covers
+            documents (List[Dict[str, Any]]): state documents
+            views (Optional[Dict[str, List[Dict[str, Any]]]], optional): suffix
+            of the collection name of every view -> its documents. Defaults to
+            None, no views.
+
+        Returns:
+            int: size of the compressed snapshot in bytes
+        """
+
+        views = {} if views is None else views
+        data = zlib.compress(
+            bson.encode({"state": documents, "views": views}), COMPRESSION_LEVEL
+        )
+        chunks = max(1, -(-len(data) // CHUNK_BYTES))
+
+        for chunk in range(chunks):
+            item = {
+                "_id": _chunk_id(block_height, chunk),
+                "block_height": block_height,
+                "version": SNAPSHOT_VERSION,
+                "transformer": self._transformer_name,
+                "documents": len(documents),
+                "chunk": chunk,
+                "chunks": chunks,
+                "data": data[chunk * CHUNK_BYTES : (chunk + 1) * CHUNK_BYTES],
+            }
+            self._db.put_item(item, self._db_name, self._collection_name)
+
+        logging.info(
+            f"Snapshotted {len(documents)} state documents at block: {block_height}"
+            f" ({len(data)} bytes)"
+        )
+
+        self._drop_expired()
+
+        return len(data)
+
+    def _is_restorable(self, chunk: Dict[str, Any]) -> bool:
+        return (
+            chunk["version"] == SNAPSHOT_VERSION
+            and chunk["transformer"] == self._transformer_name
+        )
+
+    def latest(self, block_height: Optional[int] = None) -> Optional[Snapshot]:
+        """
+        Args:
+            block_height (Optional[int], optional): newest block height to
+            consider. Defaults to None, any.
+
+        Returns:
+            Optional[Snapshot]: (block height, state documents, view documents)
+            of the newest complete snapshot at or before block_height, None if
+            there is none
+        """
+
+        options: Dict[str, Any] = {"sort": {"sort_by": "block_height", "direction": -1}}
+        if block_height is not None:
+            options["query_clause"] = {"block_height": {"$lte": block_height}}
+
+        candidate: Optional[int] = None
+        # number of chunks -> chunk -> data. A snapshot that was re-taken with
+        # fewer chunks leaves the surplus chunks of the previous one behind
+        chunks: Dict[int, Dict[int, bytes]] = {}
+
+        # * newest first, so only the newest snapshots are ever read
+        for chunk in self._db.iter_items(self._db_name, self._collection_name, options):
+            if not self._is_restorable(chunk):
+                continue
+
+            if chunk["block_height"] != candidate:
+                candidate = chunk["block_height"]
+                chunks = {}
+
+            received = chunks.setdefault(chunk["chunks"], {})
+            received[chunk["chunk"]] = chunk["data"]
+
+            if len(received) == chunk["chunks"]:
+                data = b"".join(received[ix] for ix in range(len(received)))
+                snapshot = bson.decode(zlib.decompress(data))
+                return candidate, snapshot["state"], snapshot["views"]
+
+        return None
+
+    def block_heights(self) -> List[int]:
+        """
+        Returns:
+            List[int]: block heights of all the restorable snapshots, ascending
+        """
+
+        return sorted(
+            {
+                chunk["block_height"]
+                for chunk in self._db.iter_items(
+                    self._db_name,
+                    self._collection_name,
+                    {"projection": {"block_height": 1, "version": 1, "transformer": 1}},
+                )
+                if self._is_restorable(chunk)
+            }
+        )
+
+    def drop_after(self, block_height: int) -> None:
+        """
+        Removes the snapshots of the blocks after block_height. They describe a
+        state that is being rebuilt.
+
+        Args:
+            block_height (int): last block height to keep
+        """
+
+        self._drop({"block_height": {"$gt": block_height}})
+
+    def _drop_expired(self) -> None:
+        block_heights = self.block_heights()
+        if len(block_heights) <= self._keep:
+            return
+
+        # * the chunks of older formats or transformers go along with them
+        self._drop({"block_height": {"$lt": block_heights[-self._keep]}})
+
+    def _drop(self, query_clause: Dict[str, Any]) -> None:
+        stale = self._db.get_all_items(
+            self._db_name,
+            self._collection_name,
+            {
+                "query_clause": query_clause,
+                "projection": {"_id": 1},
+            },
+        )
+
+        self._db.bulk_write(
+            [DeleteOne({"_id": chunk["_id"]}) for chunk in stale],
+            self._db_name,
+            self._collection_name,
+        )
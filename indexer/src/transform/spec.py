@@ -0,0 +1,333 @@
+"""
+Declarative transformers. Instead of a main.py with a handler per event and an
+event.py with a DTO per event, a contract whose transformer only records its
+events ships a spec.json next to its abi.json:
+
+    {
+        "name": "Azrael",
+        "events": {
+            "Rented": {
+                "partition": "lendingId",
+                "fields": {
+                    "lendingId": "lendingId:int",
+                    "renterAddress": "renterAddress",
+                    "rentedAt": "rentedAt:int"
+                }
+            }
+        },
+        "views": {
+            "lendings": {
+                "key": "lendingId",
+                "indexes": ["renterAddress", "status"],
+                "updates": {
+                    "Rented": {
+                        "set": ["renterAddress", "rentedAt"],
+                        "unset": [],
+                        "values": {"status": "rented"}
+                    }
+                }
+            }
+        }
+    }
+
+Every handled log is inserted into the state collection as a document of the
+event's fields, next to its `_id` (txHash_logOffset) and the name of its
+`event`. A field is read off the event param of the given name, optionally
+through a converter: int, str, bool, float or the dotted path of a function,
+e.g. "dailyRentPrice:transform.price.unpack_price". Events are named
+by their name in the ABI, or by their signature if the name is overloaded:
+in the spec, in the updates of the views and in the `event` of the documents.
+
+A view is a collection, {state collection}-{view}, with a document per value of
+the key field, which the events of its updates keep current: they copy fields
+of the event onto it, drop fields off it and set constant values.
+
+A spec can carry a "version", the state version of its transformer, which is
+bumped whenever its documents change, see ITransformer.get_state_version.
+
+The spec is compiled when the transformer is imported. Every handler is
+generated for its event: it reads the params by position and builds the
+document in a single dict display, without the DTO and keyword argument
+round trip of a hand-written handler. The event types are generated as slotted
+DTOs, to read the documents back with.
+
+A main.py next to the spec is then all it takes:
+
+    Transformer = compile_spec(os.path.join(os.path.dirname(__file__), SPEC_FILE))
+"""
+
+import importlib
+import json
+import os
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+from interfaces.idb import IDB
+
+from transform.abi import EventDecoder, load_abi
+from transform.dto import compile_function, dto
+from transform.transformer import ABI_FILE, BaseTransformer, handles
+
+SPEC_FILE = "spec.json"
+
+# converters that the fields of a spec refer to by name
+CONVERTERS: Dict[str, Callable[[Any], Any]] = {
+    "int": int,
+    "str": str,
+    "bool": bool,
+    "float": float,
+}
+
+
+@dto
+class SpecEvent:
+    """
+    Document of a spec transformer. Holds txHash and logOffset, together they
+    are a unique identifier for the events of a contract. i.e.
+    _id=txHash_logOffset
+    """
+
+    _id: str
+    event: str
+
+
+class SpecTransformer(BaseTransformer):
+    """
+    Base of the transformers compiled from a spec. Records every handled event
+    in the state collection, and keeps the views of the spec next to it.
+    """
+
+    # name of the event -> slotted type of its documents
+    events: Dict[str, Type[SpecEvent]] = {}
+    # (name, indexed fields) of every view, in the order of _view_deltas
+    _view_specs: Tuple[Tuple[str, Tuple[str, ...]], ...] = ()
+    # name of the event -> updates the views of its document
+    _view_updates: Dict[str, Callable[[Any, Dict[str, Any]], None]] = {}
+
+    def __init__(
+        self,
+        address: str,
+        db: Optional[IDB] = None,
+        collection_name: Optional[str] = None,
+    ):
+
+        super().__init__(address, db, collection_name)
+
+        views = [self._add_view(name) for name, _ in self._view_specs]
+        self._view_collection_names = [collection_name for collection_name, _ in views]
+        # * views are only ever written to, never read
+        self._view_deltas = [delta for _, delta in views]
+
+    def load_state(self) -> None:
+        """@inheritdoc ITransformer"""
+
+        # * events are only ever inserted, never read
+        for collection_name, (_, indexes) in zip(
+            self._view_collection_names, self._view_specs
+        ):
+            for field in indexes:
+                self._db.create_index(field, self._db_name, collection_name)
+
+    def _insert(self, document: Dict[str, Any]) -> None:
+        self._delta.insert(document)
+
+        if not self._partitioning:
+            self._view_updates[document["event"]](self, document)
+
+
+def _converter(path: str) -> Callable[[Any], Any]:
+    if path in CONVERTERS:
+        return CONVERTERS[path]
+
+    module_name, _, name = path.rpartition(".")
+    if not module_name:
+        raise ValueError(f"Unknown converter: {path}")
+
+    return getattr(importlib.import_module(module_name), name)
+
+
+def _decoder(decoders: List[EventDecoder], event: str) -> EventDecoder:
+    """
+    Returns:
+        EventDecoder: decoder of the event of that name or signature
+    """
+
+    matches = [
+        decoder for decoder in decoders if event in (decoder.name, decoder.signature)
+    ]
+    if len(matches) != 1:
+        raise ValueError(
+            f"{event} is not exactly one event of {ABI_FILE}, name it by signature"
+        )
+
+    return matches[0]
+
+
+def _event_name(decoders: List[EventDecoder], decoder: EventDecoder) -> str:
+    """
+    Returns:
+        str: name of the event in the documents and the views of the spec, its
+        signature if its name is overloaded in the ABI
+    """
+
+    if sum(other.name == decoder.name for other in decoders) > 1:
+        return decoder.signature
+
+    return decoder.name
+
+
+def _view_update_source(
+    views: Dict[str, Any], event: str, fields: Dict[str, str], indent: str
+) -> List[str]:
+    """
+    Returns:
+        List[str]: lines that update the views of the `document` of the event,
+        by position of the view in self._view_deltas
+    """
+
+    lines = []
+
+    for ix, view in enumerate(views.values()):
+        update = view.get("updates", {}).get(event)
+        if update is None:
+            continue
+
+        key = view["key"]
+        for field in (key, *update.get("set", ())):
+            if field not in fields:
+                raise ValueError(f"{event} has no field: {field}")
+
+        values = [
+            f"{field!r}: document[{field!r}]" for field in update.get("set", ())
+        ] + [
+            f"{field!r}: {value!r}" for field, value in update.get("values", {}).items()
+        ]
+        lines.append(
+            f"{indent}self._view_deltas[{ix}].update(document[{key!r}], "
+            f"{{{', '.join(values)}}}, {tuple(update.get('unset', ()))!r})"
+        )
+
+    return lines
+
+
+def _compile_event(
+    decoder: EventDecoder, name: str, spec: Dict[str, Any], views: Dict[str, Any]
+) -> Tuple[Callable, Callable, Type[SpecEvent]]:
+    """
+    Returns:
+        Tuple[Callable, Callable, Type[SpecEvent]]: handler of the event, update
+        of the views by a document of it, and the type of its documents
+    """
+
+    # * e.g. Transfer_address_uint256_ of Transfer(address,uint256)
+    identifier = re.sub(r"\W", "_", name)
+    params = [param for param, _ in decoder.params]
+    fields: Dict[str, str] = spec["fields"]
+    namespace: Dict[str, Any] = {}
+    items = [
+        "\"_id\": f\"{event['tx_hash']}_{event['log_offset']}\"",
+        f'"event": {name!r}',
+    ]
+    annotations: Dict[str, Any] = {}
+
+    for ix, (field, source) in enumerate(fields.items()):
+        param, _, converter = source.partition(":")
+        if param not in params:
+            raise ValueError(f"{decoder.signature} has no param: {param}")
+
+        value = f"decoded_params[{params.index(param)}]"
+        annotations[field] = Any
+        if converter:
+            convert = _converter(converter)
+            namespace[f"_convert{ix}"] = convert
+            value = f"_convert{ix}({value})"
+            if isinstance(convert, type):
+                annotations[field] = convert
+
+        items.append(f"{field!r}: {value}")
+
+    # * the views are updated inline, rather than through self._insert
+    updates = _view_update_source(views, name, fields, " " * 8)
+    handler_source = "\n".join(
+        [
+            "def handler(self, event, decoded_params):",
+            f"    document = {{{', '.join(items)}}}",
+            "    self._delta.insert(document)",
+            *(["    if not self._partitioning:", *updates] if updates else []),
+        ]
+    )
+    update_source = "\n".join(
+        [
+            "def update(self, document):",
+            *(_view_update_source(views, name, fields, " " * 4) or ["    pass"]),
+        ]
+    )
+
+    handler = compile_function("handler", handler_source, namespace)
+    handler.__name__ = handler.__qualname__ = f"_on_{identifier}"
+    handler = handles(decoder.signature, partition=spec.get("partition"))(handler)
+
+    update = compile_function("update", update_source, {})
+
+    event_type = dto(
+        type(
+            f"{identifier}Event",
+            (SpecEvent,),
+            {
+                "__annotations__": annotations,
+                "__doc__": f"Document of the {name} event.",
+            },
+        )
+    )
+
+    return handler, update, event_type
+
+
+def compile_spec(path: str, module: Optional[str] = None) -> Type[SpecTransformer]:
+    """
+    Compiles a spec.json into a transformer, against the abi.json next to it.
+
+    Args:
+        path (str): path to the spec.json
+        module (Optional[str], optional): module that the transformer is
+        defined in. Defaults to None, i.e. this one.
+
+    Raises:
+        ValueError: if the spec refers to events, params or fields that do
+        not exist
+
+    Returns:
+        Type[SpecTransformer]: the transformer
+    """
+
+    with open(path, "r", encoding="utf-8") as f:
+        spec = json.load(f)
+
+    abi_path = os.path.join(os.path.dirname(path), ABI_FILE)
+    decoders = list(load_abi(abi_path).values())
+    views = spec.get("views", {})
+
+    namespace: Dict[str, Any] = {
+        "__module__": __name__ if module is None else module,
+        "__doc__": f"{spec.get('name', 'Spec')} transformer, compiled from {path}",
+        "_abi_path": abi_path,
+        "state_version": spec.get("version", 0),
+        "_view_specs": tuple(
+            (name, tuple(view.get("indexes", ()))) for name, view in views.items()
+        ),
+        "events": {},
+        "_view_updates": {},
+    }
+
+    for event, event_spec in spec["events"].items():
+        decoder = _decoder(decoders, event)
+        name = _event_name(decoders, decoder)
+        if name in namespace["events"]:
+            raise ValueError(f"{name} is handled more than once")
+
+        handler, update, event_type = _compile_event(decoder, name, event_spec, views)
+        namespace[handler.__name__] = handler
+        namespace["_view_updates"][name] = update
+        namespace["events"][name] = event_type
+
+    return type(spec.get("name", "Transformer"), (SpecTransformer,), namespace)
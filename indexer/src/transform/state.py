@@ -0,0 +1,184 @@
+"""
+Tracks the writes that a transformer made to its in-memory state since the
+last flush, so that flushing costs as much as the delta and not as much as
+the whole state.
+"""
+
+from typing import Any, Dict, List, Sequence, Set, Union
+
+from pymongo import DeleteOne, ReplaceOne, UpdateOne
+
+Operation = Union[UpdateOne, ReplaceOne, DeleteOne]
+
+
+class StateDelta:
+    """
+    Collapses the changes made to the state documents in between two flushes
+    into the minimal set of bulk write operations: one replace per new document,
+    one upsert per changed document and one delete per removed document. New
+    documents are upserted rather than inserted, so that writing them again
+    after a restart does not fail on their '_id'.
+
+    The in-memory state is authoritative, so a $set always wins: setting a field
+    drops the $inc and $unset that were pending on it, and an $inc of a field that
+    is pending a $set is applied to the value being set. Values are only read when
+    the operations are built, so setting a mutable in-memory value once is enough
+    for all of its later mutations to be flushed. A document that is written to
+    after being deleted is replaced, as if it was created from scratch.
+    """
+
+    def __init__(self):
+        self._inserts: List[Dict[str, Any]] = []
+        # _id -> update operator -> field -> operand
+        self._updates: Dict[Any, Dict[str, Dict[str, Any]]] = {}
+        self._deletes: Set[Any] = set()
+
+    def __len__(self) -> int:
+        return (
+            len(self._inserts)
+            + len(self._updates)
+            + len(self._deletes.difference(self._updates))
+        )
+
+    def _update(self, _id: Any) -> Dict[str, Dict[str, Any]]:
+        update = self._updates.get(_id)
+
+        if update is None:
+            update = {"$set": {}, "$unset": {}, "$inc": {}}
+            self._updates[_id] = update
+
+        return update
+
+    def insert(self, document: Dict[str, Any]) -> None:
+        """
+        Records a brand new document.
+
+        Args:
+            document (Dict[str, Any]): document including its '_id'
+        """
+        self._inserts.append(document)
+
+    def inserts(self) -> List[Dict[str, Any]]:
+        """
+        Returns:
+            List[Dict[str, Any]]: documents recorded as new, in insertion order
+        """
+        return self._inserts
+
+    def delete(self, _id: Any) -> None:
+        """
+        Records that the document was removed.
+
+        Args:
+            _id (Any): '_id' of the document
+        """
+        self._updates.pop(_id, None)
+        self._deletes.add(_id)
+
+    def set(self, _id: Any, field: str, value: Any) -> None:
+        """
+        Records that the field of the document is now value.
+
+        Args:
+            _id (Any): '_id' of the document
+            field (str): name of the field
+            value (Any): new value of the field
+        """
+        update = self._update(_id)
+
+        update["$unset"].pop(field, None)
+        update["$inc"].pop(field, None)
+        update["$set"][field] = value
+
+    def unset(self, _id: Any, field: str) -> None:
+        """
+        Records that the field was removed from the document.
+
+        Args:
+            _id (Any): '_id' of the document
+            field (str): name of the field
+        """
+        update = self._update(_id)
+
+        update["$set"].pop(field, None)
+        update["$inc"].pop(field, None)
+        update["$unset"][field] = ""
+
+    def update(
+        self, _id: Any, values: Dict[str, Any], unset: Sequence[str] = ()
+    ) -> None:
+        """
+        Records that the fields of the document are now the values, and that
+        the unset fields were removed from it. Same as a set and an unset per
+        field, in a single call.
+
+        Args:
+            _id (Any): '_id' of the document
+            values (Dict[str, Any]): field -> new value of the field
+            unset (Sequence[str], optional): names of the removed fields.
+            Defaults to ().
+        """
+        update = self._update(_id)
+        sets, unsets, incs = update["$set"], update["$unset"], update["$inc"]
+
+        for field in unset:
+            sets.pop(field, None)
+            incs.pop(field, None)
+            unsets[field] = ""
+
+        for field in values:
+            unsets.pop(field, None)
+            incs.pop(field, None)
+        sets.update(values)
+
+    def inc(self, _id: Any, field: str, amount: Union[int, float]) -> None:
+        """
+        Records that the numeric field of the document grew by amount.
+
+        Args:
+            _id (Any): '_id' of the document
+            field (str): name of the field
+            amount (Union[int, float]): increment, can be negative
+        """
+        update = self._update(_id)
+
+        if field in update["$set"]:
+            update["$set"][field] += amount
+            return
+
+        update["$inc"][field] = update["$inc"].get(field, 0) + amount
+
+    def operations(self) -> List[Operation]:
+        """
+        Returns:
+            List[Operation]: bulk write operations that bring the db in line with
+            the in-memory state. They are independent of each other, so they can
+            be written unordered.
+        """
+
+        operations: List[Operation] = [
+            ReplaceOne({"_id": document["_id"]}, document, upsert=True)
+            for document in self._inserts
+        ]
+
+        for _id in self._deletes.difference(self._updates):
+            operations.append(DeleteOne({"_id": _id}))
+
+        for _id, update in self._updates.items():
+            if _id in self._deletes:
+                document = {"_id": _id, **update["$inc"], **update["$set"]}
+                operations.append(ReplaceOne({"_id": _id}, document, upsert=True))
+                continue
+
+            update = {operator: fields for operator, fields in update.items() if fields}
+
+            if update:
+                operations.append(UpdateOne({"_id": _id}, update, upsert=True))
+
+        return operations
+
+    def clear(self) -> None:
+        """Forgets the recorded changes, after they were written to the db."""
+        self._inserts = []
+        self._updates = {}
+        self._deletes = set()
@@ -0,0 +1,174 @@
+"""
+Keeps the state of a transformer in the db, and only a working set of it in
+memory: up to a budget of documents, the least recently used of which are
+evicted first. A lookup that misses reads the document by its _id, which is
+always indexed.
+
+Writes go back to the db through the transformer's StateDelta, so they are
+committed together with the block height, like any other write. Until then,
+the documents are dirty and are never evicted, or a miss would read them back
+stale: eviction skips over them to the clean documents behind them. The
+memory in use is bounded by the budget plus the documents touched in between
+two checkpoints.
+"""
+
+import os
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Union
+
+from interfaces.idb import IDB
+
+from transform.state import StateDelta
+
+# number of state documents that a store keeps in memory
+STATE_CACHE_ENTRIES = int(os.environ.get("STATE_CACHE_ENTRIES", "100000"))
+
+
+class StateStore:
+    """
+    Cache of the state documents of a collection, by _id, that writes back
+    through a StateDelta.
+    """
+
+    def __init__(
+        self,
+        db: IDB,
+        db_name: str,
+        collection_name: str,
+        delta: StateDelta,
+        max_entries: Optional[int] = None,
+    ):
+        self._db = db
+        self._db_name = db_name
+        self._collection_name = collection_name
+        self._delta = delta
+        self._max_entries = STATE_CACHE_ENTRIES if max_entries is None else max_entries
+
+        # _id -> document, or None if there is no such document. In order of
+        # use, least recent first
+        self._cache: "OrderedDict[Any, Optional[Dict[str, Any]]]" = OrderedDict()
+        self._dirty: Set[Any] = set()
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def load(self) -> None:
+        """Forgets the cached documents, they are read from the db as needed."""
+
+        self._cache.clear()
+        self._dirty.clear()
+
+    def get(self, _id: Any) -> Optional[Dict[str, Any]]:
+        """
+        Args:
+            _id (Any): '_id' of the document
+
+        Returns:
+            Optional[Dict[str, Any]]: the document, None if there is none. Changes
+            to it are not written back, use set and inc instead.
+        """
+
+        if _id in self._cache:
+            self._hits += 1
+            self._cache.move_to_end(_id)
+            return self._cache[_id]
+
+        self._misses += 1
+        document = self._db.get_item(_id, self._db_name, self._collection_name)
+
+        # * room is made first, so the document itself is never evicted
+        self._evict(room=1)
+        self._cache[_id] = document
+
+        return document
+
+    def _write(self, _id: Any, document: Dict[str, Any]) -> None:
+        self._cache[_id] = document
+        self._cache.move_to_end(_id)
+        self._dirty.add(_id)
+        self._evict()
+
+    def insert(self, document: Dict[str, Any]) -> None:
+        """
+        Records a brand new document.
+
+        Args:
+            document (Dict[str, Any]): document including its '_id'
+        """
+
+        self._delta.insert(document)
+        self._write(document["_id"], document)
+
+    def set(self, _id: Any, field: str, value: Any) -> None:
+        """
+        Sets the field of the document, creating the document if need be.
+
+        Args:
+            _id (Any): '_id' of the document
+            field (str): name of the field
+            value (Any): new value of the field
+        """
+
+        document = self.get(_id)
+        if document is None:
+            document = {"_id": _id}
+
+        document[field] = value
+        self._delta.set(_id, field, value)
+        self._write(_id, document)
+
+    def inc(self, _id: Any, field: str, amount: Union[int, float]) -> None:
+        """
+        Increments the numeric field of the document, creating the document if
+        need be.
+
+        Args:
+            _id (Any): '_id' of the document
+            field (str): name of the field
+            amount (Union[int, float]): increment, can be negative
+        """
+
+        document = self.get(_id)
+        if document is None:
+            document = {"_id": _id}
+
+        document[field] = document.get(field, 0) + amount
+        self._delta.inc(_id, field, amount)
+        self._write(_id, document)
+
+    def commit(self) -> None:
+        """
+        Marks the documents as clean, once the delta was written to the db or
+        discarded, and evicts down to the budget.
+        """
+
+        self._dirty.clear()
+        self._evict()
+
+    def _evict(self, room: int = 0) -> None:
+        # * for as long as there is a clean document to evict
+        while len(self._cache) > max(self._max_entries - room, len(self._dirty)):
+            _id = next(iter(self._cache))
+
+            # * skipped until the next commit, behind the clean documents
+            if _id in self._dirty:
+                self._cache.move_to_end(_id)
+                continue
+
+            del self._cache[_id]
+            self._evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns:
+            Dict[str, int]: hits, misses and evictions since the store was
+            created, and the number of documents in memory
+        """
+
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "evictions": self._evictions,
+            "entries": len(self._cache),
+        }
@@ -0,0 +1,120 @@
+"""
+Tail mode: once the history is extracted, the extractor hands the transactions
+that it fetches straight to the transformer, over a bounded queue in the same
+process. The extractor only writes them to the db after the handoff, so
+neither that write nor reading them back from the db stands in between a new
+transaction and the state that it updates.
+"""
+
+import logging
+import queue
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import Config
+from interfaces.idb import IDB
+
+from transform.main import (
+    CHECKPOINT_EVERY_BLOCKS,
+    READ_BATCH_SIZE,
+    SLEEP_TIMER,
+    SNAPSHOT_EVERY_BLOCKS,
+    Transform,
+)
+
+# number of extracted rounds that can wait on the transformer, before the
+# extractor blocks
+HANDOFF_QUEUE_SIZE = 16
+
+# block height after which, and block height up to which the transactions
+# were extracted, and the transactions in ascending order. There are no other
+# transactions in between the two block heights
+Handoff = Tuple[int, int, List[Dict[str, Any]]]
+
+
+class TailTransform(Transform):
+    """
+    @inheritdoc Transform
+
+    Transforms the transactions handed off by the extractor. The db is only read
+    for the transactions extracted before the handoffs started, and whenever
+    nothing is handed off for SLEEP_TIMER seconds.
+    """
+
+    def __init__(
+        self,
+        config: Config,
+        handoff: "queue.Queue[Handoff]",
+        batch_size: int = READ_BATCH_SIZE,
+        checkpoint_every: int = CHECKPOINT_EVERY_BLOCKS,
+        db: Optional[IDB] = None,
+        snapshot_every: int = SNAPSHOT_EVERY_BLOCKS,
+        reload: bool = False,
+        aggregate: bool = False,
+    ):
+        super().__init__(
+            config,
+            batch_size,
+            checkpoint_every,
+            db,
+            snapshot_every,
+            reload=reload,
+            aggregate=aggregate,
+        )
+
+        self._handoff = handoff
+
+    def _receive(self) -> List[Handoff]:
+        """
+        Returns:
+            List[Handoff]: every handoff that is waiting, after waiting for the
+            first one for at most SLEEP_TIMER. Empty if there was none
+        """
+
+        try:
+            handoffs = [self._handoff.get(timeout=SLEEP_TIMER)]
+        except queue.Empty:
+            return []
+
+        while True:
+            try:
+                handoffs.append(self._handoff.get_nowait())
+            except queue.Empty:
+                return handoffs
+
+    def transform(self) -> None:
+        """@inheritdoc ITransform"""
+
+        handoffs = self._receive()
+
+        if len(handoffs) == 0:
+            # * the raw transactions may still have been written by others
+            super().transform()
+            return
+
+        for after_block, up_to_block, txns in handoffs:
+            if up_to_block <= self._block_height:
+                continue
+
+            # * extracted before the handoffs started, or skipped by the
+            # * extractor. Either way, they are in the db by now
+            if after_block > self._block_height:
+                self._transform_transactions(
+                    self._read_raw_transactions(self._block_height, after_block)
+                )
+
+            self._transform_transactions(
+                [txn for txn in txns if txn["block_height"] > self._block_height]
+            )
+
+            # * there are no transactions after the handed off ones, up to
+            # * up_to_block, so the checkpoint moves all the way there
+            self._checkpoint(up_to_block)
+
+        logging.info(f"Transformed {len(handoffs)} handoffs")
+
+    def flush(self) -> None:
+        """@inheritdoc ITransform"""
+
+        # * no sleeping, transform waits on the handoffs
+        self._transformer.flush()
+        self._log_profile()
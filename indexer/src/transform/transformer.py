@@ -0,0 +1,543 @@
+"""
+Shared plumbing of the transformers. Handlers are registered per event with
+the `handles` decorator and keyed by the event's topic0, i.e. the keccak of
+its canonical signature. Routing a log to its handler is then a single dict
+lookup.
+
+A transformer ships the ABI of its contract in an abi.json next to its main.py,
+or names it in _abi_path. The params of the events in there are decoded
+locally, out of the raw log.
+"""
+
+import heapq
+import logging
+import os
+import sys
+import time
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from db import DB
+from extract.normalize import SENDER_LOGS
+from interfaces.idb import IDB
+from interfaces.itransformer import ITransformer
+
+from transform.abi import EventDecoder, event_topic, load_abi
+from transform.covalent import Covalent
+from transform.state import Operation, StateDelta
+from transform.store import StateStore
+
+ABI_FILE = "abi.json"
+# below this many logs of an event, batch decoding is slower than decoding
+# the logs one by one
+BATCH_DECODE_MIN = 32
+
+# * handlers are transformer methods that take the raw log and its decoded
+# * params, which are None for handlers registered with decoded=False
+Handler = Callable[[Any, Dict[str, Any], Optional[List[Any]]], None]
+
+# reads the raw hex word of the partition key out of the topics and data of a log
+PartitionKey = Callable[[Sequence[str], Optional[str]], str]
+# (block_height, log_offset) of the log that a document was inserted for
+MergeKey = Tuple[int, int]
+
+LOG_OFFSET = itemgetter("log_offset")
+MERGE_KEY = itemgetter(0)
+
+
+def handles(
+    signature: str, decoded: bool = True, partition: Optional[str] = None
+) -> Callable[[Handler], Handler]:
+    """
+    Registers the decorated transformer method as the handler of the event.
+
+    Args:
+        signature (str): canonical event signature, e.g. "Transfer(address,address,uint256)"
+        decoded (bool, optional): whether the handler needs the decoded params.
+        Events missing from the transformer's abi.json are decoded by covalent, and
+        their logs that covalent failed to decode are skipped. Defaults to True.
+        partition (Optional[str], optional): name of the param that the logs of
+        the event are partitioned by when transforming in parallel. Logs with the
+        same value of it are handled by the same worker. Defaults to None.
+
+    Returns:
+        Callable[[Handler], Handler]: decorator
+    """
+
+    def decorator(handler: Handler) -> Handler:
+        handler.handles = (event_topic(signature), decoded, partition)
+        return handler
+
+    return decorator
+
+
+class HandlerProfile:
+    """Number of calls to a handler and the total time spent in them."""
+
+    __slots__ = ("calls", "seconds")
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+
+
+class BaseTransformer(ITransformer):
+    """
+    Routes the logs that the watched address emitted to the registered handlers,
+    in log order, and profiles the handlers. State changes are recorded in
+    self._delta, which flush writes to the state collection.
+
+    Transformers whose handlers only ever insert documents, and that declare a
+    partition key for every handled event, can be transformed in parallel: see
+    partition, transform_partition and merge_partitions.
+    """
+
+    # topic0 -> (name of the handler, whether it needs decoded params)
+    _handler_names: Dict[str, Tuple[str, bool]] = {}
+    # topic0 -> decoder of the event, out of the transformer's abi.json
+    _decoders: Dict[str, EventDecoder] = {}
+    # topic0 -> partition key of the event
+    _partition_keys: Dict[str, PartitionKey] = {}
+    # * ABI of transformers that are not defined in a module of their own
+    _abi_path: Optional[str] = None
+    # * bumped whenever the layout of the in-memory state changes
+    state_version = 0
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        abi_path = cls._abi_path or os.path.join(
+            os.path.dirname(sys.modules[cls.__module__].__file__), ABI_FILE
+        )
+        cls._decoders = load_abi(abi_path) if os.path.exists(abi_path) else {}
+
+        cls._handler_names = {}
+        cls._partition_keys = {}
+        for klass in reversed(cls.__mro__):
+            for name, attribute in vars(klass).items():
+                if not hasattr(attribute, "handles"):
+                    continue
+
+                topic, decoded, partition = attribute.handles
+                cls._handler_names[topic] = (name, decoded)
+
+                if partition is None:
+                    continue
+                if topic not in cls._decoders:
+                    raise ValueError(
+                        f"{name} is partitioned by an event not in {ABI_FILE}"
+                    )
+                cls._partition_keys[topic] = cls._decoders[topic].word_of(partition)
+
+    @classmethod
+    def is_partitioned(cls) -> bool:
+        """
+        Returns:
+            bool: whether every handled event declares a partition key, i.e.
+            whether the transformer can be transformed in parallel
+        """
+        return bool(cls._handler_names) and cls._handler_names.keys() == (
+            cls._partition_keys.keys()
+        )
+
+    def __init__(
+        self,
+        address: str,
+        db: Optional[IDB] = None,
+        collection_name: Optional[str] = None,
+    ):
+
+        self._address = address
+        # * covalent lower cases the sender addresses
+        self._sender_addresses = frozenset([address.lower()])
+
+        self._db_name = "ethereum-indexer"
+        self._collection_name = (
+            f"{self._address}-state" if collection_name is None else collection_name
+        )
+
+        # * holds the changes made to the state since the last flush
+        self._delta = StateDelta()
+
+        self._db = DB() if db is None else db
+
+        # collection name -> changes made since the last flush, of the
+        # collections that are kept next to the state collection
+        self._views: Dict[str, StateDelta] = {}
+        # * transformers whose state outgrows memory keep it in stores
+        self._stores: List[StateStore] = []
+        # * workers of a parallel transform only produce inserted documents
+        self._partitioning = False
+
+        # topic0 -> (handler, local decoder, whether it needs decoded params, profile)
+        self._handlers: Dict[
+            str, Tuple[Callable, Optional[EventDecoder], bool, HandlerProfile]
+        ] = {
+            topic: (
+                getattr(self, name),
+                self._decoders.get(topic) if decoded else None,
+                decoded,
+                HandlerProfile(),
+            )
+            for topic, (name, decoded) in self._handler_names.items()
+        }
+
+    def entrypoint(self, txn: Dict[str, Any]) -> None:
+        """@inheritdoc ITransformer"""
+
+        self.entrypoint_batch([txn])
+
+    def entrypoint_batch(self, txns: List[Dict[str, Any]]) -> None:
+        """@inheritdoc ITransformer"""
+
+        routed = self._route(txns)
+
+        for _ in self._dispatch(routed, self._decode(routed)):
+            pass
+
+    def partition(
+        self, txns: List[Dict[str, Any]], partitions: int
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Splits the logs of the transactions by their partition key. The order
+        of the transactions, and of the logs within them, is kept. Logs that
+        are not handled are dropped.
+
+        Args:
+            txns (List[Dict[str, Any]]): raw transactions, in ascending order
+            partitions (int): number of partitions
+
+        Raises:
+            ValueError: if the transformer is not partitioned
+
+        Returns:
+            List[List[Dict[str, Any]]]: raw transactions of every partition
+        """
+
+        if not self.is_partitioned():
+            raise ValueError(f"{type(self).__name__} does not declare partition keys")
+
+        split: List[List[Dict[str, Any]]] = [[] for _ in range(partitions)]
+
+        for txn in txns:
+            # partition -> logs of the transaction in it
+            log_events: Dict[int, List[Dict[str, Any]]] = {}
+
+            for event in self._own_log_events(txn):
+                topics = event["raw_log_topics"]
+                partition_key = self._partition_keys.get(topics[0]) if topics else None
+                if partition_key is None:
+                    continue
+
+                word = partition_key(topics, event["raw_log_data"])
+                log_events.setdefault(hash(word) % partitions, []).append(event)
+
+            for ix, events in log_events.items():
+                split[ix].append(
+                    {
+                        "block_height": txn["block_height"],
+                        "tx_hash": txn["tx_hash"],
+                        "log_events": events,
+                    }
+                )
+
+        return split
+
+    def transform_partition(
+        self, txns: List[Dict[str, Any]]
+    ) -> List[Tuple[MergeKey, Dict[str, Any]]]:
+        """
+        Transforms the transactions of a single partition, without keeping the
+        inserted documents in self._delta.
+
+        Args:
+            txns (List[Dict[str, Any]]): raw transactions of the partition
+
+        Raises:
+            ValueError: if a handler made a write other than an insert
+
+        Returns:
+            List[Tuple[MergeKey, Dict[str, Any]]]: the inserted documents, each
+            with the (block_height, log_offset) of the log it was inserted for
+        """
+
+        routed = self._route(txns)
+        documents = []
+
+        self._partitioning = True
+        try:
+            for event in self._dispatch(routed, self._decode(routed)):
+                inserts = self._delta.inserts()
+                if len(self._delta) != len(inserts):
+                    raise ValueError("Only inserted documents can be merged")
+
+                merge_key = (event["block_height"], event["log_offset"])
+                documents.extend((merge_key, document) for document in inserts)
+                self._clear_delta()
+        finally:
+            self._partitioning = False
+
+        return documents
+
+    def merge_partitions(
+        self, partitions: List[List[Tuple[MergeKey, Dict[str, Any]]]]
+    ) -> None:
+        """
+        Inserts the documents of all partitions in (block_height, log_offset)
+        order, which is the order that the serial transform inserts them in.
+
+        Args:
+            partitions (List[List[Tuple[MergeKey, Dict[str, Any]]]]): results of
+            transform_partition, one per partition
+        """
+
+        for _, document in heapq.merge(*partitions, key=MERGE_KEY):
+            self._insert(document)
+
+    def _insert(self, document: Dict[str, Any]) -> None:
+        """
+        Records a new document. Transformers that keep their documents in
+        memory as well are free to override. So are transformers that maintain
+        views of the inserted documents, unless self._partitioning: the views
+        are maintained as the documents of the partitions are merged back.
+        """
+        self._delta.insert(document)
+
+    def _add_view(self, name: str) -> Tuple[str, StateDelta]:
+        """
+        Adds a collection, {state collection}-{name}, that is written to and
+        committed together with the state collection.
+
+        Returns:
+            Tuple[str, StateDelta]: name of the collection, and the delta to
+            record the changes to it in
+        """
+
+        collection_name = f"{self._collection_name}-{name}"
+        delta = StateDelta()
+        self._views[collection_name] = delta
+
+        return collection_name, delta
+
+    def _add_store(self, collection_name: str, delta: StateDelta) -> StateStore:
+        """
+        Returns:
+            StateStore: store of the collection, that writes back through delta
+        """
+
+        store = StateStore(self._db, self._db_name, collection_name, delta)
+        self._stores.append(store)
+
+        return store
+
+    def _own_log_events(self, txn: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Returns:
+            List[Dict[str, Any]]: logs of the transaction that the watched
+            addresses emitted, in log order
+        """
+
+        sender_logs = txn.get(SENDER_LOGS)
+
+        if sender_logs is None:
+            # * not normalized on extraction: ensures that events are supplied
+            # * in the correct order, and skips the events emitted by contracts
+            # * that are not of interest
+            return [
+                event
+                for event in sorted(txn["log_events"], key=LOG_OFFSET)
+                if event["sender_address"] in self._sender_addresses
+            ]
+
+        log_events = txn["log_events"]
+        # positions of the logs of the watched addresses, ascending
+        positions: Optional[List[int]] = None
+
+        for address in self._sender_addresses:
+            own = sender_logs.get(address)
+            if own is not None:
+                positions = own if positions is None else sorted(positions + own)
+
+        if positions is None:
+            return []
+
+        return [log_events[position] for position in positions]
+
+    def _route(self, txns: List[Dict[str, Any]]) -> List[Tuple[Tuple, Dict]]:
+        """
+        Returns:
+            List[Tuple[Tuple, Dict]]: (handler, log) of every log that has a
+            handler, in the order in which they are to be handled
+        """
+
+        routed = []
+        # * formatting a message per transaction costs more than routing it
+        debug = logging.getLogger().isEnabledFor(logging.DEBUG)
+
+        for txn in txns:
+            if debug:
+                logging.debug(f'Handling transaction at: {txn["block_height"]} block')
+
+            for event in self._own_log_events(txn):
+                topics = event["raw_log_topics"]
+                if not topics:
+                    continue
+
+                handler = self._handlers.get(topics[0])
+                if handler is not None:
+                    routed.append((handler, event))
+
+        return routed
+
+    @staticmethod
+    def _decode(routed: List[Tuple[Tuple, Dict]]) -> List[Optional[List[Any]]]:
+        """
+        Decodes the params of the routed logs. The logs of an event that is in
+        the ABI are decoded locally, all at once when there are enough of them.
+        The rest is left to covalent.
+
+        Returns:
+            List[Optional[List[Any]]]: params of every routed log. None if the
+            handler does not need them, or if covalent failed to decode them.
+        """
+
+        params: List[Optional[List[Any]]] = [None] * len(routed)
+        # decoder -> positions of its logs in routed
+        batches: Dict[EventDecoder, List[int]] = {}
+
+        for ix, ((_, decoder, decoded, _), event) in enumerate(routed):
+            if decoder is not None:
+                batches.setdefault(decoder, []).append(ix)
+            elif decoded and event["decoded"] is not None:
+                params[ix] = Covalent.decode(event)
+
+        for decoder, positions in batches.items():
+            raw_log_topics = [routed[ix][1]["raw_log_topics"] for ix in positions]
+            raw_log_data = [routed[ix][1]["raw_log_data"] for ix in positions]
+
+            if len(positions) < BATCH_DECODE_MIN:
+                decoded_params = list(map(decoder.decode, raw_log_topics, raw_log_data))
+            else:
+                decoded_params = decoder.decode_batch(raw_log_topics, raw_log_data)
+
+            for ix, decoded_params_ in zip(positions, decoded_params):
+                params[ix] = decoded_params_
+
+        return params
+
+    def _dispatch(
+        self, routed: List[Tuple[Tuple, Dict]], params: List[Optional[List[Any]]]
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Calls the handler of every routed log with its decoded params, in order.
+
+        Yields:
+            Iterator[Dict[str, Any]]: every log, right after it was handled
+        """
+
+        debug = logging.getLogger().isEnabledFor(logging.DEBUG)
+
+        for (handler, event), decoded_params in zip(routed, params):
+            handle, _, decoded, profile = handler
+
+            # todo: this is not good.
+            # todo: if this were to happen in an event that pertains to
+            # todo: our address, it would corrupt the state
+            if decoded and decoded_params is None:
+                logging.warning(f"No name for event: {event}")
+                continue
+
+            start = time.perf_counter()
+            handle(event, decoded_params)
+            profile.seconds += time.perf_counter() - start
+            profile.calls += 1
+
+            if debug:
+                logging.debug(event)
+
+            yield event
+
+    def flush(self) -> None:
+        """@inheritdoc ITransformer"""
+
+        # * only the state that changed since the last flush is written
+        for collection_name, operations in self.pending_writes():
+            self._db.bulk_write(operations, self._db_name, collection_name)
+
+        self._clear_delta()
+
+    def pending_writes(self) -> List[Tuple[str, List[Operation]]]:
+        """@inheritdoc ITransformer"""
+
+        return [(self._collection_name, self._delta.operations())] + [
+            (collection_name, delta.operations())
+            for collection_name, delta in self._views.items()
+        ]
+
+    def get_collection_names(self) -> List[str]:
+        """@inheritdoc ITransformer"""
+
+        return [self._collection_name, *self._views]
+
+    def discard(self) -> None:
+        """@inheritdoc ITransformer"""
+
+        self._clear_delta()
+
+    def _clear_delta(self) -> None:
+        """Forgets the delta, once it was written to the db or discarded."""
+
+        self._delta.clear()
+
+        for delta in self._views.values():
+            delta.clear()
+
+        for store in self._stores:
+            store.commit()
+
+    def get_state_version(self) -> int:
+        """@inheritdoc ITransformer"""
+
+        return self.state_version
+
+    def adopt_state(self, previous: ITransformer) -> None:
+        """@inheritdoc ITransformer"""
+
+        # * all of the state, deltas and stores included. The handlers stay
+        # * bound to the reloaded class
+        self.__dict__.update(
+            (name, value)
+            for name, value in vars(previous).items()
+            if name != "_handlers"
+        )
+
+    def set_sender_addresses(self, addresses: List[str]) -> None:
+        """@inheritdoc ITransformer"""
+
+        self._sender_addresses = frozenset(address.lower() for address in addresses)
+
+    def get_handled_topics(self) -> Dict[str, bool]:
+        """@inheritdoc ITransformer"""
+
+        # * the events in the abi are decoded locally, from the raw log
+        return {
+            topic: decoded and topic not in self._decoders
+            for topic, (_, decoded) in self._handler_names.items()
+        }
+
+    def get_store_stats(self) -> Dict[str, int]:
+        """@inheritdoc ITransformer"""
+
+        if not self._stores:
+            return {}
+
+        stats = [store.stats() for store in self._stores]
+        return {key: sum(stat[key] for stat in stats) for key in stats[0]}
+
+    def get_profile(self) -> Dict[str, Tuple[int, float]]:
+        """@inheritdoc ITransformer"""
+
+        return {
+            handle.__name__: (profile.calls, profile.seconds)
+            for handle, _, _, profile in self._handlers.values()
+        }
@@ -5,13 +5,14 @@ Event List: Lent, Rented, Returned, LendingStopped, CollateralClaimed
 """
 
 from abc import ABC
-from dataclasses import asdict, dataclass
 from typing import Union
 
+from transform.dto import dto
+
 ID_SEPERATOR = "_"
 
 
-@dataclass
+@dto
 class AzraelEvent(ABC):
     """
     Abstract azrael Event. Holds txHash and txOffset, togther they are a unique
@@ -35,12 +36,8 @@ class AzraelEvent(ABC):
         """
         return f"{tx_hash}{ID_SEPERATOR}{tx_offset}"
 
-    def to_dict(self):
-        """Return a dict representation of this event"""
-        return asdict(self)
-
 
-@dataclass
+@dto
 class LentEvent(AzraelEvent):
     """
     LentEvent DTO (Data Transfer Object)
@@ -119,7 +116,7 @@ class LentEvent(AzraelEvent):
         )
 
 
-@dataclass
+@dto
 class RentedEvent(AzraelEvent):
     """
     RentedEvent DTO (Data Transfer Object)
@@ -173,7 +170,7 @@ class RentedEvent(AzraelEvent):
         )
 
 
-@dataclass
+@dto
 class ReturnedEvent(AzraelEvent):
     """
     ReturnedEvent DTO (Data Transfer Object)
@@ -218,7 +215,7 @@ class ReturnedEvent(AzraelEvent):
         )
 
 
-@dataclass
+@dto
 class LendingStoppedEvent(AzraelEvent):
     """
     LendingStopped DTO (Data Transfer Object)
@@ -256,7 +253,7 @@ class LendingStoppedEvent(AzraelEvent):
         )
 
 
-@dataclass
+@dto
 class CollateralClaimedEvent(AzraelEvent):
     """
     CollateralClaimed DTO (Data Transfer Object)
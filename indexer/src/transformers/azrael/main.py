@@ -1,8 +1,8 @@
-import logging
-from typing import Any, List
+from typing import Any, Dict, List, Optional, Tuple
 
-from db import DB
-from transform.covalent import Covalent
+from interfaces.idb import IDB
+from transform.price import unpack_price
+from transform.transformer import BaseTransformer, handles
 from transformers.azrael.event import (
     AzraelEvent,
     CollateralClaimedEvent,
@@ -11,13 +11,41 @@ from transformers.azrael.event import (
     RentedEvent,
     ReturnedEvent,
 )
-from transformers.azrael.util import unpack_price
 
-
-# todo: needs to inherit an interface that implements flush
-# todo: every instance should also take the address it transforms
-# todo: as a constructor argument
-class Transformer:
+# status of a lending, in the lendings collection
+LENT = "lent"
+RENTED = "rented"
+STOPPED = "stopped"
+CLAIMED = "claimed"
+
+# event -> (status of the lending after it, fields of the event that the lending
+# takes on, fields that the lending loses)
+LENDING_UPDATES: Dict[str, Tuple[str, Tuple[str, ...], Tuple[str, ...]]] = {
+    "Lent": (
+        LENT,
+        (
+            "nftAddress",
+            "tokenId",
+            "lentAmount",
+            "lendersAddress",
+            "maxRentDuration",
+            "dailyRentPrice",
+            "nftPrice",
+            "isERC721",
+            "paymentToken",
+        ),
+        (),
+    ),
+    "Rented": (RENTED, ("renterAddress", "rentDuration", "rentedAt"), ()),
+    "Returned": (LENT, ("returnedAt",), ("renterAddress", "rentDuration", "rentedAt")),
+    "LendingStopped": (STOPPED, ("stoppedAt",), ()),
+    "CollateralClaimed": (CLAIMED, ("claimedAt",), ()),
+}
+# fields of the lendings collection that are indexed
+LENDING_INDEXES = ("lendersAddress", "renterAddress", "nftAddress", "status")
+
+
+class Transformer(BaseTransformer):
     """
     ReNFT Azrael Transformer
 
@@ -27,108 +55,53 @@ class Transformer:
     be reconstructed off-chain.
 
     Azrael Events of interest are: Lent, Rented, Returned, LendingStopped, CollateralClaimed
-    """
-
-    def __init__(self, address: str):
-
-        self._address = address
-
-        self._transformed = []
-
-        self._db_name = "ethereum-indexer"
-        self._collection_name = f"{self._address}-state"
-        self._events_of_interest = [
-            "Rented",
-            "Lent",
-            "CollateralClaimed",
-            "LendingStopped",
-            "Returned",
-        ]
-
-        self._flush_state = False
-
-        self._db = DB()
-
-    # todo: type that returns transformed transaction
-    # TODO: documentation
-    def entrypoint(self, txn) -> None:
-        """_summary_
 
-        Args:
-            txn (_type_): _description_
-        """
-
-        # 1. check if there is state in the db
-        # 2. if there is state in the db, update memory with it
-        self.update_memory_state()
-
-        # routes and performs any additional logic
-        logging.info(f'Handling transaction at: {txn["block_height"]} block')
-
-        log_events = txn["log_events"]
-        # * ensures that events are supplied in the correct order
-        log_events = sorted(log_events, key=lambda x: x["log_offset"])
-
-        for event in log_events:
-
-            # * means the event was emitted by a contract that is
-            # * not of interest
-            if event["sender_address"] != self._address.lower():
-                continue
-
-            # todo: this is not good.
-            # todo: if this were to happen in an event that pertains to
-            # todo: our address, it would corrupt the state
-            if event["decoded"] is None:
-                logging.warning(f"No name for event: {event}")
-                continue
+    Next to the events, the current state of every lending is kept in the
+    {state collection}-lendings collection, one document per lendingId, which
+    every event updates in place.
+    """
 
-            # events: Rented, Lent, CollateralClaimed, LendingStopped, Returned
-            if event["decoded"]["name"] in self._events_of_interest:
-                decoded_params = Covalent.decode(event)
+    def __init__(
+        self,
+        address: str,
+        db: Optional[IDB] = None,
+        collection_name: Optional[str] = None,
+    ):
 
-                if event["decoded"]["name"] == "Rented":
-                    self._on_rented(event, decoded_params)
-                elif event["decoded"]["name"] == "Lent":
-                    self._on_lent(event, decoded_params)
-                elif event["decoded"]["name"] == "Returned":
-                    self._on_returned(event, decoded_params)
-                elif event["decoded"]["name"] == "LendingStopped":
-                    self._on_lending_stopped(event, decoded_params)
-                elif event["decoded"]["name"] == "CollateralClaimed":
-                    self._on_collateral_claim(event, decoded_params)
+        super().__init__(address, db, collection_name)
 
-            logging.info(event)
+        # * events are only ever inserted, and lendings only ever written to.
+        # * Neither is read
+        self._lendings_collection_name, self._lendings = self._add_view("lendings")
 
-        self._flush_state = True
+    def load_state(self) -> None:
+        """@inheritdoc ITransformer"""
 
-    # todo: should be part of the interface
-    # todo: acts as the means to sync with db state
-    def update_memory_state(self) -> None:
-        """_summary_"""
+        for field in LENDING_INDEXES:
+            self._db.create_index(field, self._db_name, self._lendings_collection_name)
 
-        if len(self._transformed) > 0:
-            return
+    def _add_transformed(self, event: AzraelEvent) -> None:
+        self._insert(event.to_dict())
 
-        state = self._db.get_all_items(self._db_name, self._collection_name)
+    def _insert(self, document: Dict[str, Any]) -> None:
+        super()._insert(document)
 
-        if state is None:
-            return
+        if not self._partitioning:
+            self._update_lending(document)
 
-        self._transformed = state
+    def _update_lending(self, event: Dict[str, Any]) -> None:
+        status, fields, dropped = LENDING_UPDATES[event["event"]]
+        lending_id = event["lendingId"]
 
-    # todo: should be part of the interface
-    def flush(self) -> None:
-        """_summary_"""
+        for field in fields:
+            self._lendings.set(lending_id, field, event[field])
 
-        if self._flush_state:
-            # * write to the db
-            self._db.put_items(self._transformed, self._db_name, self._collection_name)
-            self._flush_state = False
+        for field in dropped:
+            self._lendings.unset(lending_id, field)
 
-    def _add_transformed(self, event: AzraelEvent) -> None:
-        self._transformed.append(event.to_dict())
+        self._lendings.set(lending_id, "status", status)
 
+    @handles("CollateralClaimed(uint256,uint32)", partition="lendingId")
     def _on_collateral_claim(self, event: Any, decoded_params: List[Any]) -> None:
         # CollateralClaimed(indexed uint256 lendingId, uint32 claimedAt)
 
@@ -141,6 +114,7 @@ class Transformer:
 
         self._add_transformed(event)
 
+    @handles("LendingStopped(uint256,uint32)", partition="lendingId")
     def _on_lending_stopped(self, event: Any, decoded_params: List[Any]) -> None:
         # LendingStopped(indexed uint256 lendingId, uint32 stoppedAt)
 
@@ -153,6 +127,7 @@ class Transformer:
 
         self._add_transformed(event)
 
+    @handles("Returned(uint256,uint32)", partition="lendingId")
     def _on_returned(self, event: Any, decoded_params: List[Any]) -> None:
         # Returned(indexed uint256 lendingId, uint32 returnedAt)
 
@@ -165,6 +140,7 @@ class Transformer:
 
         self._add_transformed(event)
 
+    @handles("Rented(uint256,address,uint8,uint32)", partition="lendingId")
     def _on_rented(self, event: Any, decoded_params: List[Any]) -> None:
         # Rented(uint256 lendingId, indexed address renterAddress, uint8 rentDuration,
         # uint32 rentedAt)
@@ -181,6 +157,10 @@ class Transformer:
         self._add_transformed(event)
 
     # TODO: typing for event
+    @handles(
+        "Lent(address,uint256,uint8,uint256,address,uint8,bytes4,bytes4,bool,uint8)",
+        partition="lendingId",
+    )
     def _on_lent(self, event: Any, decoded_params: List[Any]) -> None:
         # Lent(indexed address nftAddress, indexed uint256 tokenId, uint8 lentAmount,
         # uint256 lendingId, indexed address lenderAddress, uint8 maxRentDuration,
@@ -190,7 +170,7 @@ class Transformer:
             tx_hash=event["tx_hash"],
             log_offset=event["log_offset"],
             nft_address=decoded_params[0],
-            token_id=decoded_params[1],
+            token_id=str(decoded_params[1]),
             lent_amount=int(decoded_params[2]),
             lending_id=int(decoded_params[3]),
             lender_address=decoded_params[4],
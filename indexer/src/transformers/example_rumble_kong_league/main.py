@@ -1,116 +1,110 @@
 import logging
+from typing import Any, Dict, List, Optional, Set
 
-from db import DB
-from transform.covalent import Covalent
+from interfaces.idb import IDB
+from transform.transformer import BaseTransformer, handles
 
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
 
-# todo: needs to inherit an interface that implements flush
-# todo: every instance should also take the address it transforms
-# todo: as a constructor argument
-class Transformer:
-    """RKL Kong Holder Transformer"""
 
-    def __init__(self, address: str):
+class Transformer(BaseTransformer):
+    """
+    RKL Kong Holder Transformer
 
-        self._address = address
+    State is one {"_id": token id, "owner": address} document per kong, with
+    an index on owner. In memory, the same is held as token id -> owner and as
+    owner -> token ids, such that every transfer is O(1).
+    """
 
-        self._transformed = {"_id": 1}
+    def __init__(
+        self,
+        address: str,
+        db: Optional[IDB] = None,
+        collection_name: Optional[str] = None,
+    ):
 
-        self._db_name = "ethereum-indexer"
-        self._collection_name = f"{self._address}-state"
-        self._events_of_interest = ["Transfer"]
+        super().__init__(address, db, collection_name)
 
-        self._flush_state = False
+        self._owners: Dict[int, str] = {}
+        self._holdings: Dict[str, Set[int]] = {}
 
-        self._db = DB()
+    def load_state(self) -> None:
+        """@inheritdoc ITransformer"""
 
-    # todo: type that returns transformed transaction
-    # TODO: documentation
-    def entrypoint(self, txn) -> None:
-        """_summary_
+        self._db.create_index("owner", self._db_name, self._collection_name)
 
-        Args:
-            txn (_type_): _description_
-        """
+        for document in self._db.iter_items(self._db_name, self._collection_name):
+            if "owner" not in document:
+                self._migrate_holders_document(document)
+                continue
 
-        # 1. check if there is state in the db
-        # 2. if there is state in the db, update memory with it
-        self.update_memory_state()
+            self._transfer(document["_id"], document["owner"])
 
-        # routes and performs any additional logic
-        logging.info(f'Handling transaction at: {txn["block_height"]} block')
+    def dump_state(self) -> List[Dict[str, Any]]:
+        """@inheritdoc ITransformer"""
 
-        log_events = txn["log_events"]
-        # * ensures that events are supplied in the correct order
-        log_events = sorted(log_events, key=lambda x: x["log_offset"])
+        return [
+            {"_id": token_id, "owner": owner}
+            for token_id, owner in self._owners.items()
+        ]
 
-        for event in log_events:
+    def restore_state(self, documents: List[Dict[str, Any]]) -> None:
+        """@inheritdoc ITransformer"""
 
-            # * means the event was emitted by a contract that is
-            # * not of interest
-            if event["sender_address"] != self._address.lower():
-                continue
+        self._db.create_index("owner", self._db_name, self._collection_name)
 
-            # todo: this is not good.
-            # todo: if this were to happen in an event that pertains to
-            # todo: our address, it would corrupt the state
-            if event["decoded"] is None:
-                logging.warning(f"No name for event: {event}")
-                continue
+        self._owners = {}
+        self._holdings = {}
 
-            if event["decoded"]["name"] in self._events_of_interest:
-                decoded_params = Covalent.decode(event)
-                if event["decoded"]["name"] == "Transfer":
-                    from_, to, value = (
-                        decoded_params[0],
-                        decoded_params[1],
-                        decoded_params[2],
-                    )
-                    self._on_transfer(from_, to, value)
+        for document in documents:
+            self._transfer(document["_id"], document["owner"])
 
-            logging.info(event)
+    def _migrate_holders_document(self, document: Dict) -> None:
+        """
+        State used to be a single {"_id": 1, address: [token ids]} document. Its
+        holders are moved to per kong documents on the next flush, and the
+        document itself is deleted, unless kong 1 takes its place.
+        """
 
-        self._flush_state = True
+        # * before the kongs are set, so that kong 1 replaces the document
+        self._delta.delete(document["_id"])
 
-    # todo: should be part of the interface
-    # todo: acts as the means to sync with db state
-    def update_memory_state(self) -> None:
-        """_summary_"""
+        for address, token_ids in document.items():
+            if address == "_id":
+                continue
 
-        state = self._db.get_any_item(self._db_name, self._collection_name)
+            for token_id in token_ids:
+                self._transfer(int(token_id), address)
+                self._delta.set(int(token_id), "owner", address)
 
-        if state is None:
-            return
+    def _transfer(self, token_id: int, to_: str) -> None:
+        from_ = self._owners.get(token_id)
 
-        self._transformed = state
+        if from_ is not None:
+            holding = self._holdings[from_]
+            holding.discard(token_id)
 
-    # todo: should be part of the interface
-    def flush(self) -> None:
-        """_summary_"""
+            if len(holding) == 0:
+                del self._holdings[from_]
 
-        if self._flush_state:
-            # * write to the db
-            self._db.put_item(self._transformed, self._db_name, self._collection_name)
-            self._flush_state = False
+        self._owners[token_id] = to_
+        self._holdings.setdefault(to_, set()).add(token_id)
 
-    def _on_transfer(self, from_, to_, value_) -> None:
+    @handles("Transfer(address,address,uint256)")
+    def _on_transfer(self, _event: Any, decoded_params: List[Any]) -> None:
         # Transfer(indexed address from, indexed address to, uint256 value)
 
-        # todo: make this a constant somewhere
-        if from_ != "0x0000000000000000000000000000000000000000":
-            prev = self._transformed[from_]
-            prev.remove(value_)
+        from_, to_, token_id = (
+            decoded_params[0],
+            decoded_params[1],
+            int(decoded_params[2]),
+        )
 
-            if len(prev) == 0:
-                del self._transformed[from_]
-            else:
-                self._transformed[from_] = prev
+        if from_ != ZERO_ADDRESS and self._owners.get(token_id) != from_:
+            logging.warning(f"Kong {token_id} is not held by {from_}")
 
-        if to_ in self._transformed:
-            self._transformed[to_].append(value_)
-        else:
-            self._transformed[to_] = [value_]
+        self._transfer(token_id, to_)
+        self._delta.set(token_id, "owner", to_)
 
 
-# todo: do not save empty lists
 # todo: block height state is incorrect
@@ -1,139 +1,85 @@
-import logging
+from typing import Any, Dict, List, Optional
 
-from db import DB
-from eth_abi import decode_single
+from interfaces.idb import IDB
+from transform.transformer import BaseTransformer, handles
 
 # ! this code is taken from: https://github.com/rumble-kong-league/club-nft-auction
 # ! they should be exactly the same
 
-PLACE_BID_EVENT = "0xe694ab314354b7ccad603c48b44dce6ade8b6a57cbebaa8842edd9a2fb2856f8"
 
+class Transformer(BaseTransformer):
+    """
+    RKL Club Auction Transformer
 
-# todo: needs to inherit an interface that implements flush
-# todo: every instance should also take the address it transforms
-# todo: as a constructor argument
-class Transformer:
-    """RKL Club Auction Transformer"""
+    State is one {"_id": bidder, "total": amount} document per bidder, with an
+    index on total to serve the top bidders. Bids placed in between two flushes
+    are collapsed into a single $inc upsert per bidder.
+    """
 
-    def __init__(self, address: str):
+    def __init__(
+        self,
+        address: str,
+        db: Optional[IDB] = None,
+        collection_name: Optional[str] = None,
+    ):
 
-        self._address = address
+        super().__init__(address, db, collection_name)
 
-        self._transformed = {"_id": 1}
+        self._totals: Dict[str, float] = {}
 
-        self._db_name = "ethereum-indexer"
-        self._collection_name = f"{self._address}-state"
-
-        self._flush_state = False
-
-        self._db = DB()
-
-    @staticmethod
-    def hexstring_to_bytes(hexstring: str) -> bytes:
-        """
-        Casts the hexstring to bytes.
-
-        Args:
-            hexstring (str): hexstring to conver to bytes
-
-        Raises:
-            ValueError: if hexstring does not start with 0x
-
-        Returns:
-            bytes: bytes value of the hexstring
+    def load_state(self) -> None:
         """
-        if not hexstring.startswith("0x"):
-            raise ValueError("Not a hexstring")
-
-        return bytes.fromhex(hexstring[2:])
-
-    # todo: txn dataclass
-    # TODO: documentation
-    def entrypoint(self, txn):
-        """
-        Main entrypoint for transforming the raw data. Responsible
-        for routing the events into the correct handlers.
-
-        Args:
-            txn (_type_): _description_
+        If the script was cancelled previously, this pulls the latest
+        transformed state from the db.
         """
 
-        # 1. check if there is state in the db
-        # 2. if there is state in the db, update memory with it
-        self.update_memory_state()
+        self._db.create_index("total", self._db_name, self._collection_name)
 
-        # routes and performs any additional logic
-        logging.info(f'Handling transaction at: {txn["block_height"]} block')
-
-        log_events = txn["log_events"]
-        # * ensures that events are supplied in the correct order
-        log_events = sorted(log_events, key=lambda x: x["log_offset"])
-
-        for event in log_events:
-
-            # * means the event was emitted by a contract that is
-            # * not of interest
-            if event["sender_address"] != self._address.lower():
+        for document in self._db.iter_items(self._db_name, self._collection_name):
+            if "total" not in document:
+                self._migrate_bids_document(document)
                 continue
 
-            # In the case of kovan testing, none of the transaction / event
-            # details were decoded. So they must be decoded manually.
+            self._totals[document["_id"]] = document["total"]
 
-            # example of a possible event
-            # [
-            #     '0xe694ab314354b7ccad603c48b44dce6ade8b6a57cbebaa8842edd9a2fb2856f8',
-            #     '0x000000000000000000000000000000724350d0b24747bd816dc5031acb7efe0b',
-            #     '0x000000000000000000000000000000000000000000000000002bd72a24874000'
-            # ]
+    def dump_state(self) -> List[Dict[str, Any]]:
+        """@inheritdoc ITransformer"""
 
-            if event["raw_log_topics"][0] != PLACE_BID_EVENT:
-                continue
+        return [
+            {"_id": bidder, "total": total} for bidder, total in self._totals.items()
+        ]
 
-            bidder = decode_single(
-                "address", self.hexstring_to_bytes(event["raw_log_topics"][1])
-            )
-            # * since the price is always ether, diving by 1e18 here
-            price = decode_single(
-                "uint256", self.hexstring_to_bytes(event["raw_log_topics"][2])
-            )
-            price /= 1e18
+    def restore_state(self, documents: List[Dict[str, Any]]) -> None:
+        """@inheritdoc ITransformer"""
 
-            self._on_place_bid(bidder, price)
+        self._db.create_index("total", self._db_name, self._collection_name)
 
-            logging.info(event)
+        self._totals = {document["_id"]: document["total"] for document in documents}
 
-        self._flush_state = True
-
-    # todo: should be part of the interface
-    # todo: acts as the means to sync with db state
-    def update_memory_state(self) -> None:
+    def _migrate_bids_document(self, document: Dict) -> None:
         """
-        If the script was cancelled previously, this pulls the latest
-        transformed state from the db.
+        State used to be a single {"_id": 1, bidder: total} document. Its
+        bidders are moved to per bidder documents on the next flush.
         """
 
-        state = self._db.get_any_item(self._db_name, self._collection_name)
+        self._delta.delete(document["_id"])
 
-        if state is None:
-            return
-
-        self._transformed = state
-
-    # todo: should be part of the interface
-    def flush(self) -> None:
-        """
-        Write the transformed state to the db.
-        """
+        for bidder, total in document.items():
+            if bidder == "_id":
+                continue
 
-        if self._flush_state:
-            # * write to the db
-            self._db.put_item(self._transformed, self._db_name, self._collection_name)
-            self._flush_state = False
+            self._totals[bidder] = total
+            self._delta.set(bidder, "total", total)
 
-    def _on_place_bid(self, bidder: str, price: float) -> None:
+    # * in the case of kovan testing, none of the transaction / event
+    # * details were decoded by covalent. abi.json decodes them.
+    @handles("PlaceBid(address,uint256)")
+    def _on_place_bid(self, _event: Any, decoded_params: List[Any]) -> None:
         # PlaceBid(address indexed bidder, uint256 indexed price)
 
-        if bidder in self._transformed:
-            self._transformed[bidder] += price
-        else:
-            self._transformed[bidder] = price
+        bidder = decoded_params[0]
+        # * since the price is always ether, diving by 1e18 here
+        price = decoded_params[1] / 1e18
+
+        self._totals[bidder] = self._totals.get(bidder, 0) + price
+        self._delta.inc(bidder, "total", price)
@@ -6,12 +6,14 @@ Event List: Lend, Rent, StopRent, StopLend, RentClaimed
 
 import re
 from abc import ABC
-from dataclasses import asdict, dataclass
 from typing import Any, List, Union
 
-ID_SEPERATOR='_'
+from transform.dto import dto
 
-@dataclass
+ID_SEPERATOR = "_"
+
+
+@dto
 class SylvesterEvent(ABC):
     """
     Abstract sylvester Event. Holds txHash and txOffset, togther they are a unique
@@ -21,11 +23,10 @@ class SylvesterEvent(ABC):
     _id: str
     event: str
 
-
     @staticmethod
     def get_id(tx_hash: str, tx_offset: Union[str, int]) -> str:
         """Creates unique identifier for Sylvester Event
-        
+
         Args:
             tx_hash (str): transaction hash
             tx_offset (Union[str, int]): transaction offset
@@ -36,12 +37,8 @@ class SylvesterEvent(ABC):
         """
         return f"{tx_hash}{ID_SEPERATOR}{tx_offset}"
 
-    def to_dict(self):
-        """Return a dict representation of this event"""
-        return asdict(self)
-
 
-@dataclass
+@dto
 class LendEvent(SylvesterEvent):
     """
     LendEvent DTO (Data Transfer Object)
@@ -60,9 +57,8 @@ class LendEvent(SylvesterEvent):
     lendAmount: int
     paymentToken: int
 
-
-    #TODO: Typing for event parameters
-    #pylint: disable=too-many-arguments
+    # TODO: Typing for event parameters
+    # pylint: disable=too-many-arguments
     @classmethod
     def create(
         cls,
@@ -76,7 +72,7 @@ class LendEvent(SylvesterEvent):
         max_rent_duration: int,
         daily_rent_price: int,
         lend_amount: int,
-        payment_token: int
+        payment_token: int,
     ):
         """
         Factory method for 'Lend' sylvester event.
@@ -103,7 +99,7 @@ class LendEvent(SylvesterEvent):
 
         return cls(
             _id=_id,
-            event='Lend',
+            event="Lend",
             is721=is_721,
             lenderAddress=lender_address,
             nftAddress=nft_address,
@@ -116,7 +112,7 @@ class LendEvent(SylvesterEvent):
         )
 
 
-@dataclass
+@dto
 class RentEvent(SylvesterEvent):
     """
     RentEvent DTO (Data Transfer Object)
@@ -132,9 +128,10 @@ class RentEvent(SylvesterEvent):
     rentingID: int
     rentedAt: int
 
-   #TODO: Typing for event parameters
+    # TODO: Typing for event parameters
     @classmethod
-    def create(cls, 
+    def create(
+        cls,
         tx_hash: str,
         log_offset: Union[str, int],
         lending_id: int,
@@ -142,8 +139,8 @@ class RentEvent(SylvesterEvent):
         renting_id: int,
         rent_amount: int,
         rent_duration: int,
-        rented_at: int
-        ):
+        rented_at: int,
+    ):
         """
         Factory method for 'Rent' sylvester event.
 
@@ -165,17 +162,17 @@ class RentEvent(SylvesterEvent):
 
         return cls(
             _id=_id,
-            event='Rent',
+            event="Rent",
             renterAddress=renter_address,
             lendingID=lending_id,
             rentingID=renting_id,
             rentAmount=rent_amount,
             rentDuration=rent_duration,
-            rentedAt=rented_at
+            rentedAt=rented_at,
         )
 
 
-@dataclass
+@dto
 class StopRentEvent(SylvesterEvent):
     """
     StopRentEvent DTO (Data Transfer Object)
@@ -187,9 +184,11 @@ class StopRentEvent(SylvesterEvent):
     rentingID: int
     stoppedAt: int
 
-    #TODO: Typing for event parameters
+    # TODO: Typing for event parameters
     @classmethod
-    def create(cls, tx_hash: str, log_offset: Union[str, int], renting_id: int, stopped_at: int):
+    def create(
+        cls, tx_hash: str, log_offset: Union[str, int], renting_id: int, stopped_at: int
+    ):
         """
         Factory method for 'StopRent' sylvester event.
 
@@ -208,13 +207,13 @@ class StopRentEvent(SylvesterEvent):
 
         return cls(
             _id=_id,
-            event='StopRent',
+            event="StopRent",
             rentingID=renting_id,
             stoppedAt=stopped_at,
         )
 
 
-@dataclass
+@dto
 class StopLendEvent(SylvesterEvent):
     """
     StopLendEvent DTO (Data Transfer Object)
@@ -226,9 +225,11 @@ class StopLendEvent(SylvesterEvent):
     lendingID: int
     stoppedAt: int
 
-   #TODO: Typing for event parameters
+    # TODO: Typing for event parameters
     @classmethod
-    def create(cls, tx_hash: str, log_offset: Union[str, int], lending_id: int, stopped_at: int):
+    def create(
+        cls, tx_hash: str, log_offset: Union[str, int], lending_id: int, stopped_at: int
+    ):
         """
         Factory method for 'StopLend' sylvester event.
 
@@ -247,13 +248,13 @@ class StopLendEvent(SylvesterEvent):
 
         return cls(
             _id=_id,
-            event='StopLend',
+            event="StopLend",
             lendingID=lending_id,
             stoppedAt=stopped_at,
         )
 
 
-@dataclass
+@dto
 class RentClaimedEvent(SylvesterEvent):
     """
     RentClaimedEvent DTO (Data Transfer Object)
@@ -265,9 +266,15 @@ class RentClaimedEvent(SylvesterEvent):
     rentingID: int
     collectedAt: int
 
-   #TODO: Typing for event parameters
+    # TODO: Typing for event parameters
     @classmethod
-    def create(cls, tx_hash: str, log_offset: Union[str, int], renting_id: int, collected_at: int):
+    def create(
+        cls,
+        tx_hash: str,
+        log_offset: Union[str, int],
+        renting_id: int,
+        collected_at: int,
+    ):
         """
         Factory method for 'RentClaimed' sylvester event.
 
@@ -286,7 +293,7 @@ class RentClaimedEvent(SylvesterEvent):
 
         return cls(
             _id=_id,
-            event='RentClaimed',
+            event="RentClaimed",
             rentingID=renting_id,
             collectedAt=collected_at,
         )
@@ -1,8 +1,9 @@
 import logging
-from typing import Any, List
+from typing import Any, Dict, List, Optional
 
-from db import DB
-from transform.covalent import Covalent
+from interfaces.idb import IDB
+from transform.price import unpack_price
+from transform.transformer import BaseTransformer, handles
 from transformers.sylvester.event import (
     LendEvent,
     RentClaimedEvent,
@@ -11,13 +12,41 @@ from transformers.sylvester.event import (
     StopRentEvent,
     SylvesterEvent,
 )
-from transformers.sylvester.util import unpack_price
+
+# status of a lending, in the lendings collection
+LENT = "lent"
+RENTED = "rented"
+STOPPED = "stopped"
+# status of a renting, in the rentings collection. A renting that is over was
+# either returned by the renter, or claimed by the lender
+RETURNED = "returned"
+CLAIMED = "claimed"
+
+# fields of the Lend event that the lending takes on
+LENDING_FIELDS = (
+    "is721",
+    "lenderAddress",
+    "nftAddress",
+    "tokenID",
+    "maxRentDuration",
+    "dailyRentPrice",
+    "lendAmount",
+    "paymentToken",
+)
+# fields of the Rent event that the renting takes on
+RENTING_FIELDS = (
+    "lendingID",
+    "renterAddress",
+    "rentAmount",
+    "rentDuration",
+    "rentedAt",
+)
+# fields of the lendings and the rentings collections that are indexed
+LENDING_INDEXES = ("lenderAddress", "nftAddress", "status")
+RENTING_INDEXES = ("renterAddress", "nftAddress", "lendingID", "status")
 
 
-# todo: needs to inherit an interface that implements flush
-# todo: every instance should also take the address it transforms
-# todo: as a constructor argument
-class Transformer:
+class Transformer(BaseTransformer):
     """
     ReNFT Sylvester Transformer
 
@@ -27,108 +56,117 @@ class Transformer:
     be reconstructed off-chain.
 
     Sylvester Events of interest are: Lend, Rent, StopRent, StopLend, RentClaimed
-    """
-
-    def __init__(self, address: str):
 
-        self._address = address
-
-        self._transformed = []
+    Next to the events, the current state of every lending and of every renting
+    is kept in the {state collection}-lendings and {state collection}-rentings
+    collections, one document per lendingID and per rentingID, which every
+    event updates in place. A lending of more than one NFT can be rented out by
+    more than one renting at once, its rentedAmount is the sum of theirs.
+    """
 
-        self._db_name = "ethereum-indexer"
-        self._collection_name = f"{self._address}-state"
-        self._events_of_interest = [
-            "Lend",
-            "Rent",
-            "StopLend",
-            "StopRent",
-            "RentClaimed",
+    def __init__(
+        self,
+        address: str,
+        db: Optional[IDB] = None,
+        collection_name: Optional[str] = None,
+    ):
+
+        super().__init__(address, db, collection_name)
+
+        # * events are only ever inserted, straight into the delta. A renting
+        # * is over on events that only hold its rentingID, from which both the
+        # * renting and its lending are looked up, in the db if need be
+        lendings_collection_name, lendings_delta = self._add_view("lendings")
+        self._lendings = self._add_store(lendings_collection_name, lendings_delta)
+        rentings_collection_name, rentings_delta = self._add_view("rentings")
+        self._rentings = self._add_store(rentings_collection_name, rentings_delta)
+
+        self._indexes = [
+            (lendings_collection_name, LENDING_INDEXES),
+            (rentings_collection_name, RENTING_INDEXES),
         ]
 
-        self._flush_state = False
-
-        self._db = DB()
-
-    # todo: type that returns transformed transaction
-    # TODO: documentation
-    def entrypoint(self, txn) -> None:
-        """_summary_
-
-        Args:
-            txn (_type_): _description_
-        """
+    def load_state(self) -> None:
+        """@inheritdoc ITransformer"""
 
-        # 1. check if there is state in the db
-        # 2. if there is state in the db, update memory with it
-        self.update_memory_state()
+        for store in (self._lendings, self._rentings):
+            store.load()
 
-        # routes and performs any additional logic
-        logging.info(f'Handling transaction at: {txn["block_height"]} block')
+        for collection_name, fields in self._indexes:
+            for field in fields:
+                self._db.create_index(field, self._db_name, collection_name)
 
-        log_events = txn["log_events"]
-        # * ensures that events are supplied in the correct order
-        log_events = sorted(log_events, key=lambda x: x["log_offset"])
-
-        for event in log_events:
-
-            # * means the event was emitted by a contract that is
-            # * not of interest
-            if event["sender_address"] != self._address.lower():
-                continue
-
-            # todo: this is not good.
-            # todo: if this were to happen in an event that pertains to
-            # todo: our address, it would corrupt the state
-            if event["decoded"] is None:
-                logging.warning(f"No name for event: {event}")
-                continue
+    def _add_transformed(self, event: SylvesterEvent) -> None:
+        self._insert(event.to_dict())
 
-            # events: Rented, Lent, CollateralClaimed, LendingStopped, Returned
-            if event["decoded"]["name"] in self._events_of_interest:
-                decoded_params = Covalent.decode(event)
+    def _insert(self, document: Dict[str, Any]) -> None:
+        super()._insert(document)
 
-                if event["decoded"]["name"] == "Lend":
-                    self._on_lend(event, decoded_params)
-                elif event["decoded"]["name"] == "Rent":
-                    self._on_rent(event, decoded_params)
-                elif event["decoded"]["name"] == "StopLend":
-                    self._on_stop_lend(event, decoded_params)
-                elif event["decoded"]["name"] == "StopRent":
-                    self._on_stop_rent(event, decoded_params)
-                elif event["decoded"]["name"] == "RentClaimed":
-                    self._on_rent_claimed(event, decoded_params)
+        if self._partitioning:
+            return
 
-            logging.info(event)
+        event = document["event"]
+
+        if event == "Lend":
+            self._on_lent(document)
+        elif event == "Rent":
+            self._on_rented(document)
+        elif event == "StopLend":
+            self._lendings.set(document["lendingID"], "status", STOPPED)
+            self._lendings.set(
+                document["lendingID"], "stoppedAt", document["stoppedAt"]
+            )
+        elif event == "StopRent":
+            self._on_renting_over(document, RETURNED, "stoppedAt")
+        elif event == "RentClaimed":
+            self._on_renting_over(document, CLAIMED, "collectedAt")
+
+    def _on_lent(self, event: Dict[str, Any]) -> None:
+        lending_id = event["lendingID"]
+
+        for field in LENDING_FIELDS:
+            self._lendings.set(lending_id, field, event[field])
+
+        self._lendings.set(lending_id, "rentedAmount", 0)
+        self._lendings.set(lending_id, "status", LENT)
+
+    def _on_rented(self, event: Dict[str, Any]) -> None:
+        renting_id, lending_id = event["rentingID"], event["lendingID"]
+
+        for field in RENTING_FIELDS:
+            self._rentings.set(renting_id, field, event[field])
+        self._rentings.set(renting_id, "status", RENTED)
+
+        lending = self._lendings.get(lending_id)
+        if lending is None:
+            logging.warning(f"Rented lending {lending_id} was never lent")
+            return
 
-        self._flush_state = True
+        self._rentings.set(renting_id, "nftAddress", lending["nftAddress"])
+        self._lendings.inc(lending_id, "rentedAmount", event["rentAmount"])
+        self._lendings.set(lending_id, "status", RENTED)
 
-    # todo: should be part of the interface
-    # todo: acts as the means to sync with db state
-    def update_memory_state(self) -> None:
-        """_summary_"""
+    def _on_renting_over(self, event: Dict[str, Any], status: str, at: str) -> None:
+        renting_id = event["rentingID"]
 
-        if len(self._transformed) > 0:
+        renting = self._rentings.get(renting_id)
+        if renting is None or renting["status"] != RENTED:
+            logging.warning(f"Renting {renting_id} is not rented")
             return
 
-        state = self._db.get_all_items(self._db_name, self._collection_name)
+        self._rentings.set(renting_id, "status", status)
+        self._rentings.set(renting_id, at, event[at])
 
-        if state is None:
+        lending_id = renting["lendingID"]
+        lending = self._lendings.get(lending_id)
+        if lending is None:
             return
 
-        self._transformed = state
-
-    def _add_transformed(self, event: SylvesterEvent) -> None:
-        self._transformed.append(event.to_dict())
-
-    # todo: should be part of the interface
-    def flush(self) -> None:
-        """_summary_"""
-
-        if self._flush_state:
-            # * write to the db
-            self._db.put_items(self._transformed, self._db_name, self._collection_name)
-            self._flush_state = False
+        self._lendings.inc(lending_id, "rentedAmount", -renting["rentAmount"])
+        if lending["status"] == RENTED and lending["rentedAmount"] == 0:
+            self._lendings.set(lending_id, "status", LENT)
 
+    @handles("RentClaimed(uint256,uint32)", partition="rentingID")
     def _on_rent_claimed(self, event: Any, decoded_params: List[Any]) -> None:
         # RentClaimed(uint256 indexed rentingID, uint32 collectedAt)
 
@@ -141,6 +179,7 @@ class Transformer:
 
         self._add_transformed(event)
 
+    @handles("StopRent(uint256,uint32)", partition="rentingID")
     def _on_stop_rent(self, event: Any, decoded_params: List[Any]) -> None:
         # StopRent(indexed uint256 rentingID, uint32 stoppedAt)
 
@@ -153,6 +192,7 @@ class Transformer:
 
         self._add_transformed(event)
 
+    @handles("StopLend(uint256,uint32)", partition="lendingID")
     def _on_stop_lend(self, event: Any, decoded_params: List[Any]) -> None:
         # StopLend(uint256 indexed lendingID, uint32 stoppedAt)
 
@@ -165,6 +205,7 @@ class Transformer:
 
         self._add_transformed(event)
 
+    @handles("Rent(address,uint256,uint256,uint16,uint8,uint32)", partition="rentingID")
     def _on_rent(self, event: Any, decoded_params: List[Any]) -> None:
         # Rent(indexed address renterAddress, indexed uint256 lendingID, indexed uint256 rentingID,
         # uint16 rentAmount, uint8 rentDuration, uint32 rentedAt)
@@ -182,6 +223,10 @@ class Transformer:
 
         self._add_transformed(event)
 
+    @handles(
+        "Lend(bool,address,address,uint256,uint256,uint8,bytes4,uint16,uint8)",
+        partition="lendingID",
+    )
     def _on_lend(self, event: Any, decoded_params: List[Any]) -> None:
         # Lend(bool is721, indexed address lenderAddress, indexed address nftAddress,
         # indexed uint256 tokenID,
@@ -194,7 +239,7 @@ class Transformer:
             is_721=decoded_params[0],
             lender_address=decoded_params[1],
             nft_address=decoded_params[2],
-            token_id=decoded_params[3],
+            token_id=str(decoded_params[3]),
             lending_id=int(decoded_params[4]),
             max_rent_duration=int(decoded_params[5]),
             daily_rent_price=unpack_price(decoded_params[6]),
@@ -5,10 +5,11 @@ Event List: Lent, Rented, Returned, LendingStopped, CollateralClaimed
 """
 
 from abc import ABC
-from dataclasses import dataclass
 
+from dto import dto
 
-@dataclass
+
+@dto
 class AzraelEvent(ABC):
     """
     Abstract azrael Event. Holds txHash and txOffset, togther they are a unique
@@ -37,7 +38,7 @@ class AzraelEvent(ABC):
         return _id[0], int(_id[1])
 
 
-@dataclass
+@dto
 class LentEvent(AzraelEvent):
     """
     LentEvent DTO (Data Transfer Object)
@@ -73,13 +74,10 @@ class LentEvent(AzraelEvent):
 
         txHash, txOffset = AzraelEvent.parse_id(doc["_id"])
 
-        del doc["_id"]
-        del doc["event"]
-
-        return cls(txHash, txOffset, **doc)
+        return cls.from_dict({**doc, "txHash": txHash, "txOffset": txOffset})
 
 
-@dataclass
+@dto
 class RentedEvent(AzraelEvent):
     """
     RentedEvent DTO (Data Transfer Object)
@@ -108,13 +106,10 @@ class RentedEvent(AzraelEvent):
 
         txHash, txOffset = AzraelEvent.parse_id(doc["_id"])
 
-        del doc["_id"]
-        del doc["event"]
-
-        return cls(txHash, txOffset, **doc)
+        return cls.from_dict({**doc, "txHash": txHash, "txOffset": txOffset})
 
 
-@dataclass
+@dto
 class ReturnedEvent(AzraelEvent):
     """
     ReturnedEvent DTO (Data Transfer Object)
@@ -141,12 +136,10 @@ class ReturnedEvent(AzraelEvent):
 
         txHash, txOffset = AzraelEvent.parse_id(doc["_id"])
 
-        return cls(
-            txHash, txOffset, lendingId=doc["lendingId"], returnedAt=doc["returnedAt"]
-        )
+        return cls.from_dict({**doc, "txHash": txHash, "txOffset": txOffset})
 
 
-@dataclass
+@dto
 class LendingStoppedEvent(AzraelEvent):
     """
     LendingStopped DTO (Data Transfer Object)
@@ -173,12 +166,10 @@ class LendingStoppedEvent(AzraelEvent):
 
         txHash, txOffset = AzraelEvent.parse_id(doc["_id"])
 
-        return cls(
-            txHash, txOffset, lendingId=doc["lendingId"], stoppedAt=doc["stoppedAt"]
-        )
+        return cls.from_dict({**doc, "txHash": txHash, "txOffset": txOffset})
 
 
-@dataclass
+@dto
 class CollateralClaimedEvent(AzraelEvent):
     """
     CollateralClaimed DTO (Data Transfer Object)
@@ -205,6 +196,4 @@ class CollateralClaimedEvent(AzraelEvent):
 
         txHash, txOffset = AzraelEvent.parse_id(doc["_id"])
 
-        return cls(
-            txHash, txOffset, lendingId=doc["lendingId"], claimedAt=doc["claimedAt"]
-        )
+        return cls.from_dict({**doc, "txHash": txHash, "txOffset": txOffset})
@@ -0,0 +1,114 @@
+"""
+Slotted DTOs (Data Transfer Objects) for the events that the server reads.
+
+`@dto` is a drop in for `@dataclass` on classes whose fields have no defaults.
+The class it returns holds its fields in __slots__ rather than in a __dict__,
+and gets an __init__, a from_dict and a to_dict that are generated for its
+exact fields. from_dict builds an instance straight out of a mongodb document,
+picking only the fields of the class.
+"""
+
+from typing import Any, Dict, List, Type, TypeVar
+
+# TODO: same as transform/dto.py in the indexer, keep the two in sync.
+
+T = TypeVar("T")
+
+
+def _fields(cls: type) -> List[str]:
+    """
+    Returns:
+        List[str]: annotated fields of the class and of its bases, base first.
+        Same order as dataclasses.fields.
+    """
+    fields: Dict[str, None] = {}
+    for klass in reversed(cls.__mro__):
+        for field in klass.__dict__.get("__annotations__", {}):
+            fields[field] = None
+    return list(fields)
+
+
+def compile_function(name: str, source: str, namespace: Dict[str, Any]) -> Any:
+    """
+    Args:
+        name (str): name of the function that the source defines
+        source (str): source of the function
+        namespace (Dict[str, Any]): globals of the function
+
+    Returns:
+        Any: the function
+    """
+    exec(source, namespace)  # pylint: disable=exec-used
+    return namespace[name]
+
+
+def dto(cls: Type[T]) -> Type[T]:
+    """
+    Recreates the class with __slots__ and generated __init__, __repr__, __eq__,
+    to_dict and from_dict. Bases must be decorated with @dto as well, such that
+    none of the instances carry a __dict__.
+
+    Args:
+        cls (Type[T]): class with annotated fields
+
+    Returns:
+        Type[T]: slotted version of the class
+    """
+
+    fields = _fields(cls)
+    inherited = {
+        slot
+        for klass in cls.__mro__[1:]
+        for slot in klass.__dict__.get("__slots__", ())
+    }
+
+    namespace = {
+        key: value
+        for key, value in cls.__dict__.items()
+        if key not in ("__dict__", "__weakref__")
+    }
+    namespace["__slots__"] = tuple(field for field in fields if field not in inherited)
+    namespace["__qualname__"] = cls.__qualname__
+
+    args = ", ".join(fields)
+    assignments = (
+        "".join(f"\n    self.{field} = {field}" for field in fields) or "\n    pass"
+    )
+    namespace["__init__"] = compile_function(
+        "__init__", f"def __init__(self, {args}):{assignments}", {}
+    )
+
+    items = ", ".join(f'"{field}": self.{field}' for field in fields)
+    namespace["to_dict"] = compile_function(
+        "to_dict",
+        f"def to_dict(self):\n    return {{{items}}}",
+        {},
+    )
+    namespace["to_dict"].__doc__ = "Return a dict representation of this event"
+
+    values = ", ".join(f'doc["{field}"]' for field in fields)
+    namespace["from_dict"] = classmethod(
+        compile_function(
+            "from_dict", f"def from_dict(cls, doc):\n    return cls({values})", {}
+        )
+    )
+
+    mine = "".join(f"self.{field}, " for field in fields)
+    theirs = "".join(f"other.{field}, " for field in fields)
+    namespace["__eq__"] = compile_function(
+        "__eq__",
+        "def __eq__(self, other):"
+        "\n    if other.__class__ is not self.__class__:"
+        "\n        return NotImplemented"
+        f"\n    return ({mine}) == ({theirs})",
+        {},
+    )
+
+    def __repr__(self):
+        values = ", ".join(f"{field}={getattr(self, field)!r}" for field in fields)
+        return f"{self.__class__.__qualname__}({values})"
+
+    namespace["__hash__"] = None
+    namespace["__repr__"] = __repr__
+
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
@@ -1,32 +1,35 @@
 """RKL Holders Graphql Resolver"""
 
-from typing import Dict, List
+from typing import List
 
 from db import DB
 from tartiflette import Resolver
 
-DATABASE_NAME = 'ethereum-indexer'
-COLLECTION_NAME = '0xEf0182dc0574cd5874494a120750FD222FdB909a-state'
+DATABASE_NAME = "ethereum-indexer"
+COLLECTION_NAME = "0xEf0182dc0574cd5874494a120750FD222FdB909a-state"
 
 db = DB()
 
+
 @Resolver("Query.kongsByAddress")
-async def resolve_kongs_by_address(_parent, args, _ctx, _info) -> Dict:
+async def resolve_kongs_by_address(_parent, args, _ctx, _info) -> List[int]:
     """
     Resolves 'kongsByAddress' graphql query for the Graphql Engine.
 
     Returns:
-        Dict: Mapping of kong id to wallet address, compatible with RKL Graphql schema.
+        List[int]: Ids of the kongs held by the wallet address, compatible with RKL Graphql schema.
     """
-    wallet_address = args['address']
+    wallet_address = args["address"]
 
-    result  = await db.get_item(1, DATABASE_NAME, COLLECTION_NAME)
-    return result[wallet_address]
+    # * served by the owner index, only the ids of the holder's kongs are read
+    options = {"query": {"owner": wallet_address}, "projection": {"_id": 1}}
 
+    results = await db.get_all_items(DATABASE_NAME, COLLECTION_NAME, options=options)
+    return [result["_id"] for result in results]
 
 
 @Resolver("Query.kongHolders")
-async def resolve_kong_holders(_parent, _args, _ctx, _info) -> List[str]:    
+async def resolve_kong_holders(_parent, _args, _ctx, _info) -> List[str]:
     """
     Resolves 'kongHolders' graphql query for the Graphql Engine.
 
@@ -34,7 +37,4 @@ async def resolve_kong_holders(_parent, _args, _ctx, _info) -> List[str]:
         List[str]: List of wallet addresses that are kong holders, compatible with RKL Graphql schema.
     """
 
-    result  = await db.get_item(1, DATABASE_NAME, COLLECTION_NAME)
-
-    del result['_id'] # remove index
-    return list(result.keys())
+    return await db.distinct("owner", DATABASE_NAME, COLLECTION_NAME)
@@ -13,7 +13,7 @@ from typing import Any, Dict, List, Optional
 
 
 class IDB(metaclass=abc.ABCMeta):
-    #pylint: disable=missing-class-docstring
+    # pylint: disable=missing-class-docstring
 
     @classmethod
     def __subclasshook__(cls, subclass):
@@ -42,10 +42,13 @@ class IDB(metaclass=abc.ABCMeta):
         """
         raise NotImplementedError
 
-
     @abc.abstractmethod
     async def get_all_items(
-        self, database_name: str, collection_name: str, limit: int, options: Optional[Dict]
+        self,
+        database_name: str,
+        collection_name: str,
+        limit: int,
+        options: Optional[Dict],
     ) -> List[Any]:
         """_summary_
 
@@ -53,7 +56,7 @@ class IDB(metaclass=abc.ABCMeta):
             database_name (str): name of the database
             collection_name (str): name of the collection
             limit (int): Maximum amount of items to fetch
-            options (Optional[Dict]): "query", "sort"
+            options (Optional[Dict]): "query", "projection", "sort", "collation"
 
         Raises:
             NotImplementedError: _description_
@@ -80,3 +83,27 @@ class IDB(metaclass=abc.ABCMeta):
             Any: _description_
         """
         raise NotImplementedError
+
+    @abc.abstractmethod
+    async def distinct(
+        self,
+        field: str,
+        database_name: str,
+        collection_name: str,
+        options: Optional[Dict],
+    ) -> List[Any]:
+        """_summary_
+
+        Args:
+            field (str): name of the field whose distinct values are returned
+            database_name (str): name of the database
+            collection_name (str): name of the collection
+            options (Optional[Dict]): "query"
+
+        Raises:
+            NotImplementedError: _description_
+
+        Returns:
+            List[Any]: distinct values of the field
+        """
+        raise NotImplementedError
@@ -0,0 +1,43 @@
+"""RKL Club Auction Graphql Resolver"""
+
+from typing import Dict, List
+
+import pymongo
+from db import DB
+from tartiflette import Resolver
+
+DATABASE_NAME = "ethereum-indexer"
+COLLECTION_NAME = "0xa10bEa6303E89225D6fA516594632DddB6FBF3b5-state"
+
+db = DB()
+
+
+@Resolver("Query.topBidders")
+async def resolve_top_bidders(_parent, args, _ctx, _info) -> List[Dict]:
+    """
+    Resolves 'topBidders' graphql query for the Graphql Engine.
+
+    Returns:
+        List[Dict]: The bidders with the highest bid totals, compatible with RKL Club Graphql schema.
+    """
+
+    # * walks the total index backwards, only the top documents are read
+    options = {"query": {}, "sort": [("total", pymongo.DESCENDING)]}
+
+    results = await db.get_all_items(
+        DATABASE_NAME, COLLECTION_NAME, args["limit"], options
+    )
+    return [{"address": result["_id"], "total": result["total"]} for result in results]
+
+
+@Resolver("Query.bidderTotal")
+async def resolve_bidder_total(_parent, args, _ctx, _info) -> float:
+    """
+    Resolves 'bidderTotal' graphql query for the Graphql Engine.
+
+    Returns:
+        float: Sum of the bids of the address, compatible with RKL Club Graphql schema.
+    """
+
+    result = await db.get_item(args["address"], DATABASE_NAME, COLLECTION_NAME)
+    return 0 if result is None else result["total"]
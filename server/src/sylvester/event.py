@@ -5,10 +5,11 @@ Event List: Lend, Rent, StopRent, StopLend, RentClaimed
 """
 
 from abc import ABC
-from dataclasses import dataclass
 
+from dto import dto
 
-@dataclass
+
+@dto
 class SylvesterEvent(ABC):
     """
     Abstract sylvester Event. Holds txHash and txOffset, togther they are a unique
@@ -37,7 +38,7 @@ class SylvesterEvent(ABC):
         return _id[0], int(_id[1])
 
 
-@dataclass
+@dto
 class LendEvent(SylvesterEvent):
     """
     LendEvent DTO (Data Transfer Object)
@@ -71,13 +72,10 @@ class LendEvent(SylvesterEvent):
 
         txHash, txOffset = SylvesterEvent.parse_id(doc["_id"])
 
-        del doc["_id"]
-        del doc["event"]
-
-        return cls(txHash, txOffset, **doc)
+        return cls.from_dict({**doc, "txHash": txHash, "txOffset": txOffset})
 
 
-@dataclass
+@dto
 class RentEvent(SylvesterEvent):
     """
     RentEvent DTO (Data Transfer Object)
@@ -108,13 +106,10 @@ class RentEvent(SylvesterEvent):
 
         txHash, txOffset = SylvesterEvent.parse_id(doc["_id"])
 
-        del doc["_id"]
-        del doc["event"]
-
-        return cls(txHash, txOffset, **doc)
+        return cls.from_dict({**doc, "txHash": txHash, "txOffset": txOffset})
 
 
-@dataclass
+@dto
 class StopRentEvent(SylvesterEvent):
     """
     StopRentEvent DTO (Data Transfer Object)
@@ -141,12 +136,10 @@ class StopRentEvent(SylvesterEvent):
 
         txHash, txOffset = SylvesterEvent.parse_id(doc["_id"])
 
-        return cls(
-            txHash, txOffset, rentingID=doc["rentingID"], stoppedAt=doc["stoppedAt"]
-        )
+        return cls.from_dict({**doc, "txHash": txHash, "txOffset": txOffset})
 
 
-@dataclass
+@dto
 class StopLendEvent(SylvesterEvent):
     """
     StopLendEvent DTO (Data Transfer Object)
@@ -173,12 +166,10 @@ class StopLendEvent(SylvesterEvent):
 
         txHash, txOffset = SylvesterEvent.parse_id(doc["_id"])
 
-        return cls(
-            txHash, txOffset, lendingID=doc["lendingID"], stoppedAt=doc["stoppedAt"]
-        )
+        return cls.from_dict({**doc, "txHash": txHash, "txOffset": txOffset})
 
 
-@dataclass
+@dto
 class RentClaimedEvent(SylvesterEvent):
     """
     RentClaimedEvent DTO (Data Transfer Object)
@@ -205,6 +196,4 @@ class RentClaimedEvent(SylvesterEvent):
 
         txHash, txOffset = SylvesterEvent.parse_id(doc["_id"])
 
-        return cls(
-            txHash, txOffset, rentingID=doc["rentingID"], collectedAt=doc["collectedAt"]
-        )
+        return cls.from_dict({**doc, "txHash": txHash, "txOffset": txOffset})